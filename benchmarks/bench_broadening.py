@@ -0,0 +1,43 @@
+"""
+Benchmark of local resolution sweep with broadening engine.
+
+Run from repository root:
+    python -m benchmarks.bench_broadening
+"""
+
+import timeit
+
+import numpy as np
+
+from simLIBS.broadening import broaden
+
+
+def main():
+    rng = np.random.default_rng(0)
+    stick_wavelength = rng.uniform(200, 400, 5000)
+    stick_intensity = rng.lognormal(size=5000)
+    resolutions = np.arange(500, 10000, 200)
+    wavelength = np.arange(200, 400, 200 / resolutions.max() / 4)
+    for n_resolutions in [1, 8, len(resolutions)]:
+        seconds = (
+            min(
+                timeit.repeat(
+                    lambda: broaden(
+                        stick_wavelength,
+                        stick_intensity,
+                        wavelength,
+                        resolutions[:n_resolutions],
+                    ),
+                    number=3,
+                    repeat=3,
+                )
+            )
+            / 3
+        )
+        print(
+            f"{n_resolutions:>3} resolutions x {len(wavelength)} points: {seconds * 1e3:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
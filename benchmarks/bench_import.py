@@ -0,0 +1,94 @@
+"""
+Cold-import benchmark of simLIBS, every import runs in fresh interpreter.
+
+Run from repository root:
+    python -m benchmarks.bench_import --budget 1.0
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+import numpy as np
+
+HEAVY_MODULES = ["selenium", "webdriver_manager", "matplotlib", "bs4", "scipy"]
+
+
+def cold_import(module: str = "simLIBS") -> float:
+    """
+    Wall time [s] of first import of module in new interpreter
+    """
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return float(output)
+
+
+def loaded_modules(module: str = "simLIBS") -> list:
+    """
+    Top-level packages from HEAVY_MODULES loaded by import of module
+    """
+    code = (
+        f"import sys, {module}\n"
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return output.split()
+
+
+def slowest_imports(module: str = "simLIBS", top: int = 10) -> list:
+    """
+    Modules with largest cumulative import time [s] reported by python -X importtime
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stderr
+    rows = re.findall(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+(\S+)", stderr)
+    rows = sorted(((int(cumulative) / 1e6, name) for cumulative, name in rows))
+    return rows[::-1][:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    timings = [cold_import() for _ in range(args.repeat)]
+    median = float(np.median(timings))
+    print(
+        f"cold import of simLIBS: median {median * 1e3:.0f} ms, min {min(timings) * 1e3:.0f} ms"
+    )
+    for seconds, name in slowest_imports():
+        print(f"{seconds * 1e3:9.1f} ms  {name}")
+    heavy = loaded_modules()
+    if heavy:
+        sys.exit(f"heavy modules imported eagerly: {', '.join(heavy)}")
+    if median > args.budget:
+        sys.exit(f"cold import {median:.3f} s exceeds budget {args.budget:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark of batched interpolation of raw spectra onto common grid against per-object CubicSpline loop.
+
+Run from repository root:
+    python -m benchmarks.bench_interpolation
+"""
+
+import timeit
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+from simLIBS.interpolation import interpolate_spectra
+from simLIBS.spectrum import WavelengthGrid
+
+
+def raw_spectra(n_spectra: int, n_points: int) -> list:
+    # native grids of NIST responses differ slightly between queries
+    rng = np.random.default_rng(0)
+    spectra = []
+    for _ in range(n_spectra):
+        wavelength = np.linspace(200, 1000, n_points + rng.integers(-50, 50))
+        intensity = np.abs(np.sin(wavelength * rng.uniform(1, 3))) * 1e4
+        spectra.append((wavelength, intensity))
+    return spectra
+
+
+def per_object(spectra: list, grid: WavelengthGrid) -> np.ndarray:
+    # the same work as SimulatedLIBS.interpolate before batching, one object at a time
+    rows = []
+    for wavelength, intensity in spectra:
+        spline = CubicSpline(wavelength, intensity, bc_type="natural")
+        rows.append(np.round(np.clip(spline(grid.values), 0, np.inf), 3))
+    return np.stack(rows).astype(np.float32)
+
+
+def main():
+    grid = WavelengthGrid.arange(200, 1000, 0.1)
+    for n_points in [2_000, 32_000]:
+        for n_spectra in [10, 100, 1000]:
+            spectra = raw_spectra(n_spectra, n_points)
+            loop = min(
+                timeit.repeat(lambda: per_object(spectra, grid), number=1, repeat=3)
+            )
+            line = f"{n_spectra:>5} spectra x {n_points:>6} points: loop {loop * 1e3:8.1f} ms"
+            for kind in ["cubic", "pchip", "linear"]:
+                batch = min(
+                    timeit.repeat(
+                        lambda: interpolate_spectra(spectra, grid, kind, decimals=3),
+                        number=1,
+                        repeat=3,
+                    )
+                )
+                line += f", {kind} {batch * 1e3:8.1f} ms ({loop / batch:4.1f}x)"
+            print(line)
+    spectra = raw_spectra(20, 32_000)
+    assert np.allclose(
+        per_object(spectra, grid),
+        interpolate_spectra(spectra, grid, decimals=3).intensity,
+        atol=1e-3,
+    )
+
+
+if __name__ == "__main__":
+    main()
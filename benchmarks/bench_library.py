@@ -0,0 +1,102 @@
+"""
+Benchmark of SpectralLibrary lookup against brute-force comparison with every library spectrum.
+
+Run from repository root:
+    python -m benchmarks.bench_library
+    python -m benchmarks.bench_library --spectra 100000 --points 1600
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from simLIBS.library import SpectralLibrary, normalize_spectra
+from simLIBS.spectrum import SpectrumBatch, WavelengthGrid
+
+
+def synthetic_library(n_spectra: int, n_points: int, seed: int = 0) -> tuple:
+    # three "elements" with fixed lines, line heights follow Boltzmann factor of Te
+    # and line widths follow Ne, so spectra form smooth low-dimensional family
+    rng = np.random.default_rng(seed)
+    grid = WavelengthGrid.shared(np.linspace(200, 1000, n_points))
+    positions = rng.uniform(200, 1000, (3, 15))
+    energies = rng.uniform(1, 5, (3, 15))
+    percentages = rng.dirichlet(np.ones(3), n_spectra) * 100
+    Te = rng.uniform(0.5, 2.0, n_spectra)
+    Ne = 10 ** rng.uniform(17, 18, n_spectra)
+    intensity = np.zeros((n_spectra, n_points), dtype=np.float32)
+    for start in range(0, n_spectra, 2048):
+        rows = slice(start, start + 2048)
+        width = (0.2 * Ne[rows] / 1e17)[:, None, None].astype(np.float32)
+        for element in range(3):
+            heights = percentages[rows, element, None] * np.exp(
+                -energies[element] / Te[rows, None]
+            )
+            for line in range(15):
+                # profile within 5 widths of line centre (width <= 2 nm)
+                window = slice(
+                    *np.searchsorted(grid.values, positions[element, line] + [-10, 10])
+                )
+                profile = np.exp(
+                    -(
+                        ((grid.values[window] - positions[element, line]) / width[:, 0])
+                        ** 2
+                    )
+                ).astype(np.float32)
+                intensity[rows, window] += heights[:, line, None] * profile
+    metadata = pd.DataFrame(percentages, columns=["A", "B", "C"])
+    metadata["Te[eV]"] = Te
+    metadata["Ne[cm^-3]"] = Ne
+    return SpectrumBatch(grid, intensity), metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--spectra", type=int, default=100_000)
+    parser.add_argument("--points", type=int, default=1600)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--components", type=int, nargs="+", default=[8, 16])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    batch, metadata = synthetic_library(args.spectra + args.queries, args.points)
+    print(f"generated {len(batch)} spectra in {time.perf_counter() - start:.1f} s")
+    library_batch, queries = batch[: args.spectra], batch[args.spectra :]
+    library_metadata = metadata.iloc[: args.spectra]
+    truth = metadata.iloc[args.spectra :].reset_index(drop=True)
+
+    # brute force on normalized spectra, the loop SpectralLibrary replaces
+    normalized = normalize_spectra(library_batch.intensity, "area")
+    squared_norms = np.einsum("ij,ij->i", normalized, normalized)
+    start = time.perf_counter()
+    n_brute = min(args.queries, 50)
+    brute = []
+    for query in normalize_spectra(queries.intensity[:n_brute], "area"):
+        brute.append(np.argmin(squared_norms - 2 * normalized @ query))
+    brute_seconds = (time.perf_counter() - start) / n_brute
+    print(f"brute force: {brute_seconds * 1e3:8.3f} ms/query")
+
+    for n_components in args.components:
+        start = time.perf_counter()
+        library = SpectralLibrary.build(
+            library_batch, library_metadata, n_components=n_components
+        )
+        build_seconds = time.perf_counter() - start
+        library.kneighbors(queries[:10], k=5)
+        start = time.perf_counter()
+        result = library.query(queries, k=5)
+        seconds = (time.perf_counter() - start) / len(queries)
+        nearest = result[result["rank"] == 0].reset_index(drop=True)
+        recall = np.mean(nearest["index"].values[:n_brute] == np.array(brute))
+        Te_error = np.abs(nearest["Te[eV]"] - truth["Te[eV]"]).mean()
+        print(
+            f"{n_components:>3} components: build {build_seconds:6.2f} s, "
+            f"query {seconds * 1e3:8.3f} ms/query ({brute_seconds / seconds:7.0f}x), "
+            f"same nearest as brute force {recall:5.1%}, mean |dTe| {Te_error:.4f} eV"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark of dataDopplerArray parsing.
+
+Run from repository root:
+    python -m benchmarks.bench_parsing
+"""
+
+import timeit
+
+import numpy as np
+
+from simLIBS.simulation import parse_js_array
+
+
+def synthetic_script(n_points: int) -> str:
+    wavelength = np.linspace(200, 1000, n_points)
+    intensity = np.abs(np.sin(wavelength)) * 1e5
+    rows = ",\n".join(f"[{w:.4f},{i:.4e}]" for w, i in zip(wavelength, intensity))
+    return (
+        "<script>\n    var dataDopplerArray=[\n"
+        + rows
+        + "];\n    var dataSticksArray=[\n[200.0,1.0]];\n</script>"
+    )
+
+
+def main():
+    sizes = [1_000, 10_000, 100_000, 1_000_000]
+    timings = []
+    for n_points in sizes:
+        script = synthetic_script(n_points)
+        repeat = max(1, 100_000 // n_points)
+        seconds = min(
+            timeit.repeat(
+                lambda: parse_js_array(script, "dataDopplerArray"),
+                number=repeat,
+                repeat=3,
+            )
+        )
+        timings.append(seconds / repeat)
+        print(
+            f"{n_points:>9} points: {timings[-1] * 1e3:9.3f} ms "
+            f"({timings[-1] / n_points * 1e9:6.1f} ns/point)"
+        )
+    slope = np.polyfit(np.log(sizes), np.log(timings), 1)[0]
+    print(f"log-log scaling exponent: {slope:.2f} (1.0 is linear)")
+
+
+if __name__ == "__main__":
+    main()
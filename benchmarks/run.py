@@ -0,0 +1,191 @@
+"""
+Offline benchmark suite: parsing, interpolation, dataset generation and end-to-end throughput
+against local NIST LIBS stand-in server, results written as JSON.
+
+Run from repository root:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --latency 0.2 --error-rate 0.05 --sizes 20 100 --workers 1 4 16
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import simLIBS
+from simLIBS.extract import extract_script
+from simLIBS.fetch import FetchEngine, get_default_engine
+from simLIBS.instrumentation import PipelineStats
+from simLIBS.simulation import SimulatedLIBS
+from simLIBS.testing import StandInServer
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "simLIBS": getattr(simLIBS, "__version__", None),
+    }
+
+
+def best_time(function, repeat: int = 5) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def bench_parsing(resolutions) -> list:
+    results = []
+    for resolution in resolutions:
+        with StandInServer():
+            libs = SimulatedLIBS(
+                elements=["W", "H", "He"],
+                percentages=[50, 25, 25],
+                resolution=resolution,
+            )
+            page = (libs.fetch_engine or get_default_engine()).get(libs.get_site())
+        extract_seconds = best_time(lambda: extract_script(page))
+        script = extract_script(page).decode()
+        seconds = best_time(lambda: libs.retrieve_spectrum_from_html(script))
+        points = len(libs.raw_spectrum)
+        interpolate_seconds = best_time(libs.interpolate)
+        results.append(
+            {
+                "resolution": resolution,
+                "points": points,
+                "page[bytes]": len(page),
+                "extract_script[s]": extract_seconds,
+                "retrieve_spectrum_from_html[s]": seconds,
+                "interpolate[s]": interpolate_seconds,
+            }
+        )
+        print(
+            f"resolution {resolution:>5} ({points:>7} points): "
+            f"extract {extract_seconds * 1e3:8.2f} ms, parse {seconds * 1e3:8.2f} ms, interpolate {interpolate_seconds * 1e3:8.2f} ms"
+        )
+    return results
+
+
+def bench_dataset(
+    sizes, workers, cpu_workers, latency: float, error_rate: float
+) -> list:
+    input_df = pd.DataFrame(
+        {
+            "W": [50, 30, 40],
+            "H": [25, 60, 40],
+            "He": [25, 10, 20],
+            "name": ["A", "B", "C"],
+        }
+    )
+    results = []
+    configurations = [
+        (max_workers, processes)
+        for max_workers in workers
+        for processes in [None] + list(cpu_workers)
+    ]
+    for size in sizes:
+        for max_workers, processes in configurations:
+            with StandInServer(
+                latency=latency, error_rate=error_rate, seed=0
+            ) as server:
+                engine = FetchEngine(max_concurrency=max_workers, backoff=0.05)
+                stats = PipelineStats()
+                start = time.perf_counter()
+                SimulatedLIBS.create_dataset(
+                    input_df,
+                    size=size,
+                    max_workers=max_workers,
+                    cpu_workers=processes,
+                    fetch_engine=engine,
+                    stats=stats,
+                )
+                seconds = time.perf_counter() - start
+            results.append(
+                {
+                    "size": size,
+                    "max_workers": max_workers,
+                    "cpu_workers": processes,
+                    "seconds": seconds,
+                    "samples_per_second": size / seconds,
+                    "server_requests": server.requests,
+                    "server_errors": server.errors,
+                    "fetch": engine.stats.summary(),
+                    "stages": stats.summary(),
+                }
+            )
+            print(
+                f"create_dataset size {size:>5}, workers {max_workers:>3}, "
+                f"processes {processes or '-':>3}: "
+                f"{seconds:7.2f} s ({size / seconds:7.1f} samples/s)"
+            )
+    return results
+
+
+def bench_end_to_end(n_queries: int, latency: float, error_rate: float) -> dict:
+    with StandInServer(latency=latency, error_rate=error_rate, seed=0):
+        engine = FetchEngine(max_concurrency=1, backoff=0.05)
+        start = time.perf_counter()
+        for k in range(n_queries):
+            SimulatedLIBS(
+                Te=1.0 + k / n_queries,
+                Ne=10**17,
+                elements=["W", "H", "He"],
+                percentages=[50, 25, 25],
+                fetch_engine=engine,
+            )
+        seconds = time.perf_counter() - start
+    print(
+        f"end-to-end: {n_queries} queries in {seconds:.2f} s "
+        f"({n_queries / seconds:.1f} queries/s)"
+    )
+    return {
+        "queries": n_queries,
+        "seconds": seconds,
+        "queries_per_second": n_queries / seconds,
+        "fetch": engine.stats.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--cpu-workers", type=int, nargs="*", default=[2])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {
+        "environment": environment(),
+        "config": vars(args),
+        "parsing": bench_parsing(args.resolutions),
+        "create_dataset": bench_dataset(
+            args.sizes, args.workers, args.cpu_workers, args.latency, args.error_rate
+        ),
+        "end_to_end": bench_end_to_end(args.queries, args.latency, args.error_rate),
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
 from simLIBS.simulation import validate_simulated_libs
 
 from simLIBS.simulation import SimulatedLIBS
+
+from simLIBS.cache import ResponseCache
+
+from simLIBS.instrumentation import PipelineStats
@@ -1,18 +1,49 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib import animation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from simLIBS import simulation
+from simLIBS.driver_pool import DriverPool
+
+# formats written with Pillow, without external encoder
+PILLOW_FORMATS = {".gif": "GIF", ".png": "PNG", ".webp": "WEBP"}
 
 
 def get_intensity(
-    resolution_range, Te_range, Ne_range, elements, percentages, low_w=200, upper_w=1000
+    resolution_range,
+    Te_range,
+    Ne_range,
+    elements,
+    percentages,
+    low_w=200,
+    upper_w=1000,
+    cache=None,
+    webscraping="dynamic",
+    max_workers=4,
+    fetch_engine=None,
 ):
-    intensity = []
-    wavelength = []
+    """
+    Fetches raw spectra of all frames concurrently, intensities normalized to maximum
+
+    Parameters
+    ----------
+    webscraping: str
+        'dynamic' - browsers of DriverPool of max_workers size, 'static' - fetch_engine
+    max_workers: int
+        Number of frames fetched at once, frames found in cache are not fetched
 
-    for resolution, Te, Ne in zip(resolution_range, Te_range, Ne_range):
-        libs = simulation.SimulatedLIBS(
+    Returns
+    -------
+    tuple
+        Lists of wavelength and intensity of frames, in order of parameters
+    """
+
+    def frame(parameters, driver_pool):
+        resolution, Te, Ne = parameters
+        spectrum = simulation.SimulatedLIBS(
             Te=Te,
             Ne=Ne,
             elements=elements,
@@ -21,62 +52,187 @@ def get_intensity(
             low_w=low_w,
             upper_w=upper_w,
             max_ion_charge=3,
-            webscraping="dynamic",
+            webscraping=webscraping,
+            cache=cache,
+            fetch_engine=fetch_engine,
+            driver_pool=driver_pool,
+        ).get_raw_spectrum()
+        return (
+            spectrum["wavelength"],
+            spectrum["intensity"] / spectrum["intensity"].max(),
         )
-        spectrum = libs.get_raw_spectrum()
-        wavelength.append(spectrum["wavelength"])
-        intensity.append(spectrum["intensity"] / spectrum["intensity"].max())
 
+    frames = list(zip(resolution_range, Te_range, Ne_range))
+    with (
+        DriverPool(size=max_workers) if webscraping == "dynamic" else nullcontext()
+    ) as driver_pool:
+        with ThreadPoolExecutor(max_workers) as pool:
+            spectra = list(pool.map(lambda f: frame(f, driver_pool), frames))
+    wavelength = [spectrum[0] for spectrum in spectra]
+    intensity = [spectrum[1] for spectrum in spectra]
     return wavelength, intensity
 
 
-def update_plot(
-    index, parameter, wavelength_range, intensity_range, parameter_range, unit
+def frame_title(elements, parameter, value, unit):
+    return f"Elements: {list(elements)} \n{parameter} : {value:0.3e} {unit}"
+
+
+def render_animation(
+    path,
+    parameter,
+    wavelength_range,
+    intensity_range,
+    parameter_range,
+    unit,
+    elements,
+    interval=200,
+    dpi=100,
+    figsize=(6.4, 4.8),
 ):
-    plt.clf()
-    plt.plot(wavelength_range[index], intensity_range[index])
-    plt.xlabel(r"$\lambda$ [nm]")
-    plt.ylabel("Line intensity [a.u]")
-    plt.grid()
-    plt.title(
-        "Elements: ['W', 'Fe', 'Mo'] \n"
-        + parameter
-        + " : "
-        + "{:0.3e}".format(parameter_range[index])
-        + " "
-        + unit
+    """
+    Renders animation headless to file, reusing one Line2D with blitting
+
+    Axes, grid and labels are drawn once; every frame restores this background and draws
+    only the line with new data and the title, without plt.show() or pyplot figure.
+
+    Pillow writes multi-frame file only when all frames are given, so rendered frames are held
+    in memory: width x height bytes per GIF frame (palette) and 3 x width x height bytes per
+    APNG or WebP frame, e.g. about 92 MB (GIF) or 276 MB (APNG, WebP) for 300 frames
+    at 640 x 480. Matplotlib writers (e.g. .mp4) pass frames to encoder one by one.
+
+    Parameters
+    ----------
+    path: str
+        Output file, .gif, .png (APNG) or .webp written with Pillow, other formats
+        with matplotlib writer (e.g. .mp4 with ffmpeg)
+    parameter: str
+        Name of swept parameter shown in title
+    wavelength_range: list[np.ndarray]
+        Wavelength of every frame
+    intensity_range: list[np.ndarray]
+        Intensity of every frame
+    parameter_range: list[float]
+        Value of parameter of every frame
+    unit: str
+        Unit of parameter
+    elements: list[str]
+        Elements shown in title
+    interval: int
+        Delay between frames [ms]
+    dpi: int
+        Resolution of frames
+
+    Returns
+    -------
+    int
+        Number of rendered frames
+    """
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xlim(
+        min(np.min(w) for w in wavelength_range),
+        max(np.max(w) for w in wavelength_range),
+    )
+    ax.set_ylim(0, 1.05 * max(np.max(i) for i in intensity_range))
+    ax.set_xlabel(r"$\lambda$ [nm]")
+    ax.set_ylabel("Line intensity [a.u]")
+    ax.grid()
+    (line,) = ax.plot([], [], animated=True)
+    # title is reserved with the longest text, so layout does not change between frames
+    title = ax.set_title(
+        frame_title(elements, parameter, max(parameter_range, key=abs), unit),
+        animated=True,
     )
 
+    def update(index):
+        line.set_data(wavelength_range[index], intensity_range[index])
+        title.set_text(frame_title(elements, parameter, parameter_range[index], unit))
+        return line, title
 
-def animate_resolution(elements, percentages):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PILLOW_FORMATS:
+        anim = animation.FuncAnimation(
+            fig,
+            update,
+            frames=len(parameter_range),
+            interval=interval,
+            blit=True,
+        )
+        anim.save(path, dpi=dpi)
+        return len(parameter_range)
+
+    from PIL import Image
+
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    images = []
+    palette = None
+    for index in range(len(parameter_range)):
+        canvas.restore_region(background)
+        for artist in update(index):
+            ax.draw_artist(artist)
+        image = Image.frombuffer(
+            "RGBA",
+            canvas.get_width_height(),
+            canvas.buffer_rgba(),
+            "raw",
+            "RGBA",
+            0,
+            1,
+        ).convert("RGB")
+        if extension == ".gif":
+            # colors of background, line and text are the same in all frames, so palette
+            # of the first frame is reused, which is much faster than quantizing every frame
+            if palette is None:
+                palette = image.quantize()
+            image = image.quantize(palette=palette, dither=Image.Dither.NONE)
+        images.append(image)
+    images[0].save(
+        path,
+        format=PILLOW_FORMATS[extension],
+        save_all=True,
+        append_images=images[1:],
+        duration=interval,
+        loop=0,
+        optimize=False,
+    )
+    return len(images)
+
+
+def animate_resolution(elements, percentages, cache=None, path=None):
     resolution_range = np.arange(500, 10000, 200)
-    anim_len = len(resolution_range)
-    wavelength_range, intensity_range = get_intensity(
-        resolution_range=resolution_range,
-        Te_range=[1.0] * anim_len,
-        Ne_range=[10**17] * anim_len,
+    # single query at the highest resolution, lower resolutions are broadened locally from sticks
+    libs = simulation.SimulatedLIBS(
+        Te=1.0,
+        Ne=10**17,
         elements=elements,
         percentages=percentages,
+        resolution=int(resolution_range.max()),
         low_w=200,
         upper_w=400,
+        max_ion_charge=3,
+        webscraping="static",
+        cache=cache,
     )
-
-    fig = plt.figure()
-    anim = animation.FuncAnimation(
-        fig,
-        update_plot,
-        frames=anim_len,
-        fargs=("Resolution", wavelength_range, intensity_range, resolution_range, " "),
-        interval=200,
-    )
-    anim.save(
-        os.path.join("animations", "saved-gifs", "animated_resolution.gif"),
-        writer="imagemagick",
+    spectra = libs.broaden(resolution_range)
+    render_animation(
+        path or os.path.join("animations", "saved-gifs", "animated_resolution.gif"),
+        "Resolution",
+        [spectra["wavelength"]] * len(resolution_range),
+        [
+            spectra[resolution] / spectra[resolution].max()
+            for resolution in resolution_range
+        ],
+        resolution_range,
+        " ",
+        elements,
     )
-    plt.show()
 
 
-def animate_temperature(elements, percentages):
+def animate_temperature(
+    elements, percentages, cache=None, path=None, max_workers=4, webscraping="dynamic"
+):
     Te_range = np.arange(0.5, 5, 0.25)
     anim_len = len(Te_range)
     wavelength_range, intensity_range = get_intensity(
@@ -87,24 +243,24 @@ def animate_temperature(elements, percentages):
         percentages=percentages,
         low_w=200,
         upper_w=400,
+        cache=cache,
+        webscraping=webscraping,
+        max_workers=max_workers,
     )
-
-    fig = plt.figure()
-    anim = animation.FuncAnimation(
-        fig,
-        update_plot,
-        frames=anim_len,
-        fargs=("Temperature", wavelength_range, intensity_range, Te_range, "[eV]"),
-        interval=200,
-    )
-    anim.save(
-        os.path.join("animations", "saved-gifs", "animated_temperature.gif"),
-        writer="imagemagick",
+    render_animation(
+        path or os.path.join("animations", "saved-gifs", "animated_temperature.gif"),
+        "Temperature",
+        wavelength_range,
+        intensity_range,
+        Te_range,
+        "[eV]",
+        elements,
     )
-    plt.show()
 
 
-def animate_density(elements, percentages):
+def animate_density(
+    elements, percentages, cache=None, path=None, max_workers=4, webscraping="dynamic"
+):
     Ne_range = np.arange(0.7, 1.3, 0.05)
     Ne_range *= 10**17
     anim_len = len(Ne_range)
@@ -116,21 +272,19 @@ def animate_density(elements, percentages):
         percentages=percentages,
         low_w=200,
         upper_w=400,
+        cache=cache,
+        webscraping=webscraping,
+        max_workers=max_workers,
     )
-
-    fig = plt.figure()
-    anim = animation.FuncAnimation(
-        fig,
-        update_plot,
-        frames=anim_len,
-        fargs=("Density", wavelength_range, intensity_range, Ne_range, "[$cm^{-3}$]"),
-        interval=200,
-    )
-    anim.save(
-        os.path.join("animations", "saved-gifs", "animated_density.gif"),
-        writer="imagemagick",
+    render_animation(
+        path or os.path.join("animations", "saved-gifs", "animated_density.gif"),
+        "Density",
+        wavelength_range,
+        intensity_range,
+        Ne_range,
+        "[$cm^{-3}$]",
+        elements,
     )
-    plt.show()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,192 @@
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from simLIBS.interpolation import BLOCK_POINTS
+from simLIBS.spectrum import SpectrumBatch, WavelengthGrid
+
+
+class Augmenter(object):
+    """
+    Random perturbations of simulated spectra: wavelength shift, intensity scaling,
+    baseline drift and noise, applied to whole (spectra, wavelength) intensity matrix at once.
+
+    Every spectrum gets its own random parameters drawn from generator seeded once,
+    so the sequence of augmented batches is reproducible.
+    """
+
+    def __init__(
+        self,
+        shift: float = 0.05,
+        scale: Tuple[float, float] = (0.8, 1.25),
+        baseline: float = 0.02,
+        baseline_order: int = 2,
+        noise: float = 0.005,
+        clip: bool = True,
+        seed: Optional[int] = None,
+    ):
+        """
+
+        Parameters
+        ----------
+        shift: float
+            Maximal wavelength shift [nm], drawn uniformly from [-shift, shift]
+        scale: tuple[float, float]
+            Range of intensity scaling factor, drawn log-uniformly
+        baseline: float
+            Maximal baseline level relative to spectrum maximum
+        baseline_order: int
+            Order of non-negative polynomial baseline
+        noise: float
+            Standard deviation of Gaussian noise relative to spectrum maximum
+        clip: bool
+            Clip negative intensities to zero
+        seed: int
+            Seed of random generator
+
+        """
+        if shift < 0 or baseline < 0 or noise < 0:
+            raise ValueError("Shift, baseline and noise must be non-negative.")
+        if not 0 < scale[0] <= scale[1]:
+            raise ValueError("Scale range must be positive and increasing.")
+        self.shift = shift
+        self.scale = tuple(scale)
+        self.baseline = baseline
+        self.baseline_order = baseline_order
+        self.noise = noise
+        self.clip = clip
+        self.rng = np.random.default_rng(seed)
+
+    def __repr__(self):
+        return (
+            f"Augmenter(shift={self.shift}, scale={self.scale}, baseline={self.baseline}, "
+            f"noise={self.noise})"
+        )
+
+    def __call__(
+        self, spectra: Union[SpectrumBatch, np.ndarray], copies: int = 1
+    ) -> SpectrumBatch:
+        """
+        Augments spectra
+
+        Parameters
+        ----------
+        spectra: SpectrumBatch or np.ndarray
+            Spectra to augment, np.ndarray is taken as intensity on uniform grid of unit step
+        copies: int
+            Number of variants of every spectrum, variants of one spectrum are adjacent rows
+
+        Returns
+        -------
+        SpectrumBatch
+            Float32 intensity of shape (copies * spectra, wavelength)
+        """
+        if not isinstance(spectra, SpectrumBatch):
+            intensity = np.array(spectra, dtype=np.float32, ndmin=2)
+            spectra = SpectrumBatch(
+                WavelengthGrid.shared(np.arange(intensity.shape[1])), intensity
+            )
+        out = np.empty((len(spectra) * copies, len(spectra.grid)), dtype=np.float32)
+        block_size = max(1, BLOCK_POINTS // max(1, len(spectra.grid)))
+        for start in range(0, len(out), block_size):
+            rows = np.arange(start, min(start + block_size, len(out))) // copies
+            self.augment_block(
+                spectra.intensity,
+                rows,
+                spectra.grid.values,
+                out[start : start + block_size],
+            )
+        return SpectrumBatch(spectra.grid, out)
+
+    def augment_block(
+        self,
+        intensity: np.ndarray,
+        rows: np.ndarray,
+        wavelength: np.ndarray,
+        out: np.ndarray,
+    ):
+        n, points = len(rows), len(wavelength)
+
+        # shift: linear interpolation at w - delta, end values are held
+        if self.shift > 0:
+            delta = self.rng.uniform(-self.shift, self.shift, n)
+            step = np.diff(wavelength)
+            if np.allclose(step, step.mean(), rtol=1e-6, atol=1e-9):
+                # uniform grid: whole row moves by the same fractional number of points
+                # rows padded with end values, shifted rows are windows of padded rows
+                offset = -delta / step.mean()
+                whole = np.floor(offset).astype(np.intp)
+                fraction = (offset - whole)[:, None].astype(np.float32)
+                pad = int(np.abs(whole).max()) + 1
+                padded = np.pad(intensity[rows], ((0, 0), (pad, pad)), mode="edge")
+                windows = np.lib.stride_tricks.sliding_window_view(
+                    padded, points, axis=1
+                )
+                out[:] = windows[np.arange(n), pad + whole]
+                upper = windows[np.arange(n), pad + whole + 1]
+                upper -= out
+                upper *= fraction
+                out += upper
+            else:
+                position = np.interp(
+                    wavelength[None, :] - delta[:, None], wavelength, np.arange(points)
+                )
+                lower = np.minimum(position.astype(np.intp), points - 2)
+                fraction = (position - lower).astype(np.float32)
+                lower += (rows * points)[:, None]
+                np.take(intensity, lower, out=out)
+                upper = np.take(intensity, lower + 1)
+                upper -= out
+                upper *= fraction
+                out += upper
+        else:
+            np.take(intensity, rows, axis=0, out=out)
+
+        low, high = np.log(self.scale)
+        factor = np.exp(self.rng.uniform(low, high, n)).astype(np.float32)
+        out *= factor[:, None]
+        peak = out.max(axis=1, keepdims=True)
+
+        # baseline: non-negative polynomial of wavelength scaled to [0, 1]
+        if self.baseline > 0:
+            t = (wavelength - wavelength[0]) / max(
+                wavelength[-1] - wavelength[0], 1e-12
+            )
+            powers = np.vander(t, self.baseline_order + 1, increasing=True).T
+            coefficients = self.rng.uniform(
+                0, self.baseline / (self.baseline_order + 1), (n, len(powers))
+            )
+            coefficients *= peak
+            out += coefficients.astype(np.float32) @ powers.astype(np.float32)
+
+        if self.noise > 0:
+            noise = self.rng.standard_normal((n, points), dtype=np.float32)
+            noise *= self.noise * peak
+            out += noise
+        if self.clip:
+            np.clip(out, 0, None, out=out)
+
+    def stream(self, batches: Iterable, copies: int = 1) -> Iterator:
+        """
+        Generator stage augmenting every batch, e.g. of DatasetReader.batches
+
+        Parameters
+        ----------
+        batches: Iterable
+            SpectrumBatch objects or (SpectrumBatch, metadata DataFrame) pairs
+        copies: int
+            Number of variants of every spectrum
+
+        Yields
+        ------
+        SpectrumBatch or tuple[SpectrumBatch, pd.DataFrame]
+            Augmented spectra, with metadata rows repeated for variants
+        """
+        for batch in batches:
+            if isinstance(batch, tuple):
+                spectra, metadata = batch
+                yield self(spectra, copies), metadata.loc[
+                    metadata.index.repeat(copies)
+                ].reset_index(drop=True)
+            else:
+                yield self(batch, copies)
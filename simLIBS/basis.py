@@ -0,0 +1,207 @@
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from simLIBS.cache import ResponseCache
+from simLIBS.driver_pool import DriverPool
+from simLIBS.fetch import FetchEngine
+from simLIBS.instrumentation import PipelineStats
+from simLIBS.simulation import SimulatedLIBS, round_significant
+from simLIBS.spectrum import Spectrum, WavelengthGrid
+
+
+class BasisLibrary(object):
+    """
+    Single-element basis spectra used to synthesize compositions by linear mixing.
+
+    At fixed Te and Ne, contribution of each element in NIST LIBS model scales with its percentage,
+    so spectrum of composition is weighted sum of 100% single-element spectra on shared grid.
+    Every basis spectrum is fetched once per (element, Te, Ne), also when requested by many threads at once.
+    """
+
+    def __init__(
+        self,
+        resolution: int = 1000,
+        low_w: int = 200,
+        upper_w: int = 1000,
+        max_ion_charge: int = 3,
+        webscraping: str = "static",
+        cache: Optional[ResponseCache] = None,
+        fetch_engine: Optional[FetchEngine] = None,
+        driver_pool: Optional[DriverPool] = None,
+        stats: Optional[PipelineStats] = None,
+    ):
+        """
+
+        Parameters
+        ----------
+        resolution: int
+            Resoultion of spectrometer
+        low_w: int
+            Lower wavelength [nm]
+        upper_w: int
+            Upper wavelength [nm]
+        max_ion_charge: int
+            Maximal ion charge
+        webscraping : str
+            Type of webscraping: 'static' or 'dynamic'
+        cache: ResponseCache
+            Optional on-disk cache of NIST LIBS responses
+        fetch_engine: FetchEngine
+            HTTP fetch layer for static webscraping
+        driver_pool: DriverPool
+            Pool of browsers for dynamic webscraping
+        stats: PipelineStats
+            Optional recorder of stage timings of basis queries
+
+        """
+        self.resolution = resolution
+        self.low_w = low_w
+        self.upper_w = upper_w
+        self.max_ion_charge = max_ion_charge
+        self.webscraping = webscraping
+        self.cache = cache
+        self.fetch_engine = fetch_engine
+        self.driver_pool = driver_pool
+        self.stats = stats
+        self.grid: Optional[WavelengthGrid] = None
+        self.fetches = 0
+        self._spectra: Dict[Tuple[str, float, float], "Future[np.ndarray]"] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._spectra)
+
+    @staticmethod
+    def key(element: str, Te: float, Ne: float) -> Tuple[str, float, float]:
+        # the same rounding of Ne as in SimulatedLIBS, so equal queries share basis spectrum
+        return str(element), float(Te), float(round_significant(Ne))
+
+    def simulate(
+        self, elements: List[str], percentages: List[float], Te: float, Ne: float
+    ):
+        return SimulatedLIBS(
+            Te=Te,
+            Ne=Ne,
+            elements=list(elements),
+            percentages=list(percentages),
+            resolution=self.resolution,
+            low_w=self.low_w,
+            upper_w=self.upper_w,
+            max_ion_charge=self.max_ion_charge,
+            webscraping=self.webscraping,
+            cache=self.cache,
+            fetch_engine=self.fetch_engine,
+            driver_pool=self.driver_pool,
+            stats=self.stats,
+        ).spectrum
+
+    def basis(self, element: str, Te: float, Ne: float) -> np.ndarray:
+        """
+        Returns intensity of 100% single-element spectrum, fetched on first request
+
+        Returns
+        -------
+        np.ndarray
+            Intensity on shared wavelength grid
+        """
+        key = self.key(element, Te, Ne)
+        with self._lock:
+            in_flight = self._spectra.get(key)
+            if in_flight is None:
+                future: "Future[np.ndarray]" = Future()
+                self._spectra[key] = future
+        if in_flight is not None:
+            return in_flight.result()
+        try:
+            spectrum = self.simulate([element], [100], Te, Ne)
+        except BaseException as error:
+            with self._lock:
+                del self._spectra[key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            self.fetches += 1
+            if self.grid is None:
+                self.grid = spectrum.grid
+        intensity: np.ndarray = spectrum.intensity.astype(np.float64)
+        future.set_result(intensity)
+        return intensity
+
+    def spectrum(
+        self, elements: List[str], percentages: List[float], Te: float, Ne: float
+    ) -> Spectrum:
+        """
+        Synthesizes spectrum of composition as weighted sum of basis spectra
+
+        Parameters
+        ----------
+        elements: list[str]
+            List of elements
+        percentages: list[percentages]
+            List of element percentages
+        Te : float
+             Electron temperature Te [eV]
+        Ne: float
+            Electron density Ne [cm^-3]
+
+        Returns
+        -------
+        Spectrum
+            Spectrum on shared grid of basis spectra, as SimulatedLIBS.spectrum
+        """
+        intensity = None
+        for element, percentage in zip(elements, percentages):
+            if float(percentage) == 0:
+                continue
+            contribution = float(percentage) / 100 * self.basis(element, Te, Ne)
+            intensity = contribution if intensity is None else intensity + contribution
+        if intensity is None:
+            intensity = np.zeros_like(self.basis(elements[0], Te, Ne))
+        # grid is set by the first basis spectrum fetched above
+        assert self.grid is not None
+        return Spectrum(self.grid, np.round(intensity, 3))
+
+    def validate(
+        self,
+        elements: List[str],
+        percentages: List[float],
+        Te: float,
+        Ne: float,
+        tolerance: float = 0.05,
+    ) -> float:
+        """
+        Compares mixed spectrum with direct fetch of the same composition
+
+        Parameters
+        ----------
+        tolerance: float
+            Maximal accepted error relative to maximal intensity of direct spectrum
+
+        Returns
+        -------
+        float
+            Maximal relative error
+
+        Raises
+        ------
+        ValueError
+            If error exceeds tolerance
+        """
+        mixed = self.spectrum(elements, percentages, Te, Ne).intensity.astype(
+            np.float64
+        )
+        direct = self.simulate(elements, percentages, Te, Ne).intensity.astype(
+            np.float64
+        )
+        error = float(
+            np.max(np.abs(mixed - direct)) / max(np.max(np.abs(direct)), 1e-12)
+        )
+        if error > tolerance:
+            raise ValueError(
+                f"Linear mixing error {error:.3g} exceeds tolerance {tolerance:.3g} for "
+                f"elements={list(elements)}, percentages={list(percentages)}, Te={Te}, Ne={Ne}"
+            )
+        return error
@@ -0,0 +1,136 @@
+from typing import Optional
+
+import numpy as np
+
+FWHM_TO_SIGMA = 1 / (2 * np.sqrt(2 * np.log(2)))
+
+
+def doppler_relative_fwhm(Te: float, mass: float) -> float:
+    """
+    Relative Doppler FWHM (FWHM / wavelength) of line emitted at temperature Te
+
+    Parameters
+    ----------
+    Te : float
+        Temperature [eV]
+    mass: float
+        Mass of emitter [u]
+
+    Returns
+    -------
+    float
+    """
+    return 7.16e-7 * np.sqrt(Te * 11604.518 / mass)
+
+
+def broaden(
+    stick_wavelength: np.ndarray,
+    stick_intensity: np.ndarray,
+    wavelength: np.ndarray,
+    resolution,
+    doppler_fwhm: float = 0.0,
+    profile: str = "area",
+    oversampling: int = 8,
+) -> np.ndarray:
+    """
+    Broadens line list (sticks) with Gaussian instrument and Doppler profiles
+
+    FWHM of instrument profile is wavelength / resolution and Doppler FWHM is proportional to
+    wavelength too, so on uniform grid of log(wavelength) the kernel has constant width and
+    convolution is single FFT product, shared by all requested resolutions.
+
+    Parameters
+    ----------
+    stick_wavelength: np.ndarray
+        Line wavelengths [nm]
+    stick_intensity: np.ndarray
+        Line intensities
+    wavelength: np.ndarray
+        Increasing output wavelength grid [nm]
+    resolution: int or np.ndarray
+        Resolving power(s) of spectrometer
+    doppler_fwhm: float
+        Relative Doppler FWHM added in quadrature (see doppler_relative_fwhm)
+    profile: str
+        'area' - line area equals stick intensity [1/nm], 'peak' - line height equals stick intensity
+    oversampling: int
+        Points of log-wavelength grid per FWHM of the narrowest profile
+
+    Returns
+    -------
+    np.ndarray
+        Spectrum of shape (len(wavelength),) for scalar resolution or (len(resolution), len(wavelength))
+    """
+    if profile not in ("area", "peak"):
+        raise ValueError(f"Unknown profile: {profile}")
+    resolutions = np.atleast_1d(np.asarray(resolution, dtype=np.float64))
+    wavelength = np.asarray(wavelength, dtype=np.float64)
+    fwhm = np.sqrt(1 / resolutions**2 + doppler_fwhm**2)
+    sigma = fwhm * FWHM_TO_SIGMA
+
+    # uniform log-wavelength grid with margin of 5 widest sigmas
+    step = fwhm.min() / oversampling
+    margin = 5 * sigma.max()
+    start = np.log(wavelength[0]) - margin
+    n = int(np.ceil((np.log(wavelength[-1]) + margin - start) / step)) + 1
+    n_fft = 1 << int(np.ceil(np.log2(n)))
+
+    # linear deposition of sticks on two neighbouring nodes preserves line centroids
+    position = (np.log(np.asarray(stick_wavelength, dtype=np.float64)) - start) / step
+    inside = (position >= 0) & (position < n - 1)
+    position = position[inside]
+    weight = np.asarray(stick_intensity, dtype=np.float64)[inside]
+    lower = np.floor(position).astype(np.int64)
+    fraction = position - lower
+    sticks = np.bincount(lower, weight * (1 - fraction), minlength=n_fft)
+    sticks += np.bincount(lower + 1, weight * fraction, minlength=n_fft)
+
+    frequency = np.fft.rfftfreq(n_fft, d=step)
+    transfer = np.exp(-2 * (np.pi * frequency[None, :] * sigma[:, None]) ** 2)
+    # convolution with unit-area kernel on log grid, divided by step: density per unit of log(wavelength)
+    spectra = np.fft.irfft(np.fft.rfft(sticks)[None, :] * transfer, n=n_fft)[:, :n]
+    spectra /= step
+    if profile == "peak":
+        spectra *= (sigma * np.sqrt(2 * np.pi))[:, None]
+
+    # linear interpolation to output grid, the same weights for all resolutions
+    node = (np.log(wavelength) - start) / step
+    left = np.floor(node).astype(np.int64)
+    fraction = node - left
+    result = spectra[:, left] * (1 - fraction) + spectra[:, left + 1] * fraction
+    if profile == "area":
+        # density per unit of log(wavelength) to density per nm
+        result /= wavelength
+    np.clip(result, 0, None, out=result)
+    return result[0] if np.ndim(resolution) == 0 else result
+
+
+def compare_spectra(
+    reference: np.ndarray, broadened: np.ndarray, scale: Optional[float] = None
+) -> dict:
+    """
+    Compares broadened spectrum with reference (e.g. NIST dataDopplerArray) on the same grid
+
+    Parameters
+    ----------
+    scale: float
+        Factor applied to broadened spectrum, default: least squares fit
+
+    Returns
+    -------
+    dict
+        Fitted scale, maximal and RMS error relative to maximal reference intensity
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    broadened = np.asarray(broadened, dtype=np.float64)
+    if scale is None:
+        scale = float(
+            np.dot(broadened, reference) / max(np.dot(broadened, broadened), 1e-300)
+        )
+    difference = scale * broadened - reference
+    norm = max(np.abs(reference).max(), 1e-300)
+    return {
+        "scale": scale,
+        "max_error": float(np.abs(difference).max() / norm),
+        "rms_error": float(np.sqrt(np.mean(difference**2)) / norm),
+    }
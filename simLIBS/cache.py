@@ -0,0 +1,253 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+
+class CacheMissError(Exception):
+    pass
+
+
+def _normalize_number(value: str) -> str:
+    try:
+        return repr(float(value))
+    except ValueError:
+        return value
+
+
+def _normalize_composition(value: str) -> str:
+    parts = []
+    for part in value.split(";"):
+        element, _, percentage = part.partition(":")
+        parts.append(
+            f"{element}:{_normalize_number(percentage)}" if percentage else part
+        )
+    return ";".join(parts)
+
+
+def normalize_query(site: str, kind: str = "static") -> str:
+    """
+    Normalizes NIST LIBS query built by SimulatedLIBS.get_site().
+
+    Query parameters are sorted and numeric values (including percentages in composition)
+    are written in canonical float form, so '50' and '50.0' point to the same entry.
+
+    Parameters
+    ----------
+    site: str
+        URL of NIST LIBS query
+    kind: str
+        Kind of cached response: 'static' or 'dynamic'
+
+    Returns
+    -------
+    str
+        Normalized query
+    """
+    url = urlsplit(site)
+    params = []
+    for name, value in parse_qsl(url.query, keep_blank_values=True):
+        if name == "composition":
+            value = _normalize_composition(value)
+        else:
+            value = _normalize_number(value)
+        params.append((name, value))
+    query = "&".join(f"{name}={value}" for name, value in sorted(params))
+    return f"{kind}:{url.netloc}{url.path}?{query}"
+
+
+class ResponseCache(object):
+    """
+    Persistent SQLite cache of NIST LIBS responses with zlib-compressed blobs.
+
+    Entries are keyed by SHA-256 of normalized query, evicted in least recently used
+    order when total compressed size exceeds max_bytes, and optionally expire after ttl seconds.
+    Total size is read once when cache is opened and then tracked by this object, so entries
+    written meanwhile by other processes sharing the file are counted when it is reopened.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = 512 * 1024**2,
+        ttl: Optional[float] = None,
+        offline: bool = False,
+    ):
+        """
+
+        Parameters
+        ----------
+        path: str
+            Path of SQLite file, default: $SIMLIBS_CACHE_DIR/responses.sqlite or ~/.cache/simLIBS/responses.sqlite
+        max_bytes: int
+            Maximal total size of compressed responses [B]
+        ttl: float
+            Time to live of entries [s], None - entries never expire
+        offline: bool
+            Cache-only mode, missing entries raise CacheMissError instead of being downloaded
+
+        """
+        if path is None:
+            cache_dir = os.environ.get(
+                "SIMLIBS_CACHE_DIR",
+                os.path.join(os.path.expanduser("~"), ".cache", "simLIBS"),
+            )
+            os.makedirs(cache_dir, exist_ok=True)
+            path = os.path.join(cache_dir, "responses.sqlite")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, query TEXT, content BLOB, size INTEGER, "
+                "created REAL, accessed REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+            self._bytes = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+
+    def __getstate__(self):
+        # connection belongs to one process, copy opens the same file again
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "offline": self.offline,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_bytes"], state["ttl"], state["offline"])
+        self.hits = state["hits"]
+        self.misses = state["misses"]
+
+    def __repr__(self):
+        return f"ResponseCache(path={self.path}, max_bytes={self.max_bytes}, ttl={self.ttl}, offline={self.offline})"
+
+    @staticmethod
+    def key(site: str, kind: str = "static") -> str:
+        return hashlib.sha256(normalize_query(site, kind).encode()).hexdigest()
+
+    def get(self, site: str, kind: str = "static") -> Optional[bytes]:
+        """
+        Returns cached response or None, counts hit or miss
+        """
+        key = self.key(site, kind)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT content, created, size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._bytes -= row[2]
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        return zlib.decompress(row[0])
+
+    def put(self, site: str, content: bytes, kind: str = "static"):
+        """
+        Stores response and evicts least recently used entries above max_bytes
+        """
+        blob = zlib.compress(content)
+        key = self.key(site, kind)
+        now = time.time()
+        with self._lock, self._connection:
+            replaced = self._connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, normalize_query(site, kind), blob, len(blob), now, now),
+            )
+            self._bytes += len(blob) - (0 if replaced is None else replaced[0])
+            # oldest entries are read from index in small batches, only when over budget
+            while self._bytes > self.max_bytes:
+                oldest = self._connection.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed LIMIT 16"
+                ).fetchall()
+                if not oldest:
+                    self._bytes = 0
+                    break
+                for old_key, size in oldest:
+                    if self._bytes <= self.max_bytes:
+                        break
+                    self._connection.execute(
+                        "DELETE FROM responses WHERE key = ?", (old_key,)
+                    )
+                    self._bytes -= size
+
+    def fetch(
+        self, site: str, download: Callable[[str], bytes], kind: str = "static"
+    ) -> bytes:
+        """
+        Returns cached response or downloads and stores it
+
+        Parameters
+        ----------
+        site: str
+            URL of NIST LIBS query
+        download: Callable[[str], bytes]
+            Function downloading response for given URL
+        kind: str
+            Kind of cached response: 'static' or 'dynamic'
+
+        Returns
+        -------
+        bytes
+            Response content
+        """
+        content = self.get(site, kind)
+        if content is not None:
+            return content
+        if self.offline:
+            raise CacheMissError(f"Query not found in offline cache: {site}")
+        content = download(site)
+        self.put(site, content, kind)
+        return content
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+            self._bytes = 0
+
+    def close(self):
+        self._connection.close()
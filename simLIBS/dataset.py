@@ -0,0 +1,538 @@
+import glob
+import json
+import os
+import struct
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from simLIBS.spectrum import Spectrum, SpectrumBatch, WavelengthGrid
+
+
+class DatasetBuilder(object):
+    """
+    Assembles simulated dataset in preallocated float32 intensity matrix and separate metadata table.
+
+    With output_dir, every chunk_size samples are flushed to disk as chunk-XXXXX.npy (intensity)
+    and chunk-XXXXX.csv (metadata), so peak memory is bounded by chunk size rather than dataset size.
+    Directory is marked by chunks.json; chunks of earlier run in marked directory are removed
+    when builder is created, non-empty directory without marker is refused.
+    """
+
+    def __init__(
+        self,
+        metadata_columns: List[str],
+        size: int,
+        chunk_size: Optional[int] = None,
+        output_dir: Optional[str] = None,
+    ):
+        """
+
+        Parameters
+        ----------
+        metadata_columns: list[str]
+            Names of metadata columns: composition, name, Te and Ne
+        size : int
+            Number of samples
+        chunk_size: int
+            Number of samples kept in memory before flush to output_dir, default: size
+        output_dir: str
+            Optional directory for chunk files, empty or written by earlier DatasetBuilder
+            (its chunks are removed)
+
+        Raises
+        ------
+        ValueError
+            When output_dir holds other files and no chunks.json marker
+
+        """
+        self.metadata_columns = list(metadata_columns)
+        self.size = size
+        self.chunk_size = min(chunk_size or size, size) if output_dir else size
+        self.output_dir = output_dir
+        self.grid: Optional[WavelengthGrid] = None
+        self.wavelength: Optional[np.ndarray] = None
+        self.intensity: Optional[np.ndarray] = None
+        self.metadata: List[List[Any]] = []
+        self.chunks: List[str] = []
+        self.index: List[List[Any]] = []
+        self.count = 0
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            marker = os.path.join(output_dir, "chunks.json")
+            if not os.path.exists(marker) and os.listdir(output_dir):
+                raise ValueError(
+                    f"Directory {output_dir} is not empty and has no chunks.json of earlier dataset."
+                )
+            # readers take all chunk files of directory, stale chunks of longer run would be appended;
+            # wavelength.npy is rewritten by first sample (and may belong to ledger in the same directory)
+            for path in glob.glob(os.path.join(output_dir, "chunk-*.npy")) + glob.glob(
+                os.path.join(output_dir, "chunk-*.csv")
+            ):
+                os.remove(path)
+            with open(marker, "w") as file:
+                json.dump({"size": size, "chunk_size": self.chunk_size}, file, indent=2)
+
+    def add(self, wavelength, intensity: np.ndarray, metadata: List[Any]):
+        """
+        Appends sample (wavelength given as WavelengthGrid or array), flushes chunk to disk when it is full
+        """
+        if self.intensity is None:
+            self.grid = (
+                wavelength
+                if isinstance(wavelength, WavelengthGrid)
+                else WavelengthGrid.shared(wavelength)
+            )
+            self.wavelength = self.grid.values
+            self.intensity = np.empty(
+                (self.chunk_size, len(self.wavelength)), dtype=np.float32
+            )
+            if self.output_dir is not None:
+                np.save(
+                    os.path.join(self.output_dir, "wavelength.npy"), self.wavelength
+                )
+        self.intensity[len(self.metadata)] = intensity
+        self.metadata.append(list(metadata))
+        self.count += 1
+        if self.output_dir is not None and len(self.metadata) == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes current chunk to output_dir
+        """
+        if self.output_dir is None or not self.metadata:
+            return
+        assert self.intensity is not None
+        path = os.path.join(self.output_dir, f"chunk-{len(self.chunks):05d}")
+        np.save(path + ".npy", self.intensity[: len(self.metadata)])
+        self.metadata_frame().to_csv(path + ".csv", index=False)
+        self.chunks.append(path)
+        chunk = os.path.basename(path)
+        self.index.extend(row + [chunk] for row in self.metadata)
+        self.metadata = []
+
+    def metadata_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.metadata, columns=self.metadata_columns)
+
+    def index_frame(self) -> pd.DataFrame:
+        """
+        Returns metadata of flushed samples with name of chunk file holding their spectra
+        """
+        return pd.DataFrame(self.index, columns=self.metadata_columns + ["chunk"])
+
+    def batch(self) -> SpectrumBatch:
+        """
+        Returns spectra of current chunk, without copy
+        """
+        if self.grid is None or self.intensity is None:
+            raise ValueError("Dataset has no samples.")
+        return SpectrumBatch(self.grid, self.intensity[: len(self.metadata)])
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Returns wide DataFrame: one column per wavelength followed by metadata columns
+        """
+        if self.output_dir is not None:
+            self.flush()
+            return read_dataset_chunks(self.output_dir)
+        if self.intensity is None:
+            return pd.DataFrame(columns=self.metadata_columns)
+        return self.batch().to_dataframe(self.metadata_frame())
+
+
+class SampleLedger(object):
+    """
+    Append-only on-disk record of finished create_dataset samples, used to resume interrupted run.
+
+    Directory holds ledger.json (parameters of run), wavelength.npy and ledger.bin with records of
+    sample index (int64) and float32 intensity, in order of completion. Record torn by crash
+    is discarded on open.
+    Metadata of samples is not stored, it is derived again from per-sample seed.
+    """
+
+    HEADER = struct.Struct("<q")
+
+    def __init__(self, path: str, parameters: Dict[str, Any]):
+        """
+
+        Parameters
+        ----------
+        path: str
+            Ledger directory, created if it does not exist
+        parameters: dict
+            JSON-serializable parameters of run, must match parameters of existing ledger
+
+        """
+        self.path = path
+        self.parameters = json.loads(json.dumps(parameters))
+        self.wavelength: Optional[np.ndarray] = None
+        self.offsets: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        stored = self.read_parameters(path)
+        if stored is None:
+            with open(os.path.join(path, "ledger.json.tmp"), "w") as file:
+                json.dump(self.parameters, file, indent=2)
+            os.replace(
+                os.path.join(path, "ledger.json.tmp"),
+                os.path.join(path, "ledger.json"),
+            )
+        elif stored != self.parameters:
+            raise ValueError(
+                f"Ledger {path} was written by run with different parameters."
+            )
+        wavelength_path = os.path.join(path, "wavelength.npy")
+        if os.path.exists(wavelength_path):
+            self.wavelength = np.load(wavelength_path)
+        self._file = open(os.path.join(path, "ledger.bin"), "a+b")
+        if self.wavelength is not None:
+            self.scan()
+
+    def __repr__(self):
+        return f"SampleLedger(path={self.path!r}, samples={len(self)})"
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, index: int):
+        return index in self.offsets
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def read_parameters(path: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns parameters of ledger in path or None if there is no ledger
+        """
+        try:
+            with open(os.path.join(path, "ledger.json")) as file:
+                parameters: Dict[str, Any] = json.load(file)
+                return parameters
+        except FileNotFoundError:
+            return None
+
+    @property
+    def record_size(self) -> int:
+        if self.wavelength is None:
+            raise ValueError(f"Ledger {self.path} has no samples.")
+        return self.HEADER.size + 4 * len(self.wavelength)
+
+    def scan(self):
+        """
+        Indexes complete records and truncates torn one at the end of file
+        """
+        self._file.seek(0, os.SEEK_END)
+        complete = self._file.tell() // self.record_size
+        self._file.truncate(complete * self.record_size)
+        for record in range(complete):
+            offset = record * self.record_size
+            self._file.seek(offset)
+            (index,) = self.HEADER.unpack(self._file.read(self.HEADER.size))
+            self.offsets[index] = offset
+
+    def add(self, index: int, wavelength: np.ndarray, intensity: np.ndarray):
+        """
+        Appends finished sample and flushes it to disk, safe to call from many threads
+        """
+        record = self.HEADER.pack(index) + np.asarray(intensity, dtype="<f4").tobytes()
+        with self._lock:
+            if self.wavelength is None:
+                self.wavelength = np.asarray(wavelength, dtype=np.float64)
+                np.save(os.path.join(self.path, "wavelength.npy"), self.wavelength)
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(record)
+            self._file.flush()
+            self.offsets[index] = offset
+
+    def read(self, index: int) -> np.ndarray:
+        """
+        Returns float32 intensity of finished sample
+        """
+        with self._lock:
+            self._file.seek(self.offsets[index] + self.HEADER.size)
+            data = self._file.read(self.record_size - self.HEADER.size)
+        return np.frombuffer(data, dtype="<f4").astype(np.float32)
+
+    def close(self):
+        self._file.close()
+
+
+def assemble_dataframe(
+    wavelength: np.ndarray, intensity: np.ndarray, metadata: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Joins intensity matrix and metadata into layout returned by SimulatedLIBS.create_dataset
+    """
+    return SpectrumBatch(WavelengthGrid.shared(wavelength), intensity).to_dataframe(
+        metadata
+    )
+
+
+def read_dataset_chunks(output_dir: str) -> pd.DataFrame:
+    """
+    Reads chunks written by DatasetBuilder into one wide DataFrame
+
+    Parameters
+    ----------
+    output_dir: str
+        Directory with wavelength.npy and chunk-XXXXX.npy/.csv files
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    wavelength = np.load(os.path.join(output_dir, "wavelength.npy"))
+    paths = sorted(glob.glob(os.path.join(output_dir, "chunk-*.npy")))
+    intensity = np.concatenate([np.load(path) for path in paths])
+    metadata = pd.concat(
+        [pd.read_csv(path[: -len(".npy")] + ".csv") for path in paths],
+        ignore_index=True,
+    )
+    return assemble_dataframe(wavelength, intensity, metadata)
+
+
+def split_dataframe(
+    libs_df: pd.DataFrame,
+) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+    """
+    Splits wide DataFrame of create_dataset into wavelength, intensity matrix and metadata,
+    wavelength columns are the ones with numeric names
+    """
+    spectral = []
+    for column in libs_df.columns:
+        try:
+            float(column)
+        except (TypeError, ValueError):
+            continue
+        spectral.append(column)
+    wavelength = np.array([float(column) for column in spectral])
+    intensity = libs_df[spectral].to_numpy(dtype=np.float32)
+    metadata = libs_df.drop(columns=spectral).reset_index(drop=True)
+    return wavelength, intensity, metadata
+
+
+def write_dataset(
+    path: str,
+    dataset,
+    metadata: Optional[pd.DataFrame] = None,
+    block_size: int = 1024,
+):
+    """
+    Writes dataset in binary format read by DatasetReader: wavelength.npy (float64),
+    intensity.npy (float32 matrix of shape (samples, wavelength), memory-mappable)
+    and metadata.csv with one row per sample
+
+    Parameters
+    ----------
+    path: str
+        Output directory, created if it does not exist
+    dataset: pd.DataFrame or SpectrumBatch
+        Wide DataFrame returned by create_dataset, or spectra with metadata given separately
+    metadata: pd.DataFrame
+        Metadata of SpectrumBatch, one row per spectrum
+    block_size: int
+        Number of rows copied to file at once
+    """
+    if isinstance(dataset, SpectrumBatch):
+        wavelength, intensity = dataset.wavelength, dataset.intensity
+        if metadata is None:
+            metadata = pd.DataFrame(index=range(len(dataset)))
+    else:
+        wavelength, intensity, metadata = split_dataframe(dataset)
+    if len(metadata) != len(intensity):
+        raise ValueError(
+            f"Metadata of {len(metadata)} rows does not match {len(intensity)} spectra."
+        )
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "wavelength.npy"), np.asarray(wavelength, np.float64))
+    out = np.lib.format.open_memmap(
+        os.path.join(path, "intensity.npy"),
+        mode="w+",
+        dtype=np.float32,
+        shape=(len(intensity), len(wavelength)),
+    )
+    for start in range(0, len(intensity), block_size):
+        out[start : start + block_size] = intensity[start : start + block_size]
+    out.flush()
+    del out
+    metadata.to_csv(os.path.join(path, "metadata.csv"), index=False)
+
+
+def consolidate_chunks(directories, path: str):
+    """
+    Copies chunks written by DatasetBuilder (of one or many directories, e.g. shards, in given order)
+    into single binary dataset, one chunk in memory at a time
+
+    Parameters
+    ----------
+    directories: str or list[str]
+        Directories with wavelength.npy and chunk-XXXXX.npy/.csv files
+    path: str
+        Output directory of DatasetReader format
+
+    Raises
+    ------
+    ValueError
+        When directories have different wavelength grids
+    """
+    if isinstance(directories, str):
+        directories = [directories]
+    wavelength = np.load(os.path.join(directories[0], "wavelength.npy"))
+    paths = []
+    for directory in directories:
+        if not np.array_equal(
+            np.load(os.path.join(directory, "wavelength.npy")), wavelength
+        ):
+            raise ValueError(f"Chunks in {directory} have different wavelength grid.")
+        paths.extend(sorted(glob.glob(os.path.join(directory, "chunk-*.npy"))))
+    # sizes are read from .npy headers, chunk data is not loaded
+    rows = [np.load(chunk, mmap_mode="r").shape[0] for chunk in paths]
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "wavelength.npy"), wavelength)
+    out = np.lib.format.open_memmap(
+        os.path.join(path, "intensity.npy"),
+        mode="w+",
+        dtype=np.float32,
+        shape=(sum(rows), len(wavelength)),
+    )
+    start = 0
+    for chunk, count in zip(paths, rows):
+        out[start : start + count] = np.load(chunk)
+        start += count
+    out.flush()
+    del out
+    metadata = pd.concat(
+        [pd.read_csv(chunk[: -len(".npy")] + ".csv") for chunk in paths],
+        ignore_index=True,
+    )
+    metadata.to_csv(os.path.join(path, "metadata.csv"), index=False)
+
+
+class DatasetReader(object):
+    """
+    Memory-mapped dataset written by write_dataset or consolidate_chunks.
+
+    Intensity matrix stays on disk, pages are read by operating system when spectra are accessed,
+    so datasets larger than memory can be streamed. Only wavelength grid and metadata table are loaded.
+    """
+
+    def __init__(self, path: str):
+        """
+
+        Parameters
+        ----------
+        path: str
+            Directory with wavelength.npy, intensity.npy and metadata.csv
+
+        """
+        self.path = path
+        self.grid = WavelengthGrid.shared(np.load(os.path.join(path, "wavelength.npy")))
+        self.intensity = np.load(os.path.join(path, "intensity.npy"), mmap_mode="r")
+        self.metadata = pd.read_csv(os.path.join(path, "metadata.csv"))
+        if self.intensity.shape != (len(self.metadata), len(self.grid)):
+            raise ValueError(
+                f"Intensity of shape {self.intensity.shape} does not match "
+                f"{len(self.metadata)} samples on grid of {len(self.grid)} points."
+            )
+
+    def __repr__(self):
+        return f"DatasetReader(path={self.path!r}, samples={len(self)}, points={len(self.grid)})"
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def __getitem__(self, index):
+        """
+        Spectrum of sample for int index, SpectrumBatch for slice or array of indices
+        """
+        if isinstance(index, (int, np.integer)):
+            return Spectrum(self.grid, self.intensity[index])
+        return SpectrumBatch(self.grid, self.intensity[index])
+
+    def read(self, indices: np.ndarray) -> Tuple[SpectrumBatch, pd.DataFrame]:
+        """
+        Returns spectra and metadata of samples in given order,
+        rows are read from file in increasing order
+
+        Returns
+        -------
+        tuple[SpectrumBatch, pd.DataFrame]
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        order = np.argsort(indices, kind="stable")
+        intensity = np.empty((len(indices), len(self.grid)), dtype=np.float32)
+        intensity[order] = self.intensity[indices[order]]
+        metadata = self.metadata.iloc[indices].reset_index(drop=True)
+        return SpectrumBatch(self.grid, intensity), metadata
+
+    def batches(
+        self,
+        batch_size: int = 64,
+        shuffle: bool = True,
+        seed: Optional[int] = None,
+        drop_last: bool = False,
+        prefetch: int = 1,
+    ) -> Iterator[Tuple[SpectrumBatch, pd.DataFrame]]:
+        """
+        Yields mini-batches of one pass over dataset
+
+        Parameters
+        ----------
+        batch_size: int
+            Number of samples of batch
+        shuffle: bool
+            Visit samples in random order, new order in every call unless seed is given
+        seed: int
+            Seed of permutation
+        drop_last: bool
+            Skip last batch smaller than batch_size
+        prefetch: int
+            Number of batches read ahead in background thread while caller processes
+            current one, 0 reads in caller thread
+
+        Yields
+        ------
+        tuple[SpectrumBatch, pd.DataFrame]
+            Spectra (float32 matrix in .intensity) and metadata of samples of batch
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive.")
+        order = (
+            np.random.default_rng(seed).permutation(len(self))
+            if shuffle
+            else np.arange(len(self))
+        )
+        stop = len(order) - len(order) % batch_size if drop_last else len(order)
+        batches = (
+            order[start : start + batch_size] for start in range(0, stop, batch_size)
+        )
+        if prefetch < 1:
+            for indices in batches:
+                yield self.read(indices)
+            return
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending: Deque[Future[Tuple[SpectrumBatch, pd.DataFrame]]] = deque()
+            for indices in batches:
+                pending.append(executor.submit(self.read, indices))
+                if len(pending) > prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Loads whole dataset into layout returned by SimulatedLIBS.create_dataset
+        """
+        return assemble_dataframe(
+            self.grid.values, np.asarray(self.intensity), self.metadata
+        )
@@ -0,0 +1,185 @@
+import functools
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+@functools.lru_cache(maxsize=None)
+def chromedriver_path() -> str:
+    """
+    Installs chromedriver once per process
+    """
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+def create_chrome_driver():
+    """
+    Starts headless Chrome used for dynamic webscraping
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    options = Options()
+    options.add_argument("--disable-notifications")
+    options.add_argument("--headless=new")
+    service = Service(chromedriver_path())
+    return webdriver.Chrome(service=service, options=options)
+
+
+def quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class DriverPool(object):
+    """
+    Pool of long-lived headless browsers for dynamic webscraping.
+
+    Drivers are started lazily up to size, checked out for single query, reset afterwards
+    (extra windows opened by CSV button are closed), health-checked on checkout
+    and recycled after max_uses queries.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_uses: int = 50,
+        driver_factory: Optional[Callable] = None,
+    ):
+        """
+
+        Parameters
+        ----------
+        size: int
+            Maximal number of running browsers
+        max_uses: int
+            Number of queries after which browser is restarted
+        driver_factory: Callable
+            Function starting new driver, default: headless Chrome
+
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.driver_factory = driver_factory or create_chrome_driver
+        self.started = 0
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._uses: Dict[int, int] = {}
+        self._running = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __repr__(self):
+        return f"DriverPool(size={self.size}, max_uses={self.max_uses})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def healthy(driver) -> bool:
+        try:
+            return len(driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def start(self):
+        """
+        Starts new driver if pool is not full, otherwise returns None
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DriverPool is closed.")
+            if self._running >= self.size:
+                return None
+            self._running += 1
+        try:
+            driver = self.driver_factory()
+        except BaseException:
+            with self._lock:
+                self._running -= 1
+            raise
+        with self._lock:
+            self.started += 1
+            self._uses[id(driver)] = 0
+        return driver
+
+    def acquire(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self.start()
+                if driver is not None:
+                    return driver
+                try:
+                    # polling, so that slot freed by discarded driver is noticed
+                    driver = self._idle.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            if self.healthy(driver):
+                return driver
+            self.discard(driver)
+
+    @staticmethod
+    def reset(driver):
+        """
+        Closes windows opened during query and switches back to the first one
+        """
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+    def release(self, driver):
+        with self._lock:
+            self._uses[id(driver)] += 1
+            retire = self._uses[id(driver)] >= self.max_uses or self._closed
+        if retire:
+            self.discard(driver)
+            return
+        try:
+            self.reset(driver)
+        except Exception:
+            self.discard(driver)
+            return
+        self._idle.put(driver)
+
+    def discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            self._running -= 1
+        quit_driver(driver)
+
+    @contextmanager
+    def checkout(self):
+        """
+        Context manager lending driver for single query
+        """
+        driver = self.acquire()
+        try:
+            yield driver
+        except BaseException:
+            self.discard(driver)
+            raise
+        self.release(driver)
+
+    def close(self):
+        """
+        Quits idle browsers, browsers in use are quit when returned
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
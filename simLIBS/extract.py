@@ -0,0 +1,152 @@
+from typing import Iterable, Optional, Sequence, Union
+
+_SCRIPT_OPEN = b"<script"
+_SCRIPT_CLOSE = b"</script>"
+
+
+class ScriptExtractor(object):
+    """
+    Incremental byte-level scanner returning <script> element of NIST LIBS page with spectrum.
+
+    Page is fed in chunks. Text outside scripts is dropped as it arrives and scripts without
+    dataDopplerArray are dropped when they end, so memory is bounded by the size of script with
+    spectrum, not by the page. Reading can stop (feed returns True) as soon as all arrays in names
+    are complete, or when the script with dataDopplerArray ends.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str] = ("dataDopplerArray", "dataSticksArray"),
+        required: str = "dataDopplerArray",
+    ):
+        """
+
+        Parameters
+        ----------
+        names: list[str]
+            JavaScript arrays after which reading may stop
+        required: str
+            Array identifying script with spectrum
+
+        """
+        self.names = [b"var " + name.encode() for name in names]
+        self.required = b"var " + required.encode()
+        if self.required not in self.names:
+            self.names.append(self.required)
+        self.done = False
+        self.bytes_read = 0
+        self._buffer = bytearray()
+        self._in_script = False
+        self._script: Optional[bytes] = None
+        self.reset_scan()
+
+    def __repr__(self):
+        return f"ScriptExtractor(bytes_read={self.bytes_read}, done={self.done})"
+
+    def reset_scan(self):
+        # positions from which searches continue, so every byte of script is scanned once
+        self._close_from = 0
+        self._arrays = [[-1, 0, False] for _ in self.names]
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Scans next chunk of page
+
+        Returns
+        -------
+        bool
+            True when the script with spectrum is complete and reading can stop
+        """
+        if self.done:
+            return True
+        self.bytes_read += len(chunk)
+        self._buffer += chunk
+        while True:
+            if not self._in_script:
+                start = self._buffer.find(_SCRIPT_OPEN)
+                if start < 0:
+                    # keep only tail which can be the beginning of split "<script"
+                    del self._buffer[
+                        : max(0, len(self._buffer) - len(_SCRIPT_OPEN) + 1)
+                    ]
+                    return False
+                del self._buffer[:start]
+                self._in_script = True
+                self.reset_scan()
+            end = self._buffer.find(_SCRIPT_CLOSE, self._close_from)
+            if end < 0:
+                self._close_from = max(0, len(self._buffer) - len(_SCRIPT_CLOSE) + 1)
+                if self.arrays_complete():
+                    self.finish(bytes(self._buffer) + _SCRIPT_CLOSE)
+                    return True
+                return False
+            end += len(_SCRIPT_CLOSE)
+            if self._buffer.find(self.required, 0, end) >= 0:
+                self.finish(bytes(self._buffer[:end]))
+                return True
+            del self._buffer[:end]
+            self._in_script = False
+
+    def arrays_complete(self) -> bool:
+        """
+        Checks if every array in names is present in current script and closed
+        """
+        complete = True
+        for name, state in zip(self.names, self._arrays):
+            if state[2]:
+                continue
+            if state[0] < 0:
+                found = self._buffer.find(name, state[1])
+                if found < 0:
+                    state[1] = max(0, len(self._buffer) - len(name) + 1)
+                    complete = False
+                    continue
+                state[0] = state[1] = found + len(name)
+            # rows of numbers never contain "]]" or "];", so array ends at the first of them
+            ends = [self._buffer.find(end, state[1]) for end in (b"]]", b"];")]
+            if max(ends) < 0:
+                state[1] = max(state[0], len(self._buffer) - 1)
+                complete = False
+            else:
+                state[2] = True
+        return complete
+
+    def finish(self, script: bytes):
+        self._script = script
+        self._buffer = bytearray()
+        self.done = True
+
+    def result(self) -> bytes:
+        """
+        Returns <script> element with dataDopplerArray
+
+        Raises
+        ------
+        ValueError
+            When page has no script with dataDopplerArray
+        """
+        if self._script is None:
+            raise ValueError(
+                f"Variable {self.required[4:].decode()} not found in NIST LIBS response."
+            )
+        return self._script
+
+
+def extract_script(
+    chunks: Union[bytes, Iterable[bytes]], extractor: Optional[ScriptExtractor] = None
+) -> bytes:
+    """
+    Feeds chunks (or whole page given as bytes) to extractor until script with spectrum is complete
+
+    Returns
+    -------
+    bytes
+        <script> element with dataDopplerArray
+    """
+    extractor = extractor or ScriptExtractor()
+    if isinstance(chunks, (bytes, bytearray)):
+        chunks = [chunks]
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    return extractor.result()
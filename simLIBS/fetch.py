@@ -0,0 +1,336 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter(object):
+    """
+    Token bucket limiting number of requests per second shared by all threads
+    """
+
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        self.rate = requests_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class LatencyStats(object):
+    """
+    Per-request latency, retry and error counters of FetchEngine
+    """
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.retries = 0
+        self.errors = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, size: int):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.bytes += size
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            latencies = np.array(self.latencies)
+            summary: Dict[str, float] = {
+                "requests": len(latencies),
+                "retries": self.retries,
+                "errors": self.errors,
+                "bytes": self.bytes,
+            }
+        if len(latencies):
+            summary.update(
+                {
+                    "mean[s]": float(latencies.mean()),
+                    "p50[s]": float(np.percentile(latencies, 50)),
+                    "p90[s]": float(np.percentile(latencies, 90)),
+                    "p99[s]": float(np.percentile(latencies, 99)),
+                    "max[s]": float(latencies.max()),
+                }
+            )
+        return summary
+
+
+class RequestCoalescer(object):
+    """
+    Shares single in-flight call among concurrent callers with the same key.
+
+    First caller runs the function, callers arriving before it finishes wait for its result
+    (or exception). Finished calls are not remembered, repeated queries are left to ResponseCache.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, "Future[Any]"] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"RequestCoalescer(calls={self.calls}, coalesced={self.coalesced})"
+
+    def call(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                future: "Future[Any]" = Future()
+                self._in_flight[key] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if in_flight is not None:
+            return in_flight.result()
+        try:
+            result = function()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+
+class FetchEngine(object):
+    """
+    Shared HTTP fetch layer: keep-alive session, concurrency cap, rate limit and retries.
+
+    Responses with status 429 or 5xx and connection errors are retried with exponential backoff
+    and jitter, Retry-After header is respected.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_second: Optional[float] = None,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 60.0,
+        verify: bool = False,
+    ):
+        """
+
+        Parameters
+        ----------
+        max_concurrency: int
+            Maximal number of requests in flight
+        requests_per_second: float
+            Optional limit of request rate
+        max_retries: int
+            Maximal number of retries of single request
+        backoff: float
+            Initial backoff [s], doubled after every retry
+        max_backoff: float
+            Maximal backoff [s]
+        timeout: float
+            Connect and read timeout [s]
+        verify: bool
+            Verification of TLS certificates
+
+        """
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.verify = verify
+        self.limiter = RateLimiter(requests_per_second) if requests_per_second else None
+        self.stats = LatencyStats()
+        self.connect()
+
+    def connect(self):
+        """
+        Opens keep-alive session and semaphore of requests in flight
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # session and semaphore belong to one process, copy opens its own
+        state = self.__dict__.copy()
+        del state["session"], state["_semaphore"], state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.connect()
+
+    def __repr__(self):
+        return f"FetchEngine(max_concurrency={self.max_concurrency}, max_retries={self.max_retries}, timeout={self.timeout})"
+
+    def received(self) -> int:
+        """
+        Bytes of responses transferred to current thread so far, difference of two calls
+        is transfer of requests made between them (streamed pages count only bytes read)
+        """
+        return getattr(self._local, "received", 0)
+
+    def delay(self, attempt: int, response: Optional[requests.Response] = None):
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
+        )
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return min(self.backoff * 2**attempt, self.max_backoff) * random.uniform(0.5, 1)
+
+    def get(self, site: str) -> bytes:
+        """
+        Downloads page, retrying throttled and failed requests
+
+        Returns
+        -------
+        bytes
+            Response content
+        """
+        content: bytes = self.request(site, lambda response: response.content)
+        return content
+
+    def stream(self, site: str, consumer_factory, chunk_size: int = 64 * 1024):
+        """
+        Streams page to consumer in chunks, retrying throttled and failed requests.
+
+        Reading stops as soon as consumer.feed(chunk) returns True, the rest of page is not
+        downloaded. New consumer is created with consumer_factory for every attempt.
+
+        Parameters
+        ----------
+        consumer_factory: Callable
+            Factory of objects with feed(chunk) -> bool and result() methods, e.g. ScriptExtractor
+        chunk_size: int
+            Size of read chunks [bytes]
+
+        Returns
+        -------
+            Result of consumer
+        """
+
+        def read(response):
+            consumer = consumer_factory()
+            try:
+                for chunk in response.iter_content(chunk_size):
+                    if consumer.feed(chunk):
+                        break
+            finally:
+                response.close()
+            return consumer.result()
+
+        return self.request(site, read, stream=True)
+
+    def request(self, site: str, read, stream: bool = False):
+        """
+        Sends GET request with retries and returns read(response) of successful response
+        """
+        attempt = 0
+        with self._semaphore:
+            while True:
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                start = time.perf_counter()
+                try:
+                    response = self.session.get(
+                        site, timeout=self.timeout, verify=self.verify, stream=stream
+                    )
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == self.max_retries:
+                        self.stats.record_error()
+                        raise
+                    response = None
+                if response is not None and (
+                    response.status_code not in RETRY_STATUS
+                    or attempt == self.max_retries
+                ):
+                    if not response.ok:
+                        self.stats.record_error()
+                        response.close()
+                    response.raise_for_status()
+                    try:
+                        result = read(response)
+                    except (requests.ConnectionError, requests.Timeout):
+                        # connection dropped while reading body
+                        if attempt == self.max_retries:
+                            self.stats.record_error()
+                            raise
+                    else:
+                        size = response.raw.tell() if stream else len(result)
+                        self.stats.record(time.perf_counter() - start, size)
+                        self._local.received = self.received() + size
+                        return result
+                else:
+                    if response is not None:
+                        response.close()
+                self.stats.record_retry()
+                time.sleep(self.delay(attempt, response))
+                attempt += 1
+
+
+_default_engine: Optional[FetchEngine] = None
+_default_lock = threading.Lock()
+
+
+def get_default_engine() -> FetchEngine:
+    """
+    Returns FetchEngine shared by SimulatedLIBS objects created without explicit engine
+    """
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = FetchEngine()
+        return _default_engine
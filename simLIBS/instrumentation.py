@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class PipelineStats(object):
+    """
+    Wall time, downloaded bytes and point counts of pipeline stages, per sample.
+
+    Stages recorded by SimulatedLIBS and create_dataset: get_site, fetch, html_parse,
+    retrieve_spectrum, stitch (tiled queries), interpolate, mix (basis mixing) and assemble.
+    """
+
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None):
+        """
+
+        Parameters
+        ----------
+        callback: Callable
+            Optional function called with every record (dict with stage, sample, thread,
+            start[s], seconds, bytes and points)
+
+        """
+        self.callback = callback
+        self.records: list = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __repr__(self):
+        return f"PipelineStats(records={len(self.records)})"
+
+    def __getstate__(self):
+        # records are copied, sample assignment of threads is not
+        state = self.__dict__.copy()
+        del state["_lock"], state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def sample(self, index: int):
+        """
+        Context manager assigning stages recorded in current thread to sample index
+        """
+        previous = getattr(self._local, "sample", None)
+        self._local.sample = index
+        try:
+            yield
+        finally:
+            self._local.sample = previous
+
+    @contextmanager
+    def stage(self, name: str, sample: Optional[int] = None):
+        """
+        Context manager timing stage, yields dict in which bytes and points can be set
+        """
+        counters = {"bytes": 0, "points": 0}
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.record(
+                name,
+                time.perf_counter() - start,
+                counters["bytes"],
+                counters["points"],
+                start=start,
+                sample=sample,
+            )
+
+    def record(
+        self,
+        name: str,
+        seconds: float,
+        size: int = 0,
+        points: int = 0,
+        start: Optional[float] = None,
+        sample: Optional[int] = None,
+    ):
+        """
+        Adds record of stage, sample defaults to the one set by sample() in current thread
+        """
+        if start is None:
+            start = time.perf_counter() - seconds
+        if sample is None:
+            sample = getattr(self._local, "sample", None)
+        record = {
+            "stage": name,
+            "sample": sample,
+            "thread": threading.get_ident(),
+            "start[s]": start - self._origin,
+            "seconds": seconds,
+            "bytes": size,
+            "points": points,
+        }
+        with self._lock:
+            self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.DataFrame(
+                self.records,
+                columns=[
+                    "stage",
+                    "sample",
+                    "thread",
+                    "start[s]",
+                    "seconds",
+                    "bytes",
+                    "points",
+                ],
+            )
+
+    def per_sample(self) -> pd.DataFrame:
+        """
+        Wall time [s] of every stage (columns) for every sample (rows)
+        """
+        records = self.to_dataframe().dropna(subset=["sample"])
+        return records.pivot_table(
+            index="sample", columns="stage", values="seconds", aggfunc="sum"
+        )
+
+    def summary(self) -> dict:
+        """
+        Count, total, mean and percentiles of wall time, bytes and points of every stage
+
+        Returns
+        -------
+        dict
+            Stage name -> statistics, in order of first occurrence
+        """
+        records = self.to_dataframe()
+        summary = {}
+        for name, group in records.groupby("stage", sort=False):
+            seconds = group["seconds"].to_numpy(dtype=float)
+            summary[name] = {
+                "count": len(seconds),
+                "total[s]": float(seconds.sum()),
+                "mean[s]": float(seconds.mean()),
+                "p50[s]": float(np.percentile(seconds, 50)),
+                "p90[s]": float(np.percentile(seconds, 90)),
+                "p99[s]": float(np.percentile(seconds, 99)),
+                "max[s]": float(seconds.max()),
+                "bytes": int(group["bytes"].sum()),
+                "points": int(group["points"].sum()),
+            }
+        return summary
+
+    def export_trace(self, path: str):
+        """
+        Writes records in Chrome trace event format, viewable as flame graph in
+        chrome://tracing, Perfetto or speedscope
+        """
+        with self._lock:
+            records = list(self.records)
+        events = [
+            {
+                "name": record["stage"],
+                "cat": "simLIBS",
+                "ph": "X",
+                "ts": record["start[s]"] * 1e6,
+                "dur": record["seconds"] * 1e6,
+                "pid": os.getpid(),
+                "tid": record["thread"],
+                "args": {
+                    "sample": record["sample"],
+                    "bytes": record["bytes"],
+                    "points": record["points"],
+                },
+            }
+            for record in records
+        ]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+@contextmanager
+def no_stage(name: str, sample: Optional[int] = None):
+    """
+    Stand-in for PipelineStats.stage when stats are not recorded
+    """
+    yield {"bytes": 0, "points": 0}
@@ -0,0 +1,221 @@
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from simLIBS.spectrum import SpectrumBatch, WavelengthGrid
+
+KINDS = ("cubic", "pchip", "linear")
+# raw and grid points of spectra interpolated together, temporary arrays of block stay in cache
+BLOCK_POINTS = 2**18
+
+
+def spectrum_columns(raw) -> tuple:
+    """
+    Wavelength and intensity of raw spectrum given as (wavelength, intensity) pair,
+    DataFrame or Spectrum
+    """
+    if isinstance(raw, tuple):
+        wavelength, intensity = raw
+    else:
+        wavelength, intensity = raw["wavelength"], raw["intensity"]
+    return (
+        np.asarray(wavelength, dtype=np.float64),
+        np.asarray(intensity, dtype=np.float64),
+    )
+
+
+def natural_cubic_curvature(
+    h: np.ndarray, delta: np.ndarray, first: np.ndarray, last: np.ndarray
+) -> np.ndarray:
+    """
+    Second derivatives of natural cubic splines of all spectra of block, from one
+    symmetric positive definite tridiagonal system. End points of every spectrum
+    have M = 0 and are decoupled from neighbours, which keeps the system symmetric.
+    """
+    from scipy.linalg.lapack import dptsv
+
+    n = len(h) + 1
+    diagonal = np.empty(n)
+    np.add(h[:-1], h[1:], out=diagonal[1:-1])
+    diagonal[1:-1] *= 2
+    off_diagonal = h.copy()
+    rhs = np.empty(n)
+    np.subtract(delta[1:], delta[:-1], out=rhs[1:-1])
+    rhs[1:-1] *= 6
+    diagonal[first] = diagonal[last] = 1.0
+    rhs[first] = rhs[last] = 0.0
+    off_diagonal[first[first < n - 1]] = 0.0
+    off_diagonal[last[last > 0] - 1] = 0.0
+    off_diagonal[last[:-1]] = 0.0
+    curvature, info = dptsv(diagonal, off_diagonal, rhs, 1, 1, 1)[2:]
+    if info != 0:
+        raise ValueError("Spline system of raw spectra is singular.")
+    return curvature
+
+
+def pchip_slopes(
+    h: np.ndarray, delta: np.ndarray, first: np.ndarray, last: np.ndarray, n: int
+) -> np.ndarray:
+    """
+    Shape-preserving derivatives of PCHIP (Fritsch-Butland weighted harmonic mean,
+    one-sided three-point ends), as scipy.interpolate.PchipInterpolator
+    """
+    slopes = np.zeros(n)
+    inner = np.ones(n, dtype=bool)
+    inner[first] = inner[last] = False
+    k = np.flatnonzero(inner)
+    m0, m1 = delta[k - 1], delta[k]
+    w1 = 2 * h[k] + h[k - 1]
+    w2 = h[k] + 2 * h[k - 1]
+    monotone = (np.sign(m0) == np.sign(m1)) & (m0 != 0) & (m1 != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (w1 + w2) / (w1 / m0 + w2 / m1)
+    slopes[k] = np.where(monotone, mean, 0.0)
+
+    # ends: two-point spectra are linear, otherwise one-sided three-point estimate
+    lengths = last - first + 1
+    for end, inward, step in ((first, first, 1), (last, last - 1, -1)):
+        slopes[end] = delta[inward]
+        long = lengths > 2
+        h0, h1 = h[inward[long]], h[inward[long] + step]
+        d0, d1 = delta[inward[long]], delta[inward[long] + step]
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        slope = np.where(np.sign(slope) != np.sign(d0), 0.0, slope)
+        slope = np.where(
+            (np.sign(d0) != np.sign(d1)) & (np.abs(slope) > np.abs(3 * d0)),
+            3 * d0,
+            slope,
+        )
+        slopes[end[long]] = slope
+    return slopes
+
+
+def interpolate_block(
+    raw: list, grid: np.ndarray, kind: str, out: np.ndarray, decimals, clip: bool
+):
+    lengths = np.array([len(x) for x, _ in raw])
+    if (lengths < 2).any():
+        raise ValueError("Every raw spectrum needs at least 2 points.")
+    x = np.concatenate([x for x, _ in raw])
+    y = np.concatenate([y for _, y in raw])
+    last = np.cumsum(lengths) - 1
+    first = last - lengths + 1
+
+    h = np.diff(x)
+    # differences across boundary of two spectra are not used
+    h[last[:-1]] = 1.0
+    if (h <= 0).any():
+        raise ValueError("Wavelengths of raw spectrum must be strictly increasing.")
+    delta = np.diff(y)
+    delta /= h
+
+    # grid is sorted, so intervals are found by one binary search per spectrum;
+    # points outside raw range use the first or last interval
+    interval = np.empty((len(raw), len(grid)), dtype=np.intp)
+    for row, (wavelength, _) in enumerate(raw):
+        position = np.searchsorted(wavelength, grid, side="right")
+        np.clip(position, 1, len(wavelength) - 1, out=position)
+        np.add(position, first[row] - 1, out=interval[row])
+
+    # polynomial of every interval in power form c0 + c1 t + c2 t^2 + c3 t^3, t = w - x[interval],
+    # evaluated at grid points with Horner scheme on preallocated buffers
+    match kind:
+        case "linear":
+            coefficients = [y[:-1], delta]
+        case "cubic":
+            curvature = natural_cubic_curvature(h, delta, first, last)
+            m0, m1 = curvature[:-1], curvature[1:]
+            coefficients = [
+                y[:-1],
+                delta - h * (2 * m0 + m1) / 6,
+                m0 / 2,
+                (m1 - m0) / (6 * h),
+            ]
+        case "pchip":
+            slopes = pchip_slopes(h, delta, first, last, len(x))
+            d0, d1 = slopes[:-1], slopes[1:]
+            coefficients = [
+                y[:-1],
+                d0,
+                (3 * delta - 2 * d0 - d1) / h,
+                (d0 + d1 - 2 * delta) / h**2,
+            ]
+        case _:
+            raise ValueError(f"Unknown interpolation kind: {kind}")
+    t = np.take(x, interval)
+    np.subtract(grid[None, :], t, out=t)
+    values = np.take(coefficients[-1], interval)
+    term = np.empty_like(values)
+    for coefficient in coefficients[-2::-1]:
+        values *= t
+        values += np.take(coefficient, interval, out=term)
+    if kind == "linear":
+        # as np.interp, end values are held outside raw range
+        np.copyto(values, y[first][:, None], where=grid[None, :] < x[first][:, None])
+        np.copyto(values, y[last][:, None], where=grid[None, :] > x[last][:, None])
+    if clip:
+        np.clip(values, 0, None, out=values)
+    if decimals is not None:
+        np.round(values, decimals, out=values)
+    out[:] = values
+
+
+def interpolate_spectra(
+    raw_spectra: Iterable,
+    grid: Union[WavelengthGrid, np.ndarray],
+    kind: str = "cubic",
+    clip: bool = True,
+    decimals: Optional[int] = None,
+    block_size: Optional[int] = None,
+) -> SpectrumBatch:
+    """
+    Interpolates many raw spectra with different native wavelength grids onto one common grid
+
+    Splines of all spectra of block are fitted and evaluated together: one banded solve
+    (natural cubic), one searchsorted and array arithmetic on (spectra, grid) matrix.
+    Outside range of raw spectrum cubic and PCHIP extrapolate with end polynomial,
+    as scipy.interpolate, linear holds end value, as np.interp.
+
+    Parameters
+    ----------
+    raw_spectra: Iterable
+        Raw spectra as (wavelength, intensity) pairs, DataFrames or Spectrum objects,
+        wavelengths strictly increasing
+    grid: WavelengthGrid or np.ndarray
+        Increasing common wavelength grid [nm]
+    kind: str
+        'cubic' - natural cubic spline (as SimulatedLIBS.interpolate), 'pchip' - monotone
+        piecewise cubic Hermite (no overshoot around narrow lines), 'linear'
+    clip: bool
+        Clip negative intensities to zero
+    decimals: int
+        Optional rounding of intensities, before conversion to float32
+    block_size: int
+        Number of spectra interpolated together, default: about BLOCK_POINTS raw and grid points
+
+    Returns
+    -------
+    SpectrumBatch
+        Float32 intensity of shape (number of spectra, len(grid))
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown interpolation kind: {kind}")
+    if not isinstance(grid, WavelengthGrid):
+        grid = WavelengthGrid.shared(grid)
+    raw_spectra = [spectrum_columns(raw) for raw in raw_spectra]
+    intensity = np.empty((len(raw_spectra), len(grid)), dtype=np.float32)
+    if not raw_spectra:
+        return SpectrumBatch(grid, intensity)
+    if block_size is None:
+        points = np.mean([len(wavelength) for wavelength, _ in raw_spectra])
+        block_size = max(1, int(BLOCK_POINTS // (points + len(grid))))
+    for start in range(0, len(raw_spectra), block_size):
+        interpolate_block(
+            raw_spectra[start : start + block_size],
+            grid.values,
+            kind,
+            intensity[start : start + block_size],
+            decimals,
+            clip,
+        )
+    return SpectrumBatch(grid, intensity)
@@ -0,0 +1,316 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from simLIBS.dataset import DatasetReader, split_dataframe
+from simLIBS.interpolation import interpolate_spectra
+from simLIBS.spectrum import Spectrum, SpectrumBatch, WavelengthGrid
+
+NORMALIZATIONS = ("area", "max", "l2", "none")
+
+
+def normalize_spectra(intensity: np.ndarray, normalization: str) -> np.ndarray:
+    """
+    Scales every spectrum (row) to unit area, maximum or Euclidean norm, so library lookup
+    does not depend on absolute intensity of measurement
+    """
+    intensity = np.array(intensity, dtype=np.float32, ndmin=2)
+    match normalization:
+        case "area":
+            scale = intensity.sum(axis=1)
+        case "max":
+            scale = intensity.max(axis=1)
+        case "l2":
+            scale = np.sqrt(np.einsum("ij,ij->i", intensity, intensity))
+        case "none":
+            return intensity
+        case _:
+            raise ValueError(f"Unknown normalization: {normalization}")
+    scale[scale == 0] = 1
+    intensity /= scale[:, None]
+    return intensity
+
+
+def principal_components(
+    x: np.ndarray, n_components: int, seed: Optional[int] = None, n_iter: int = 4
+) -> np.ndarray:
+    """
+    Leading principal axes of centered rows of x by randomized SVD
+    (range finder with power iterations), without decomposition of full covariance matrix
+
+    Returns
+    -------
+    np.ndarray
+        Orthonormal components of shape (n_components, x.shape[1])
+    """
+    rng = np.random.default_rng(seed)
+    rank = min(n_components + 10, *x.shape)
+    q = x @ rng.standard_normal((x.shape[1], rank)).astype(x.dtype)
+    for _ in range(n_iter):
+        q, _ = np.linalg.qr(q)
+        q, _ = np.linalg.qr(x.T @ q)
+        q = x @ q
+    q, _ = np.linalg.qr(q)
+    _, _, vt = np.linalg.svd(q.T @ x, full_matrices=False)
+    return vt[:n_components]
+
+
+class SpectralLibrary(object):
+    """
+    Nearest-neighbour index of simulated spectra for lookup of plasma conditions and composition
+    of measured spectra.
+
+    Spectra are normalized, projected on leading principal components and stored in KD-tree,
+    so query costs one projection and one tree search instead of comparison with every spectrum.
+    Distances are Euclidean distances of normalized spectra restricted to principal subspace.
+    """
+
+    def __init__(
+        self,
+        grid: WavelengthGrid,
+        mean: np.ndarray,
+        components: np.ndarray,
+        coordinates: np.ndarray,
+        metadata: pd.DataFrame,
+        normalization: str = "area",
+    ):
+        """
+
+        Parameters
+        ----------
+        grid: WavelengthGrid
+            Wavelength grid of library spectra
+        mean: np.ndarray
+            Mean normalized spectrum
+        components: np.ndarray
+            Principal axes of shape (n_components, len(grid))
+        coordinates: np.ndarray
+            Projections of library spectra of shape (spectra, n_components)
+        metadata: pd.DataFrame
+            Composition, name, Te and Ne of every library spectrum
+        normalization: str
+            'area', 'max', 'l2' or 'none', see normalize_spectra
+
+        """
+        from scipy.spatial import cKDTree
+
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(f"Unknown normalization: {normalization}")
+        if len(coordinates) != len(metadata):
+            raise ValueError(
+                f"Metadata of {len(metadata)} rows does not match {len(coordinates)} spectra."
+            )
+        self.grid = grid
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.coordinates = np.asarray(coordinates, dtype=np.float32)
+        self.metadata = metadata.reset_index(drop=True)
+        self.normalization = normalization
+        self.tree = cKDTree(self.coordinates)
+
+    def __repr__(self):
+        return (
+            f"SpectralLibrary(spectra={len(self)}, components={len(self.components)}, "
+            f"normalization={self.normalization!r})"
+        )
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    @classmethod
+    def build(
+        cls,
+        dataset,
+        metadata: Optional[pd.DataFrame] = None,
+        n_components: int = 16,
+        normalization: str = "area",
+        fit_samples: int = 5000,
+        block_size: int = 4096,
+        seed: Optional[int] = 0,
+    ) -> "SpectralLibrary":
+        """
+        Builds library from simulated dataset
+
+        Parameters
+        ----------
+        dataset: pd.DataFrame, DatasetReader or SpectrumBatch
+            Wide DataFrame returned by create_dataset, memory-mapped dataset (streamed
+            in blocks) or spectra with metadata given separately
+        metadata: pd.DataFrame
+            Metadata of SpectrumBatch, one row per spectrum
+        n_components: int
+            Number of principal components
+        normalization: str
+            'area', 'max', 'l2' or 'none', see normalize_spectra
+        fit_samples: int
+            Number of randomly chosen spectra used to fit principal components
+        block_size: int
+            Number of spectra projected at once
+        seed: int
+            Seed of sample choice and randomized SVD
+
+        Returns
+        -------
+        SpectralLibrary
+        """
+        if isinstance(dataset, DatasetReader):
+            grid, intensity, metadata = (
+                dataset.grid,
+                dataset.intensity,
+                dataset.metadata,
+            )
+        elif isinstance(dataset, SpectrumBatch):
+            grid, intensity = dataset.grid, dataset.intensity
+            if metadata is None:
+                metadata = pd.DataFrame(index=range(len(dataset)))
+        else:
+            wavelength, intensity, metadata = split_dataframe(dataset)
+            grid = WavelengthGrid.shared(wavelength)
+        if len(intensity) == 0:
+            raise ValueError("Library requires at least one spectrum.")
+
+        rng = np.random.default_rng(seed)
+        fit = np.sort(
+            rng.choice(len(intensity), min(fit_samples, len(intensity)), replace=False)
+        )
+        sample = normalize_spectra(intensity[fit], normalization)
+        mean = sample.mean(axis=0)
+        sample -= mean
+        components = principal_components(
+            sample, min(n_components, *sample.shape), seed=seed
+        )
+        coordinates = np.empty((len(intensity), len(components)), dtype=np.float32)
+        for start in range(0, len(intensity), block_size):
+            block = normalize_spectra(
+                intensity[start : start + block_size], normalization
+            )
+            block -= mean
+            coordinates[start : start + block_size] = block @ components.T
+        return cls(grid, mean, components, coordinates, metadata, normalization)
+
+    def transform(self, spectra) -> np.ndarray:
+        """
+        Principal-component coordinates of spectra
+
+        Parameters
+        ----------
+        spectra: np.ndarray, Spectrum, SpectrumBatch or list
+            Intensity on library grid (one spectrum or matrix of spectra), Spectrum/SpectrumBatch
+            (interpolated linearly when grid differs) or list of raw (wavelength, intensity) pairs
+            or DataFrames of measured spectra
+
+        Returns
+        -------
+        np.ndarray
+            Coordinates of shape (spectra, n_components)
+        """
+        if isinstance(spectra, Spectrum):
+            spectra = SpectrumBatch(spectra.grid, spectra.intensity[None, :])
+        if isinstance(spectra, SpectrumBatch):
+            intensity = (
+                spectra.intensity
+                if spectra.grid is self.grid
+                else interpolate_spectra(
+                    [(spectra.wavelength, row) for row in spectra.intensity],
+                    self.grid,
+                    kind="linear",
+                ).intensity
+            )
+        elif isinstance(spectra, list):
+            intensity = interpolate_spectra(spectra, self.grid, kind="linear").intensity
+        else:
+            intensity = np.asarray(spectra)
+        intensity = normalize_spectra(intensity, self.normalization)
+        if intensity.shape[1] != len(self.grid):
+            raise ValueError(
+                f"Spectra of {intensity.shape[1]} points do not match library grid of {len(self.grid)} points."
+            )
+        intensity -= self.mean
+        return intensity @ self.components.T
+
+    def kneighbors(self, spectra, k: int = 5, eps: float = 0.0) -> tuple:
+        """
+        Distances and library indices of k nearest spectra
+
+        Parameters
+        ----------
+        spectra:
+            Query spectra, as in transform
+        k: int
+            Number of neighbours
+        eps: float
+            Approximate search: returned neighbours are within (1 + eps) of true distances
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Distances and indices of shape (spectra, k), nearest first
+        """
+        k = min(k, len(self))
+        distances, indices = self.tree.query(
+            self.transform(spectra), k=k, eps=eps, workers=-1
+        )
+        return distances.reshape(-1, k), indices.reshape(-1, k)
+
+    def query(self, spectra, k: int = 5, eps: float = 0.0) -> pd.DataFrame:
+        """
+        k closest library spectra of every query spectrum with their metadata
+
+        Returns
+        -------
+        pd.DataFrame
+            Rows ordered by query and rank: query, rank, distance, library index and metadata
+            (percentages, name, Te[eV], Ne[cm^-3]) of neighbour
+        """
+        distances, indices = self.kneighbors(spectra, k, eps)
+        n_queries, k = indices.shape
+        neighbours = self.metadata.iloc[indices.ravel()].reset_index(drop=True)
+        result = pd.DataFrame(
+            {
+                "query": np.repeat(np.arange(n_queries), k),
+                "rank": np.tile(np.arange(k), n_queries),
+                "distance": distances.ravel(),
+                "index": indices.ravel(),
+            }
+        )
+        return pd.concat([result, neighbours], axis=1)
+
+    def save(self, path: str):
+        """
+        Saves library to compressed .npz file, KD-tree is rebuilt on load
+        """
+        # arrays are passed as keywords, Any lets them match **kwds rather than allow_pickle
+        arrays: Dict[str, Any] = {
+            "wavelength": self.grid.values,
+            "mean": self.mean,
+            "components": self.components,
+            "coordinates": self.coordinates,
+            "metadata_columns": np.array(self.metadata.columns, dtype=str),
+            "normalization": np.array(self.normalization),
+        }
+        for i, column in enumerate(self.metadata.columns):
+            numeric = pd.api.types.is_numeric_dtype(self.metadata[column])
+            arrays[f"metadata_{i}"] = self.metadata[column].to_numpy(
+                dtype=None if numeric else str
+            )
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "SpectralLibrary":
+        with np.load(path) as data:
+            metadata = pd.DataFrame(
+                {
+                    column: data[f"metadata_{i}"]
+                    for i, column in enumerate(data["metadata_columns"].tolist())
+                },
+                index=range(len(data["coordinates"])),
+            )
+            return cls(
+                WavelengthGrid.shared(data["wavelength"]),
+                data["mean"],
+                data["components"],
+                data["coordinates"],
+                metadata,
+                str(data["normalization"]),
+            )
@@ -0,0 +1,349 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import pandas as pd
+
+from simLIBS.dataset import read_dataset_chunks
+from simLIBS.simulation import SimulatedLIBS
+
+
+class DatasetSpec(object):
+    """
+    Everything that determines samples of create_dataset: composition table, Te/Ne ranges
+    (or plasma conditions), size, seed, webscraping and mixing.
+
+    Spec is JSON-serializable, so shard jobs (see shards) can run in other processes or hosts
+    and produce, after merge_shards, the same dataset as single create_dataset call.
+    """
+
+    def __init__(
+        self,
+        input_composition_df: pd.DataFrame,
+        size: int,
+        seed: Optional[int] = None,
+        Te_min: float = 1.0,
+        Te_max: float = 2.0,
+        Ne_min: float = 10**17,
+        Ne_max: float = 10**18,
+        webscraping: str = "static",
+        mixing: str = "direct",
+        plasma_conditions: Optional[List[tuple]] = None,
+    ):
+        """
+
+        Parameters
+        ----------
+        input_composition_df: pd.DataFrame
+            Input df with composition of elements to simulate
+        size : int
+            Number of samples of whole dataset
+        seed : int
+            Base seed, default: drawn once here, so all shards share it
+        Te_min, Te_max, Ne_min, Ne_max, webscraping, mixing, plasma_conditions:
+            As in SimulatedLIBS.create_dataset
+
+        """
+        self.input_composition_df = input_composition_df
+        self.size = size
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.Te_min = Te_min
+        self.Te_max = Te_max
+        self.Ne_min = Ne_min
+        self.Ne_max = Ne_max
+        self.webscraping = webscraping
+        self.mixing = mixing
+        self.plasma_conditions = (
+            None
+            if plasma_conditions is None
+            else [tuple(condition) for condition in plasma_conditions]
+        )
+
+    def __repr__(self):
+        return f"DatasetSpec(size={self.size}, seed={self.seed}, fingerprint={self.fingerprint()[:12]})"
+
+    def to_dict(self) -> dict:
+        return {
+            "input": self.input_composition_df.to_dict(orient="split"),
+            "size": self.size,
+            "seed": self.seed,
+            "Te": [self.Te_min, self.Te_max],
+            "Ne": [self.Ne_min, self.Ne_max],
+            "webscraping": self.webscraping,
+            "mixing": self.mixing,
+            "plasma_conditions": self.plasma_conditions,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DatasetSpec":
+        table = data["input"]
+        return cls(
+            pd.DataFrame(table["data"], columns=table["columns"]),
+            size=data["size"],
+            seed=data["seed"],
+            Te_min=data["Te"][0],
+            Te_max=data["Te"][1],
+            Ne_min=data["Ne"][0],
+            Ne_max=data["Ne"][1],
+            webscraping=data["webscraping"],
+            mixing=data["mixing"],
+            plasma_conditions=data["plasma_conditions"],
+        )
+
+    def save(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "DatasetSpec":
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
+    def fingerprint(self) -> str:
+        """
+        Hash identifying samples of spec, shards of different specs are not merged
+        """
+        data = json.dumps(self.to_dict(), sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def shards(self, n_shards: int) -> List["ShardJob"]:
+        """
+        Splits dataset into n_shards independent jobs of contiguous sample indices
+        """
+        if not 0 < n_shards <= self.size:
+            raise ValueError(
+                f"Number of shards must be between 1 and size {self.size}."
+            )
+        return [ShardJob(self, shard, n_shards) for shard in range(n_shards)]
+
+
+class ShardJob(object):
+    """
+    Samples start, ..., stop - 1 of DatasetSpec, written to its own directory shard-XXXXX
+    in DatasetBuilder chunk format with shard.json written when shard is complete.
+    """
+
+    def __init__(self, spec: DatasetSpec, shard: int, n_shards: int):
+        if not 0 <= shard < n_shards:
+            raise ValueError(f"Shard {shard} out of range of {n_shards} shards.")
+        self.spec = spec
+        self.shard = shard
+        self.n_shards = n_shards
+        self.start = shard * spec.size // n_shards
+        self.stop = (shard + 1) * spec.size // n_shards
+
+    def __repr__(self):
+        return f"ShardJob(shard={self.shard}/{self.n_shards}, samples={self.start}:{self.stop})"
+
+    def directory(self, output_dir: str) -> str:
+        return os.path.join(output_dir, f"shard-{self.shard:05d}")
+
+    def run(self, output_dir: str, chunk_size: Optional[int] = None, **options) -> str:
+        """
+        Generates samples of shard
+
+        Parameters
+        ----------
+        output_dir: str
+            Directory shared by all shards (local or network file system)
+        chunk_size: int
+            Number of samples held in memory before flush to disk
+        options:
+            Other arguments of create_dataset, e.g. max_workers, cpu_workers, cache or
+            checkpoint (directory of this shard's ledger)
+
+        Returns
+        -------
+        str
+            Directory of shard
+        """
+        directory = self.directory(output_dir)
+        os.makedirs(directory, exist_ok=True)
+        # shard is incomplete until new manifest is written, DatasetBuilder removes old chunks
+        if os.path.exists(os.path.join(directory, "shard.json")):
+            os.remove(os.path.join(directory, "shard.json"))
+        spec = self.spec
+        SimulatedLIBS.create_dataset(
+            spec.input_composition_df,
+            size=self.stop - self.start,
+            Te_min=spec.Te_min,
+            Te_max=spec.Te_max,
+            Ne_min=spec.Ne_min,
+            Ne_max=spec.Ne_max,
+            webscraping=spec.webscraping,
+            mixing=spec.mixing,
+            plasma_conditions=spec.plasma_conditions,
+            seed=spec.seed,
+            first_index=self.start,
+            chunk_size=chunk_size,
+            output_dir=directory,
+            **options,
+        )
+        manifest = {
+            "fingerprint": spec.fingerprint(),
+            "shard": self.shard,
+            "n_shards": self.n_shards,
+            "start": self.start,
+            "stop": self.stop,
+        }
+        with open(os.path.join(directory, "shard.json.tmp"), "w") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(
+            os.path.join(directory, "shard.json.tmp"),
+            os.path.join(directory, "shard.json"),
+        )
+        return directory
+
+
+def read_manifests(output_dir: str, spec: Optional[DatasetSpec] = None) -> List[dict]:
+    """
+    Returns manifests of complete shards in shard order, checking that they cover whole dataset
+
+    Raises
+    ------
+    ValueError
+        When shards of different specs or shard counts are mixed, some shards are missing
+        or sample ranges of shards are not contiguous from 0 (to spec.size, when given)
+    """
+    manifests = []
+    for path in sorted(glob.glob(os.path.join(output_dir, "shard-*", "shard.json"))):
+        with open(path) as file:
+            manifest = json.load(file)
+        manifest["directory"] = os.path.dirname(path)
+        manifests.append(manifest)
+    if not manifests:
+        raise ValueError(f"No complete shards in {output_dir}.")
+    fingerprints = {manifest["fingerprint"] for manifest in manifests}
+    if len(fingerprints) > 1 or (
+        spec is not None and fingerprints != {spec.fingerprint()}
+    ):
+        raise ValueError(f"Shards in {output_dir} were generated from different specs.")
+    counts = {manifest["n_shards"] for manifest in manifests}
+    if len(counts) > 1:
+        raise ValueError(
+            f"Shards in {output_dir} were split into different numbers of shards: {sorted(counts)}."
+        )
+    n_shards = counts.pop()
+    missing = sorted(
+        set(range(n_shards)) - {manifest["shard"] for manifest in manifests}
+    )
+    if missing or len(manifests) != n_shards:
+        raise ValueError(f"Shards {missing} of {n_shards} are missing or incomplete.")
+    manifests.sort(key=lambda manifest: manifest["shard"])
+    stop = 0
+    for manifest in manifests:
+        if manifest["start"] != stop or manifest["stop"] < manifest["start"]:
+            raise ValueError(
+                f"Shard {manifest['shard']} covers samples {manifest['start']}:{manifest['stop']}, "
+                f"expected start {stop}."
+            )
+        stop = manifest["stop"]
+    if spec is not None and stop != spec.size:
+        raise ValueError(f"Shards cover {stop} samples of {spec.size}.")
+    return manifests
+
+
+def shard_index(output_dir: str, spec: Optional[DatasetSpec] = None) -> pd.DataFrame:
+    """
+    Metadata of all samples in order of dataset, with shard and chunk holding spectrum,
+    spectra are not loaded
+    """
+    frames = []
+    for manifest in read_manifests(output_dir, spec):
+        for path in sorted(
+            glob.glob(os.path.join(manifest["directory"], "chunk-*.csv"))
+        ):
+            metadata = pd.read_csv(path)
+            metadata["shard"] = os.path.basename(manifest["directory"])
+            metadata["chunk"] = os.path.basename(path)[: -len(".csv")]
+            frames.append(metadata)
+    index = pd.concat(frames, ignore_index=True)
+    index.index.name = "sample"
+    return index
+
+
+def merge_shards(output_dir: str, spec: Optional[DatasetSpec] = None) -> pd.DataFrame:
+    """
+    Combines shards into one dataset with layout of SimulatedLIBS.create_dataset
+
+    Raises
+    ------
+    ValueError
+        When shards are missing, come from different specs or have different columns
+        (e.g. wavelength grids)
+    """
+    frames = [
+        read_dataset_chunks(manifest["directory"])
+        for manifest in read_manifests(output_dir, spec)
+    ]
+    for frame in frames[1:]:
+        if not frame.columns.equals(frames[0].columns):
+            raise ValueError("Shards have different column layout.")
+    return pd.concat(frames, ignore_index=True)
+
+
+def run_shards(
+    spec: DatasetSpec,
+    output_dir: str,
+    n_shards: int,
+    processes: Optional[int] = None,
+    **options,
+) -> pd.DataFrame:
+    """
+    Runs all shards of spec in local process pool and merges them.
+    Options (arguments of ShardJob.run) must be picklable.
+    """
+    jobs = spec.shards(n_shards)
+    with ProcessPoolExecutor(processes) as pool:
+        for future in [pool.submit(job.run, output_dir, **options) for job in jobs]:
+            future.result()
+    return merge_shards(output_dir, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs one shard of dataset spec or merges finished shards."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="generate samples of one shard")
+    run.add_argument("spec", help="JSON file written by DatasetSpec.save")
+    run.add_argument("output_dir")
+    run.add_argument("--shard", type=int, required=True)
+    run.add_argument("--shards", type=int, required=True)
+    run.add_argument("--chunk-size", type=int, default=None)
+    run.add_argument("--max-workers", type=int, default=None)
+    run.add_argument("--cpu-workers", type=int, default=None)
+    merge = commands.add_parser("merge", help="merge shards into one pickled DataFrame")
+    merge.add_argument("output_dir")
+    merge.add_argument("--spec", default=None)
+    merge.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    # output is limited to one summary line of finished command
+    match args.command:
+        case "run":
+            job = DatasetSpec.load(args.spec).shards(args.shards)[args.shard]
+            directory = job.run(
+                args.output_dir,
+                chunk_size=args.chunk_size,
+                max_workers=args.max_workers,
+                cpu_workers=args.cpu_workers,
+            )
+            summary = f"{job}: written to {directory}"
+        case "merge":
+            spec: Optional[DatasetSpec] = None
+            if args.spec is not None:
+                spec = DatasetSpec.load(args.spec)
+            dataset = merge_shards(args.output_dir, spec)
+            dataset.to_pickle(args.output)
+            summary = f"merged {len(dataset)} samples into {args.output}"
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
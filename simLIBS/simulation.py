@@ -1,34 +1,140 @@
-import sys
-from typing import List
+from typing import Iterable, List, Optional
 
-from bs4 import BeautifulSoup
-import requests
 import re
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 import io
 import random
 import os
-from scipy.interpolate import CubicSpline
-from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import math
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium import webdriver
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
+import hashlib
+import threading
+import asyncio
+import multiprocessing
 import urllib3
 
+from simLIBS.broadening import broaden, compare_spectra
+from simLIBS.cache import ResponseCache, normalize_query
+from simLIBS.dataset import DatasetBuilder, SampleLedger
+from simLIBS.extract import ScriptExtractor, extract_script
+from simLIBS.driver_pool import DriverPool, create_chrome_driver
+from simLIBS.fetch import FetchEngine, RequestCoalescer, get_default_engine
+from simLIBS.instrumentation import PipelineStats, no_stage
+from simLIBS.interpolation import interpolate_spectra
+from simLIBS.spectrum import Spectrum, WavelengthGrid
+
 urllib3.disable_warnings()
 
+DEFAULT_NIST_LIBS_URL = "https://physics.nist.gov/cgi-bin/ASD/lines1.pl"
+
+# address of NIST LIBS form, can be pointed to local stand-in server (simLIBS.testing.StandInServer)
+NIST_LIBS_URL = os.environ.get("SIMLIBS_NIST_URL", DEFAULT_NIST_LIBS_URL)
+
+# identical queries in flight at the same time (from any thread) share one download
+request_coalescer = RequestCoalescer()
+
 
 class CompositionError(Exception):
     pass
 
 
+_LABELS = re.compile(r"labels\w*\s*[=:]\s*\[([^\]]*)\]", re.IGNORECASE)
+
+ROMAN_NUMERALS = [
+    (1000, "M"),
+    (900, "CM"),
+    (500, "D"),
+    (400, "CD"),
+    (100, "C"),
+    (90, "XC"),
+    (50, "L"),
+    (40, "XL"),
+    (10, "X"),
+    (9, "IX"),
+    (5, "V"),
+    (4, "IV"),
+    (1, "I"),
+]
+
+
+def roman_numeral(number: int) -> str:
+    """
+    Roman numeral of positive integer, e.g. 14 -> 'XIV'
+    """
+    numeral = ""
+    for value, symbol in ROMAN_NUMERALS:
+        count, number = divmod(number, value)
+        numeral += symbol * count
+    return numeral
+
+
+def ion_labels(elements: List[str], max_ion_charge: int) -> List[str]:
+    """
+    Names of ion spectra in order of NIST LIBS query, e.g. ['W I', 'W II', ..., 'Fe I', ...]
+    """
+    return [
+        f"{element} {roman_numeral(charge + 1)}"
+        for element in elements
+        for charge in range(max_ion_charge + 1)
+    ]
+
+
+def parse_js_labels(html_data: str) -> Optional[List[str]]:
+    """
+    Returns labels of spectrum columns if page declares them, otherwise None
+    """
+    match = _LABELS.search(html_data)
+    if match is None:
+        return None
+    return [label.strip().strip("'\"") for label in match.group(1).split(",")]
+
+
+def round_significant(value: float, digits: int = 3) -> float:
+    """
+    Rounds value to given number of significant digits, as Ne sent to NIST LIBS
+    """
+    return round(value, digits - int(math.floor(math.log10(abs(value)))) - 1)
+
+
+_JS_BRACKETS = str.maketrans("[]", "  ")
+
+
+def parse_js_array(html_data: str, name: str) -> np.ndarray:
+    """
+    Parses numeric JavaScript array of rows (e.g. dataDopplerArray) from NIST LIBS response.
+
+    Parameters
+    ----------
+    html_data: str
+        Text containing ``var <name>=[[...],[...]]``
+    name: str
+        Name of JavaScript variable
+
+    Returns
+    -------
+    np.ndarray
+        Float64 array of shape (number of rows, number of columns)
+    """
+    start = html_data.find("var " + name)
+    if start < 0:
+        raise ValueError(f"Variable {name} not found in NIST LIBS response.")
+    start = html_data.index("[", start) + 1
+    stop = html_data.find("]]", start)
+    if stop < 0 or html_data[start:stop].lstrip().startswith("]"):
+        return np.empty((0, 2))
+    payload = html_data[start : stop + 1]
+    width = payload.count(",", 0, payload.index("]")) + 1
+    if "null" in payload:
+        payload = payload.replace("null", "nan")
+    values = np.fromstring(payload.translate(_JS_BRACKETS), sep=",")
+    if values.size % width:
+        raise ValueError(f"Malformed {name} in NIST LIBS response.")
+    return np.nan_to_num(values.reshape(-1, width), copy=False)
+
+
 def validate_simulated_libs(
     Te: float,
     Ne: float,
@@ -57,6 +163,135 @@ def validate_simulated_libs(
         )
 
 
+def format_density(Ne: float) -> str:
+    """
+    Ne as sent to NIST LIBS: 3 significant digits, without '+' of exponent
+    """
+    return re.sub(r"\+", "", str(round_significant(Ne)))
+
+
+def nist_libs_site(
+    elements: List[str],
+    percentages: List[float],
+    Te: float,
+    Ne: str,
+    resolution: int,
+    low_w: int,
+    upper_w: int,
+    max_ion_charge: int,
+) -> str:
+    """
+    Query URL of NIST LIBS static page, Ne formatted with format_density
+    """
+    composition = ""
+    spectrum = ""
+
+    for i in range(len(elements)):
+        if i > 0:
+            composition += "3B"
+            spectrum += "2C"
+        composition += str(elements[i])
+        composition += "%3A"
+        composition += str(percentages[i])
+
+        spectrum += str(elements[i])
+        spectrum += "0-" + str(max_ion_charge)
+
+        if i < len(elements) - 1:
+            composition += "%"
+            spectrum += "%"
+    site = (
+        NIST_LIBS_URL + "?composition={}"
+        "&spectra={}"
+        "&low_w={}&limits_type=0&upp_w={}"
+        "&show_av=3&unit=1"
+        "&resolution={}"
+        "&temp={}"
+        "&eden={}"
+        "&maxcharge={}"
+        "&min_rel_int=0.01"
+        "&int_scale=1"
+        "&libs=1"
+    )
+    return site.format(
+        composition,
+        spectrum,
+        low_w,
+        upper_w,
+        resolution,
+        Te,
+        Ne,
+        max_ion_charge,
+    )
+
+
+def wavelength_tiles(
+    low_w: float, upper_w: float, tile_width: float, overlap: float = 0.0
+) -> List[tuple]:
+    """
+    Tiles covering [low_w, upper_w], aligned to multiples of tile_width, so queries of
+    different ranges share tiles
+
+    Returns
+    -------
+    list[tuple]
+        (low_w, upper_w) of every tile query: aligned tile widened by overlap on both sides
+    """
+    if tile_width <= 0 or overlap < 0:
+        raise ValueError("Tile width must be positive and overlap non-negative.")
+    first = math.floor(low_w / tile_width)
+    last = max(first + 1, math.ceil(upper_w / tile_width))
+    return [
+        (max(0, k * tile_width - overlap), (k + 1) * tile_width + overlap)
+        for k in range(first, last)
+    ]
+
+
+def empty_tile(
+    low_w: float, upper_w: float, resolution: float, columns: int
+) -> np.ndarray:
+    """
+    Zero spectrum of tile without lines (empty dataDopplerArray), on grid with step of
+    quarter FWHM at tile centre
+    """
+    step = (low_w + upper_w) / 2 / resolution / 4
+    wavelength = np.arange(low_w, upper_w + step / 2, step)
+    data = np.zeros((len(wavelength), columns))
+    data[:, 0] = wavelength
+    return data
+
+
+def stitch_tiles(
+    tiles: List[np.ndarray], boundaries: List[float], overlap: float
+) -> np.ndarray:
+    """
+    Joins spectra of neighbouring tiles (rows: wavelength followed by intensity columns)
+
+    Tile k owns points from boundaries[k - 1] - overlap to boundaries[k] - overlap. Within
+    +-overlap around boundary its points are blended linearly with the left tile interpolated
+    onto them, so edge effects of both tile queries get zero weight at their own edges.
+    """
+    parts = []
+    for k, data in enumerate(tiles):
+        keep = np.ones(len(data), dtype=bool)
+        if k > 0:
+            keep &= data[:, 0] >= boundaries[k - 1] - overlap
+        if k < len(tiles) - 1:
+            keep &= data[:, 0] < boundaries[k] - overlap
+        part = data[keep]
+        if k > 0 and overlap > 0:
+            part = part.copy()
+            zone = part[:, 0] <= boundaries[k - 1] + overlap
+            weight = (part[zone, 0] - boundaries[k - 1] + overlap) / (2 * overlap)
+            for column in range(1, part.shape[1]):
+                left = np.interp(
+                    part[zone, 0], tiles[k - 1][:, 0], tiles[k - 1][:, column]
+                )
+                part[zone, column] = weight * part[zone, column] + (1 - weight) * left
+        parts.append(part)
+    return np.concatenate(parts)
+
+
 class SimulatedLIBS(object):
 
     def __init__(
@@ -70,6 +305,14 @@ class SimulatedLIBS(object):
         upper_w: int = 1000,
         max_ion_charge: int = 3,
         webscraping: str = "static",
+        cache: Optional[ResponseCache] = None,
+        fetch_engine: Optional[FetchEngine] = None,
+        driver_pool: Optional[DriverPool] = None,
+        stats: Optional[PipelineStats] = None,
+        page: Optional[bytes] = None,
+        tile_width: Optional[float] = None,
+        tile_overlap: float = 2.0,
+        lazy: bool = False,
     ):
         """
 
@@ -93,16 +336,38 @@ class SimulatedLIBS(object):
             Maximal ion charge
         webscraping : str
             Type of webscraping: 'static' or 'dynamic'
+        cache: ResponseCache
+            Optional on-disk cache of NIST LIBS responses
+        fetch_engine: FetchEngine
+            HTTP fetch layer for static webscraping, default: engine shared by all objects
+        driver_pool: DriverPool
+            Pool of browsers for dynamic webscraping, default: new browser for every object
+        stats: PipelineStats
+            Optional recorder of wall time, bytes and points of pipeline stages
+        page: bytes
+            Already downloaded NIST LIBS static page, parsed instead of sending query
+        tile_width: float
+            Optional width of wavelength tiles [nm] for static webscraping: range is split into
+            tiles aligned to multiples of tile_width, fetched concurrently, cached per tile
+            and stitched (see retrieve_data_tiled), not supported by dynamic webscraping
+        tile_overlap: float
+            Overlap of neighbouring tiles [nm], blended when stitched
+        lazy: bool
+            Only record parameters, spectrum is retrieved by retrieve/aretrieve
+            or by the first get_* accessor
 
         """
 
         validate_simulated_libs(
             Te, Ne, elements, percentages, low_w, upper_w, max_ion_charge
         )
+        if tile_width is not None and webscraping == "dynamic":
+            raise ValueError(
+                "Wavelength tiles are supported only by static webscraping."
+            )
 
         self.Te = Te
-        self.Ne = round(Ne, 3 - int(math.floor(math.log10(abs(Ne)))) - 1)
-        self.Ne = re.sub(r"\+", "", str(self.Ne))
+        self.Ne = format_density(Ne)
 
         self.elements = elements
         self.percentages = percentages
@@ -112,24 +377,24 @@ class SimulatedLIBS(object):
         self.max_ion_charge = max_ion_charge
 
         self.raw_spectrum = pd.DataFrame({"wavelength": [], "intensity": []})
-        self.interpolated_spectrum = pd.DataFrame({"wavelength": [], "intensity": []})
+        self.spectrum: Optional[Spectrum] = None
+        self._interpolated_spectrum: Optional[pd.DataFrame] = None
+        self.ion_spectra: Optional[pd.DataFrame] = None
+        self.sticks: Optional[pd.DataFrame] = None
         self.webscraping = webscraping
+        self.cache = cache
+        self.fetch_engine = fetch_engine
+        self.driver_pool = driver_pool
+        self.stats = stats
+        self.tile_width = tile_width
+        self.tile_overlap = tile_overlap
+        self.page = page
+        self.lazy = lazy
+        self.retrieved = False
+        self._retrieve_lock = threading.Lock()
 
-        match webscraping:
-            case "static":
-                self.retrieve_data_static()
-                self.interpolate()
-            case "dynamic":
-                self.ion_spectra = None
-                options = Options()
-                options.add_argument("--disable-notifications")
-                options.headless = True
-
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=options)
-                self.retrieve_data_dynamic()
-                self.driver.quit()
-                self.driver.stop_client()
+        if not lazy:
+            self.retrieve()
 
     def __repr__(self):
         return f"simLIBS(Te={self.Te:.2f} eV, Ne={self.Ne:.3e} cm^-3, elements={', '.join(self.elements)}, percentages={', '.join([str(p) for p in self.percentages])}, resolution={self.resolution}, low_w={self.low_w}, upper_w={self.upper_w}, max_ion_charge={self.max_ion_charge})"
@@ -137,66 +402,136 @@ class SimulatedLIBS(object):
     def __str__(self):
         return f"Te: {self.Te:.2f} eV, Ne: {self.Ne:.3e} cm^-3, elements: {', '.join(self.elements)}, percentages: {', '.join([str(p) for p in self.percentages])}"
 
-    def get_site(self):
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_retrieve_lock"]
+        # browsers belong to one process, pool is needed only until spectrum is retrieved
+        if self.driver_pool is not None:
+            if not self.retrieved:
+                raise TypeError(
+                    "Lazy SimulatedLIBS with driver_pool cannot be pickled before retrieve()."
+                )
+            state["driver_pool"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._retrieve_lock = threading.Lock()
+
+    def retrieve(self):
         """
+        Retrieves spectrum by given webscraping, once: later calls (also from other threads)
+        return immediately. Called by constructor unless object is lazy.
 
         Returns
         -------
+        SimulatedLIBS
+            This object
+        """
+        with self._retrieve_lock:
+            if self.retrieved:
+                return self
+            match self.webscraping:
+                case "static":
+                    if self.tile_width is None or self.page is not None:
+                        self.retrieve_data_static(self.page)
+                    else:
+                        self.retrieve_data_tiled()
+                    self.interpolate()
+                case "dynamic":
+                    self.retrieve_data_dynamic()
+            self.page = None
+            self.retrieved = True
+        return self
 
+    async def aretrieve(self, executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Awaitable retrieve: blocking fetch and parsing run in executor (default executor of loop),
+        so event loop keeps running
+
+        Returns
+        -------
+        SimulatedLIBS
+            This object
+        """
+        if not self.retrieved:
+            await asyncio.get_running_loop().run_in_executor(executor, self.retrieve)
+        return self
+
+    async def afetch_page(self, executor: Optional[ThreadPoolExecutor] = None) -> bytes:
+        """
+        Awaitable fetch_page
         """
-        composition = ""
-        spectrum = ""
-
-        for i in range(len(self.elements)):
-            if i > 0:
-                composition += "3B"
-                spectrum += "2C"
-            composition += str(self.elements[i])
-            composition += "%3A"
-            composition += str(self.percentages[i])
-
-            spectrum += str(self.elements[i])
-            spectrum += "0-" + str(self.max_ion_charge)
-
-            if i < len(self.elements) - 1:
-                composition += "%"
-                spectrum += "%"
-        site = (
-            "https://physics.nist.gov/cgi-bin/ASD/lines1.pl?composition={}"
-            "&spectra={}"
-            "&low_w={}&limits_type=0&upp_w={}"
-            "&show_av=3&unit=1"
-            "&resolution={}"
-            "&temp={}"
-            "&eden={}"
-            "&maxcharge={}"
-            "&min_rel_int=0.01"
-            "&int_scale=1"
-            "&libs=1"
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self.fetch_page
         )
-        site = site.format(
-            composition,
-            spectrum,
-            self.low_w,
-            self.upper_w,
-            self.resolution,
+
+    def stage(self, name: str):
+        """
+        Context manager timing pipeline stage when stats are recorded
+        """
+        if self.stats is None:
+            return no_stage(name)
+        return self.stats.stage(name)
+
+    def get_site(self):
+        """
+
+        Returns
+        -------
+
+        """
+        return nist_libs_site(
+            self.elements,
+            self.percentages,
             self.Te,
             self.Ne,
+            self.resolution,
+            self.low_w,
+            self.upper_w,
             self.max_ion_charge,
         )
 
-        return site
+    def fetch(self, site: str, download, kind: str = "static") -> bytes:
+        """
+        Returns response for given query, from cache if available.
+        Concurrent identical queries of objects with the same cache and fetch engine
+        are coalesced into one download.
+        """
+        # callers with other cache (e.g. offline) or engine must not share the result
+        key = (normalize_query(site, kind), id(self.cache), id(self.fetch_engine))
+        cache = self.cache
+        if cache is None:
+            return request_coalescer.call(key, lambda: download(site))
+        return request_coalescer.call(key, lambda: cache.fetch(site, download, kind))
 
-    def retrieve_data_dynamic(self):
+    def download_dynamic(self, site: str) -> bytes:
         """
+        Recalculates spectrum in headless Chrome and returns source of CSV page,
+        browser is borrowed from driver_pool or started for this query only
 
         Returns
         -------
-
+        bytes
+            Page source with CSV data
         """
-        site = self.get_site()
-        self.driver.get(site)
-        resolution_input = WebDriverWait(self.driver, 5).until(
+        if self.driver_pool is not None:
+            with self.driver_pool.checkout() as driver:
+                return self.query_dynamic(driver, site)
+        self.driver = create_chrome_driver()
+        try:
+            return self.query_dynamic(self.driver, site)
+        finally:
+            self.driver.quit()
+
+    def query_dynamic(self, driver, site: str) -> bytes:
+        # browser stack is imported only for dynamic webscraping
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver.get(site)
+        resolution_input = WebDriverWait(driver, 5).until(
             EC.presence_of_element_located(
                 (By.XPATH, "/html/body/div/div[1]/div[1]/form/div[3]/div/input")
             )
@@ -204,88 +539,347 @@ class SimulatedLIBS(object):
         resolution_input.clear()
         resolution_input.send_keys(str(self.resolution))
 
-        button_recalculate = WebDriverWait(self.driver, 2).until(
+        button_recalculate = WebDriverWait(driver, 2).until(
             EC.presence_of_element_located(
                 (By.XPATH, "/html/body/div/div[1]/div[1]/form/button")
             )
         )
         button_recalculate.click()
 
-        button_csv = WebDriverWait(self.driver, 2).until(
+        button_csv = WebDriverWait(driver, 2).until(
             EC.presence_of_element_located(
                 (By.XPATH, "/html/body/div/div[2]/button[2]")
             )
         )
         button_csv.click()
 
-        self.driver.switch_to.window((self.driver.window_handles[1]))
+        driver.switch_to.window((driver.window_handles[1]))
+        return driver.page_source.encode()
+
+    def download_static(self, site: str) -> bytes:
+        """
+        Streams NIST LIBS page with fetch engine, reading stops when script with spectrum is complete
+
+        Returns
+        -------
+        bytes
+            <script> element with dataDopplerArray (and dataSticksArray)
+        """
+        return (self.fetch_engine or get_default_engine()).stream(site, ScriptExtractor)
 
-        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-        self.ion_spectra = pd.read_csv(io.StringIO(soup.pre.text), sep=",").fillna(0)
+    def retrieve_data_dynamic(self):
+        """
+
+        Returns
+        -------
+
+        """
+        with self.stage("get_site"):
+            site = self.get_site()
+        with self.stage("fetch") as counters:
+            # pages read from cache or downloaded by another caller are not counted
+            downloaded = []
+
+            def download(site):
+                page_source = self.download_dynamic(site)
+                downloaded.append(len(page_source))
+                return page_source
+
+            page_source = self.fetch(site, download, kind="dynamic")
+            counters["bytes"] = sum(downloaded)
+
+        with self.stage("html_parse") as counters:
+            from bs4 import BeautifulSoup
+
+            soup = BeautifulSoup(page_source, "html.parser")
+            self.ion_spectra = pd.read_csv(io.StringIO(soup.pre.text), sep=",").fillna(
+                0
+            )
+            counters["points"] = len(self.ion_spectra)
         self.raw_spectrum["wavelength"] = self.ion_spectra["Wavelength (nm)"]
         self.raw_spectrum["intensity"] = self.ion_spectra["Sum(calc)"]
 
-        self.interpolated_spectrum["wavelength"] = self.ion_spectra["Wavelength (nm)"]
-        self.interpolated_spectrum["intensity"] = self.ion_spectra["Sum(calc)"]
+        self.spectrum = Spectrum(
+            WavelengthGrid.shared(self.ion_spectra["Wavelength (nm)"].values),
+            self.ion_spectra["Sum(calc)"].values,
+        )
+        # spectrum of dynamic webscraping is not interpolated, DataFrame keeps float64 values
+        self._interpolated_spectrum = self.raw_spectrum.copy()
+
+    def fetch_page(self) -> bytes:
+        """
+        Downloads static page (or reads it from cache) without parsing
+
+        Returns
+        -------
+        bytes
+            Page content
+        """
+        with self.stage("get_site"):
+            site = self.get_site()
+        engine = self.fetch_engine or get_default_engine()
+        with self.stage("fetch") as counters:
+            # bytes transferred by engine in this thread, content is only extracted script
+            received = engine.received()
+            content = self.fetch(site, self.download_static)
+            counters["bytes"] = engine.received() - received
+        return content
 
-    def retrieve_data_static(self):
+    def retrieve_data_static(self, content: Optional[bytes] = None):
         """
 
+        Parameters
+        ----------
+        content: bytes
+            Downloaded page or its script with spectrum, default: page is fetched
+
         Returns
         -------
 
         """
-        site = self.get_site()
-        respond = requests.get(site, verify=False)
-        soup = BeautifulSoup(respond.content, "html.parser")
-        html_data = soup.find_all("script")
-        html_data = list(filter(lambda t: "var dataDopplerArray" in str(t), html_data))
-        self.retrieve_spectrum_from_html(str(html_data[0]))
+        if content is None:
+            content = self.fetch_page()
+        with self.stage("html_parse"):
+            # content can be whole page (page argument, older cache entries)
+            html_data = extract_script(content).decode()
+        with self.stage("retrieve_spectrum") as counters:
+            self.retrieve_spectrum_from_html(html_data)
+            counters["points"] = len(self.raw_spectrum)
+
+    def retrieve_data_tiled(self):
+        """
+        Fetches aligned wavelength tiles concurrently and stitches them into raw_spectrum,
+        ion_spectra and sticks cropped to [low_w, upper_w].
+
+        Every tile is separate query, so it is cached and coalesced on its own and ranges
+        of other objects reuse it; latency is that of the slowest tile.
+        """
+        bounds = wavelength_tiles(
+            self.low_w, self.upper_w, self.tile_width, self.tile_overlap
+        )
+
+        def retrieve_tile(low_w, upper_w):
+            tile = SimulatedLIBS(
+                Te=self.Te,
+                Ne=float(self.Ne),
+                elements=self.elements,
+                percentages=self.percentages,
+                resolution=self.resolution,
+                low_w=low_w,
+                upper_w=upper_w,
+                max_ion_charge=self.max_ion_charge,
+                lazy=True,
+                cache=self.cache,
+                fetch_engine=self.fetch_engine,
+                stats=self.stats,
+            )
+            tile.retrieve_data_static()
+            return tile
+
+        # more threads than requests allowed in flight by fetch engine would only wait
+        workers = (self.fetch_engine or get_default_engine()).max_concurrency
+        with ThreadPoolExecutor(min(len(bounds), workers)) as pool:
+            tiles = list(pool.map(lambda bound: retrieve_tile(*bound), bounds))
+
+        with self.stage("stitch") as counters:
+            # columns are taken from tile with ion spectra, tiles without lines are zeros
+            columns = max((tile.ion_spectra.columns for tile in tiles), key=len)
+            arrays = [
+                (
+                    tile.ion_spectra.values
+                    if len(tile.ion_spectra)
+                    else empty_tile(low_w, upper_w, self.resolution, len(columns))
+                )
+                for (low_w, upper_w), tile in zip(bounds, tiles)
+            ]
+            boundaries = [upper_w - self.tile_overlap for _, upper_w in bounds[:-1]]
+            data = stitch_tiles(arrays, boundaries, self.tile_overlap)
+            data = data[(data[:, 0] >= self.low_w) & (data[:, 0] <= self.upper_w)]
+            self.ion_spectra = pd.DataFrame(data, columns=columns)
+            self.raw_spectrum = pd.DataFrame(
+                {"wavelength": data[:, 0], "intensity": data[:, 1]}
+            )
+            # every line is taken from the tile owning its wavelength
+            owners = [-np.inf] + [b - self.tile_overlap for b in boundaries] + [np.inf]
+            sticks = [
+                tile.sticks[
+                    (tile.sticks["wavelength"] >= owners[k])
+                    & (tile.sticks["wavelength"] < owners[k + 1])
+                ]
+                for k, tile in enumerate(tiles)
+                if tile.sticks is not None
+            ]
+            if sticks:
+                sticks = pd.concat(sticks, ignore_index=True)
+                wavelength = sticks["wavelength"]
+                self.sticks = sticks[
+                    (wavelength >= self.low_w) & (wavelength <= self.upper_w)
+                ].reset_index(drop=True)
+            counters["points"] = len(data)
 
     def retrieve_spectrum_from_html(self, html_data: str):
+        """
+        Parses dataDopplerArray into raw_spectrum and ion_spectra, and dataSticksArray into sticks
+        (wavelength and intensity of lines)
 
-        start_index_of_spectrum_data = [
-            (m.start(0), m.end(0))
-            for m in re.finditer(r"var dataDopplerArray=.*", html_data)
-        ]
-        stop_index_of_spectrum_data = [
-            (m.start(0), m.end(0))
-            for m in re.finditer(r"]];\n    var dataSticksArray.*", html_data)
-        ]
-        spectrum_data = html_data[
-            start_index_of_spectrum_data[0][1]
-            + 1 : stop_index_of_spectrum_data[0][0]
-            + 1
-        ].split(",\n")
-        i = 0
-        for spectrums in spectrum_data:
-            spectrum = spectrums[1:-1].split(",")
-            self.raw_spectrum.loc[i] = [spectrum[0], spectrum[1]]
-            i += 1
-
-    def interpolate(self, resolution: float = 0.1):
-        """
-        interpolation of intensity with given resolution using CubicSpline
-        """
-        cs = CubicSpline(
-            self.raw_spectrum["wavelength"],
-            self.raw_spectrum["intensity"],
-            bc_type="natural",
+        Columns of dataDopplerArray are wavelength, sum and spectra of single ions. Columns are named
+        after labels declared in page or, when there are none, as in CSV of dynamic webscraping:
+        'Wavelength (nm)', 'Sum(calc)' and ion names in order of query.
+        """
+        spectrum_data = parse_js_array(html_data, "dataDopplerArray")
+        columns = ["Wavelength (nm)", "Sum(calc)"]
+        labels = parse_js_labels(html_data)
+        if labels is not None and len(labels) == spectrum_data.shape[1]:
+            sum_column = next(
+                (
+                    i
+                    for i, label in enumerate(labels)
+                    if label.lower().startswith("sum")
+                ),
+                1,
+            )
+            order = [0, sum_column] + [
+                i for i in range(1, len(labels)) if i != sum_column
+            ]
+            spectrum_data = spectrum_data[:, order]
+            columns += [labels[i] for i in order[2:]]
+        else:
+            ions = ion_labels(self.elements, self.max_ion_charge)
+            if len(ions) != spectrum_data.shape[1] - 2:
+                ions = [f"ion {i}" for i in range(1, spectrum_data.shape[1] - 1)]
+            columns += ions
+        self.ion_spectra = pd.DataFrame(
+            spectrum_data, columns=columns[: spectrum_data.shape[1]]
+        )
+        self.raw_spectrum = pd.DataFrame(
+            {"wavelength": spectrum_data[:, 0], "intensity": spectrum_data[:, 1]}
         )
-        x = np.arange(self.low_w, self.upper_w, resolution)
-        y = np.clip(cs(x), 0, np.inf)
+        if "var dataSticksArray" in html_data:
+            sticks = parse_js_array(html_data, "dataSticksArray")
+            # only position and height of lines are used, further columns are dropped
+            self.sticks = pd.DataFrame(
+                sticks[:, :2], columns=["wavelength", "intensity"]
+            )
+
+    def interpolate(self, resolution: float = 0.1, kind: str = "cubic"):
+        """
+        interpolation of intensity with given resolution, by default with natural CubicSpline
+
+        Parameters
+        ----------
+        resolution: float
+            Step of wavelength grid [nm]
+        kind: str
+            'cubic', 'pchip' or 'linear' (see interpolate_spectra)
+        """
+        with self.stage("interpolate") as counters:
+            self.spectrum = interpolate_spectra(
+                [self.raw_spectrum],
+                WavelengthGrid.arange(self.low_w, self.upper_w, resolution),
+                kind,
+                decimals=3,
+            )[0]
+            self._interpolated_spectrum = None
+            counters["points"] = len(self.spectrum)
+
+    def broaden(
+        self,
+        resolution,
+        step: Optional[float] = None,
+        doppler_fwhm: float = 0.0,
+        profile: str = "area",
+    ) -> pd.DataFrame:
+        """
+        Re-resolves spectrum from retrieved line list (sticks) at any resolving power, without new query
+
+        Parameters
+        ----------
+        resolution: int or list[int]
+            Resolving power(s) of spectrometer
+        step: float
+            Wavelength step [nm], default: quarter of FWHM at low_w for the highest resolution
+        doppler_fwhm: float
+            Relative Doppler FWHM (see broadening.doppler_relative_fwhm)
+        profile: str
+            'area' or 'peak' normalization of line profiles
+
+        Returns
+        -------
+        pd.DataFrame
+            wavelength and intensity columns, or wavelength and column per resolution for list of resolutions
+        """
+        self.retrieve()
+        if self.sticks is None:
+            raise ValueError(
+                "Broadening requires line list retrieved by static webscraping."
+            )
+        if step is None:
+            step = self.low_w / np.max(resolution) / 4
+        wavelength = np.arange(self.low_w, self.upper_w, step)
+        intensity = broaden(
+            self.sticks["wavelength"].values,
+            self.sticks["intensity"].values,
+            wavelength,
+            resolution,
+            doppler_fwhm=doppler_fwhm,
+            profile=profile,
+        )
+        if np.ndim(resolution) == 0:
+            return pd.DataFrame({"wavelength": wavelength, "intensity": intensity})
+        spectra = pd.DataFrame(intensity.T, columns=list(resolution))
+        spectra.insert(0, "wavelength", wavelength)
+        return spectra
+
+    def validate_broadening(
+        self, tolerance: float = 0.05, doppler_fwhm: float = 0.0, profile: str = "area"
+    ) -> dict:
+        """
+        Compares local broadening at query resolution with NIST spectrum (raw_spectrum).
+        Agreement of Gaussian model with NIST spectra is not verified by tests, which use
+        synthetic pages built with the same model, so check it here for new queries.
+
+        Returns
+        -------
+        dict
+            Fitted scale, maximal and RMS error relative to maximal NIST intensity
 
-        self.interpolated_spectrum["wavelength"] = np.round(x, 3)
-        self.interpolated_spectrum["intensity"] = np.round(y, 3)
+        Raises
+        ------
+        ValueError
+            If maximal error exceeds tolerance
+        """
+        self.retrieve()
+        if self.sticks is None:
+            raise ValueError(
+                "Broadening requires line list retrieved by static webscraping."
+            )
+        broadened = broaden(
+            self.sticks["wavelength"].values,
+            self.sticks["intensity"].values,
+            self.raw_spectrum["wavelength"].values,
+            self.resolution,
+            doppler_fwhm=doppler_fwhm,
+            profile=profile,
+        )
+        errors = compare_spectra(self.raw_spectrum["intensity"].values, broadened)
+        if errors["max_error"] > tolerance:
+            raise ValueError(
+                f"Broadening error {errors['max_error']:.3g} exceeds tolerance {tolerance:.3g}"
+            )
+        return errors
 
     def plot(
         self,
         color=(random.random(), random.random(), random.random()),
         title="Simulated LIBS",
     ):
+        import matplotlib.pyplot as plt
+
+        spectrum = self.get_interpolated_spectrum()
+
         plt.plot(
-            self.interpolated_spectrum["wavelength"],
-            self.interpolated_spectrum["intensity"],
+            spectrum["wavelength"],
+            spectrum["intensity"],
             label=str(self.elements) + str(self.percentages),
             color=color,
         )
@@ -295,6 +889,7 @@ class SimulatedLIBS(object):
         plt.ylabel("Line Intensity [a.u.]")
 
     def plot_ion_spectra(self):
+        self.get_ion_spectra()
         self.ion_spectra.drop(["Sum(calc)"], axis=1).plot(
             x="Wavelength (nm)",
             xlabel=r"$\lambda$ [nm]",
@@ -303,21 +898,61 @@ class SimulatedLIBS(object):
             grid=True,
         )
 
+    @property
+    def interpolated_spectrum(self) -> pd.DataFrame:
+        """
+        Interpolated spectrum as DataFrame of float64 wavelength and intensity (rounded to 3 decimals),
+        created from spectrum on first access and kept, so changes made in place are preserved
+        """
+        self.retrieve()
+        if self._interpolated_spectrum is None:
+            if self.spectrum is None:
+                self._interpolated_spectrum = pd.DataFrame(
+                    {"wavelength": [], "intensity": []}
+                )
+            else:
+                self._interpolated_spectrum = pd.DataFrame(
+                    {
+                        "wavelength": self.spectrum.wavelength,
+                        "intensity": np.round(
+                            self.spectrum.intensity.astype(np.float64), 3
+                        ),
+                    }
+                )
+        return self._interpolated_spectrum
+
+    @interpolated_spectrum.setter
+    def interpolated_spectrum(self, spectrum: pd.DataFrame):
+        self._interpolated_spectrum = spectrum
+
     def get_interpolated_spectrum(self):
         return self.interpolated_spectrum
 
     def get_raw_spectrum(self):
+        self.retrieve()
         return self.raw_spectrum
 
     def get_ion_spectra(self):
-
-        if self.webscraping == "dynamic" and self.ion_spectra is not None:
+        self.retrieve()
+        if self.ion_spectra is not None:
             return self.ion_spectra
         else:
             raise ValueError(
-                "Data retrieval requires webscraping method set to 'dynamic' and successful data acquisition."
+                "Ion spectra are not available, data retrieval was not successful."
             )
 
+    async def aget_interpolated_spectrum(self) -> pd.DataFrame:
+        await self.aretrieve()
+        return self.interpolated_spectrum
+
+    async def aget_raw_spectrum(self) -> pd.DataFrame:
+        await self.aretrieve()
+        return self.raw_spectrum
+
+    async def aget_ion_spectra(self) -> pd.DataFrame:
+        await self.aretrieve()
+        return self.get_ion_spectra()
+
     def save_to_csv(self, filepath: str):
         self.interpolated_spectrum.to_csv(path_or_buf=filepath)
 
@@ -329,31 +964,267 @@ class SimulatedLIBS(object):
         Ne_min: float,
         Ne_max: float,
         webscraping: str,
+        cache: Optional[ResponseCache] = None,
+        basis=None,
+        plasma_conditions: Optional[List[tuple]] = None,
+        fetch_engine: Optional[FetchEngine] = None,
+        driver_pool: Optional[DriverPool] = None,
+        stats: Optional[PipelineStats] = None,
+        index: Optional[int] = None,
+        seed: Optional[int] = None,
     ):
-        seed = random.randrange(len(input_df))
+        parameters = SimulatedLIBS.sample_parameters(
+            input_df,
+            Te_min,
+            Te_max,
+            Ne_min,
+            Ne_max,
+            plasma_conditions,
+            random if seed is None else SimulatedLIBS.sample_rng(seed, index),
+        )
+        spectrum = SimulatedLIBS.simulate_sample(
+            parameters,
+            webscraping,
+            cache,
+            basis,
+            fetch_engine,
+            driver_pool,
+            stats,
+            index,
+        )
+        return SimulatedLIBS.sample_result(parameters, spectrum)
+
+    @staticmethod
+    def simulate_sample(
+        parameters: dict,
+        webscraping: str,
+        cache: Optional[ResponseCache] = None,
+        basis=None,
+        fetch_engine: Optional[FetchEngine] = None,
+        driver_pool: Optional[DriverPool] = None,
+        stats: Optional[PipelineStats] = None,
+        index: Optional[int] = None,
+    ) -> Spectrum:
+        """
+        Returns interpolated spectrum of sample drawn by sample_parameters
+        """
+        with nullcontext() if stats is None else stats.sample(index):
+            if basis is None:
+                return SimulatedLIBS(
+                    **SimulatedLIBS.query_parameters(parameters),
+                    webscraping=webscraping,
+                    cache=cache,
+                    fetch_engine=fetch_engine,
+                    driver_pool=driver_pool,
+                    stats=stats,
+                ).spectrum
+            with (no_stage if stats is None else stats.stage)("mix") as counters:
+                spectrum = basis.spectrum(
+                    parameters["elements"],
+                    parameters["percentages"],
+                    parameters["Te"],
+                    parameters["Ne"],
+                )
+                counters["points"] = len(spectrum)
+            return spectrum
+
+    @staticmethod
+    def sample_parameters(
+        input_df: pd.DataFrame,
+        Te_min: float,
+        Te_max: float,
+        Ne_min: float,
+        Ne_max: float,
+        plasma_conditions: Optional[List[tuple]] = None,
+        rng=random,
+    ) -> dict:
+        """
+        Draws composition (row of input_df) and plasma condition of single sample
+        with rng (random.Random, default: global random module)
+        """
+        seed = rng.randrange(len(input_df))
         percentages = input_df.iloc[seed].values[:-1]
         elements = input_df.iloc[seed].keys().values[:-1]
         name = input_df.iloc[seed]["name"]
-        Te = random.uniform(Te_min, Te_max)
-        Ne = random.uniform(Ne_min, Ne_max)
-        fun = SimulatedLIBS(
-            Te=Te,
-            Ne=Ne,
-            elements=elements,
-            percentages=percentages,
-            webscraping=webscraping,
-        ).get_interpolated_spectrum()
+        if plasma_conditions is None:
+            Te = rng.uniform(Te_min, Te_max)
+            Ne = rng.uniform(Ne_min, Ne_max)
+        else:
+            Te, Ne = rng.choice(plasma_conditions)
+        return {
+            "elements": elements,
+            "percentages": percentages,
+            "name": name,
+            "Te": Te,
+            "Ne": Ne,
+        }
+
+    @staticmethod
+    def sample_rng(seed: int, index: int) -> random.Random:
+        """
+        Generator of sample index derived from seed of dataset, independent of order of execution
+        """
+        state = np.random.SeedSequence([seed, index]).generate_state(2, np.uint64)
+        return random.Random(int(state[0]) << 64 | int(state[1]))
+
+    @staticmethod
+    def query_key(parameters: dict) -> tuple:
+        """
+        Identity of NIST LIBS query of sample: samples with equal key share one spectrum
+        """
+        return (
+            tuple(str(element) for element in parameters["elements"]),
+            tuple(float(percentage) for percentage in parameters["percentages"]),
+            float(parameters["Te"]),
+            format_density(parameters["Ne"]),
+        )
 
+    @staticmethod
+    def query_parameters(parameters: dict) -> dict:
+        return {
+            "Te": parameters["Te"],
+            "Ne": parameters["Ne"],
+            "elements": list(parameters["elements"]),
+            "percentages": list(parameters["percentages"]),
+        }
+
+    @staticmethod
+    def sample_result(parameters: dict, spectrum: Spectrum) -> dict:
         return {
-            "spectrum": fun,
+            "spectrum": spectrum,
             "composition": pd.DataFrame(
-                {"elements": elements, "percentages": percentages}
+                {
+                    "elements": parameters["elements"],
+                    "percentages": parameters["percentages"],
+                }
             ),
-            "name": name,
-            "Te[eV]": Te,
-            "Ne[cm^-3]": Ne,
+            "name": parameters["name"],
+            "Te[eV]": parameters["Te"],
+            "Ne[cm^-3]": parameters["Ne"],
         }
 
+    @staticmethod
+    def download_sample(
+        parameters: dict,
+        cache: Optional[ResponseCache] = None,
+        fetch_engine: Optional[FetchEngine] = None,
+        stats: Optional[PipelineStats] = None,
+        index: Optional[int] = None,
+    ) -> bytes:
+        """
+        I/O stage of create_dataset pipeline: downloads static page of sample without parsing
+        """
+        with nullcontext() if stats is None else stats.sample(index):
+            return SimulatedLIBS(
+                **SimulatedLIBS.query_parameters(parameters),
+                lazy=True,
+                cache=cache,
+                fetch_engine=fetch_engine,
+                stats=stats,
+            ).fetch_page()
+
+    @staticmethod
+    def pipeline(
+        collect,
+        processed,
+        plan: List[tuple],
+        cache: Optional[ResponseCache],
+        fetch_engine: Optional[FetchEngine],
+        stats: Optional[PipelineStats],
+        io_workers: int,
+        cpu_workers: int,
+    ):
+        """
+        Two-stage create_dataset: threads download pages, processes parse and interpolate them.
+
+        Stages are connected by bounded queues (twice the number of workers of each stage),
+        so both stay busy while memory held by pages in flight is bounded.
+        plan holds (index, parameters, query key) of samples, only first sample of every key
+        is fetched and its spectrum is reused by the following ones.
+        processed(index, spectrum) is called as soon as sample is processed,
+        collect(index, result) in order of indices.
+        """
+        remaining = Counter(key for _, _, key in plan)
+        spectra: dict = {}
+        downloads: deque = deque()
+        processing: deque = deque()
+
+        def finish():
+            index, parameters, key, future = processing.popleft()
+            if future is None:
+                spectrum = spectra[key]
+                processed(index, spectrum)
+            else:
+                spectrum, records = future.result()
+                if stats is not None:
+                    for name, seconds, size_bytes, points in records:
+                        stats.record(name, seconds, size_bytes, points, sample=index)
+            remaining[key] -= 1
+            if remaining[key]:
+                spectra[key] = spectrum
+            else:
+                spectra.pop(key, None)
+            collect(index, SimulatedLIBS.sample_result(parameters, spectrum))
+
+        def on_processed(index):
+            def callback(future):
+                if future.exception() is None:
+                    processed(index, future.result()[0])
+
+            return callback
+
+        def advance():
+            index, parameters, key, future = downloads.popleft()
+            if len(processing) == 2 * cpu_workers:
+                finish()
+            if future is not None:
+                future = cpu_pool.submit(
+                    simulate_page,
+                    future.result(),
+                    SimulatedLIBS.query_parameters(parameters),
+                )
+                future.add_done_callback(on_processed(index))
+            processing.append((index, parameters, key, future))
+
+        fetched = set()
+        # workers are started from server process (or spawned), not forked from this process
+        # whose download threads may hold locks of requests, cache or logging
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        with (
+            ThreadPoolExecutor(io_workers) as io_pool,
+            ProcessPoolExecutor(cpu_workers, mp_context=context) as cpu_pool,
+        ):
+            for index, parameters, key in plan:
+                if len(downloads) == 2 * io_workers:
+                    advance()
+                if key in fetched:
+                    # the same query as earlier sample, spectrum is reused in finish
+                    downloads.append((index, parameters, key, None))
+                    continue
+                fetched.add(key)
+                downloads.append(
+                    (
+                        index,
+                        parameters,
+                        key,
+                        io_pool.submit(
+                            SimulatedLIBS.download_sample,
+                            parameters,
+                            cache,
+                            fetch_engine,
+                            stats,
+                            index,
+                        ),
+                    )
+                )
+            while downloads:
+                advance()
+            while processing:
+                finish()
+
     @staticmethod
     def create_dataset(
         input_composition_df: pd.DataFrame,
@@ -363,6 +1234,19 @@ class SimulatedLIBS(object):
         Ne_min: float = 10**17,
         Ne_max: float = 10**18,
         webscraping: str = "static",
+        cache: Optional[ResponseCache] = None,
+        mixing: str = "direct",
+        plasma_conditions: Optional[List[tuple]] = None,
+        chunk_size: Optional[int] = None,
+        output_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        fetch_engine: Optional[FetchEngine] = None,
+        driver_pool: Optional[DriverPool] = None,
+        stats: Optional[PipelineStats] = None,
+        cpu_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        checkpoint: Optional[str] = None,
+        first_index: int = 0,
     ) -> pd.DataFrame:
         """
 
@@ -382,45 +1266,285 @@ class SimulatedLIBS(object):
             Maximal random electron density Ne[cm^-3]
         webscraping : str
             Webscraping type 'static' or 'dynamic'
+        cache: ResponseCache
+            Optional on-disk cache of NIST LIBS responses, repeated queries are not downloaded
+        mixing : str
+            'direct' - every sample is fetched, 'basis' - samples are weighted sums of single-element
+            spectra fetched once per element and plasma condition (see BasisLibrary),
+            requires plasma_conditions
+        plasma_conditions : list[tuple]
+            Optional list of (Te, Ne) pairs, samples draw plasma condition from it instead of uniform ranges
+        chunk_size : int
+            Number of samples held in memory before flush to output_dir
+        output_dir : str
+            Optional directory, spectra are written there in chunks (see DatasetBuilder)
+            instead of being returned
+        max_workers : int
+            Number of worker (or with cpu_workers: download) threads, default: max_concurrency
+            of fetch engine
+        fetch_engine : FetchEngine
+            HTTP fetch layer with session reuse, concurrency cap, rate limit and retries,
+            default: engine shared by all objects
+        driver_pool : DriverPool
+            Browsers for dynamic webscraping, default: pool of max_workers browsers for this call
+        stats : PipelineStats
+            Optional recorder of per-sample stage timings, summary() aggregates the whole run
+        cpu_workers : int
+            Number of processes parsing and interpolating pages. When given (static webscraping,
+            direct mixing), threads only download pages and CPU work runs in process pool,
+            both stages connected by bounded queues. Default: threads do both
+        seed : int
+            Seed of dataset, every sample draws from generator derived from seed and its index,
+            default: drawn from random module (or stored in checkpoint)
+        checkpoint : str
+            Optional directory of ledger of finished samples (see SampleLedger). Rerun with
+            the same arguments skips finished samples and returns output identical to
+            uninterrupted run
+        first_index : int
+            Index of first sample in dataset of given seed: samples first_index, ...,
+            first_index + size - 1 are generated, as in a shard of larger dataset (see DatasetSpec)
 
         Returns
         -------
+        pd.DataFrame
+            Float32 intensity column per wavelength followed by composition, name, Te and Ne columns,
+            or only metadata with chunk file of every sample when output_dir is given
 
         """
-        pool = ThreadPoolExecutor(size)
-        spectra_pool = [
-            pool.submit(
-                SimulatedLIBS.worker,
+        if mixing == "basis" and not plasma_conditions:
+            # conditions drawn from continuous ranges are never repeated, so every sample
+            # would fetch one basis spectrum per element
+            raise ValueError("Basis mixing requires discrete plasma_conditions.")
+        builder = DatasetBuilder(
+            [str(val) for val in input_composition_df.columns.values]
+            + ["Te[eV]", "Ne[cm^-3]"],
+            size,
+            chunk_size,
+            output_dir,
+        )
+
+        if seed is None:
+            stored = (
+                None if checkpoint is None else SampleLedger.read_parameters(checkpoint)
+            )
+            seed = random.randrange(2**32) if stored is None else stored["seed"]
+        ledger = None
+        if checkpoint is not None:
+            ledger_parameters = {
+                "seed": seed,
+                "input": hashlib.sha256(
+                    input_composition_df.to_csv(index=False).encode()
+                ).hexdigest(),
+                "Te": [Te_min, Te_max],
+                "Ne": [Ne_min, Ne_max],
+                "plasma_conditions": plasma_conditions,
+                "webscraping": webscraping,
+                "mixing": mixing,
+            }
+            if first_index:
+                ledger_parameters["first_index"] = first_index
+            ledger = SampleLedger(checkpoint, ledger_parameters)
+        # samples found in ledger are restored in order between collected ones
+        cursor = 0
+
+        def add(index, result):
+            spectrum = result["spectrum"]
+            stage = no_stage if stats is None else stats.stage
+            with stage("assemble", sample=index) as counters:
+                builder.add(
+                    spectrum.grid,
+                    spectrum.intensity,
+                    result["composition"]["percentages"].values.tolist()
+                    + [result["name"], result["Te[eV]"], result["Ne[cm^-3]"]],
+                )
+                counters["points"] = len(spectrum)
+
+        def restore(stop):
+            nonlocal cursor
+            while cursor < stop:
+                parameters = SimulatedLIBS.sample_parameters(
+                    input_composition_df,
+                    Te_min,
+                    Te_max,
+                    Ne_min,
+                    Ne_max,
+                    plasma_conditions,
+                    SimulatedLIBS.sample_rng(seed, first_index + cursor),
+                )
+                spectrum = Spectrum(
+                    WavelengthGrid.shared(ledger.wavelength), ledger.read(cursor)
+                )
+                add(cursor, SimulatedLIBS.sample_result(parameters, spectrum))
+                cursor += 1
+
+        def collect(index, result):
+            nonlocal cursor
+            restore(index)
+            add(index, result)
+            cursor = index + 1
+
+        def collect_future(index, parameters, future):
+            collect(index, SimulatedLIBS.sample_result(parameters, future.result()))
+
+        def checkpoint_sample(index, spectrum):
+            # samples are written as soon as they finish, also when earlier one failed
+            if ledger is not None:
+                ledger.add(index, spectrum.wavelength, spectrum.intensity)
+
+        def checkpoint_future(index):
+            def callback(future):
+                if future.exception() is None:
+                    checkpoint_sample(index, future.result())
+
+            return callback
+
+        # pre-pass: samples are planned up front and grouped by query, so that every
+        # unique query is fetched once and its spectrum fanned out to all its samples
+        plan = []
+        for index in range(size):
+            if ledger is not None and index in ledger:
+                continue
+            parameters = SimulatedLIBS.sample_parameters(
                 input_composition_df,
                 Te_min,
                 Te_max,
                 Ne_min,
                 Ne_max,
-                webscraping,
+                plasma_conditions,
+                SimulatedLIBS.sample_rng(seed, first_index + index),
             )
-            for _ in range(size)
-        ]
-        columns = [
-            str(wavelength)
-            for wavelength in spectra_pool[0].result()["spectrum"]["wavelength"]
-        ]
-        for val in input_composition_df.columns.values:
-            columns.append(str(val))
-        columns.append("Te[eV]")
-        columns.append("Ne[cm^-3]".format(Ne_min=Ne_min))
-        output_df = pd.DataFrame(columns=columns)
-
-        for spectra in spectra_pool:
-            intensity = spectra.result()["spectrum"]["intensity"].values.tolist()
-            percentages = spectra.result()["composition"]["percentages"].values.tolist()
-            intensity.extend(percentages)
-            intensity.append(spectra.result()["name"])
-            intensity.append(spectra.result()["Te[eV]"])
-            intensity.append(spectra.result()["Ne[cm^-3]".format(Ne_min=Ne_min)])
-            output_df = pd.concat(
-                [output_df, pd.DataFrame(data=[intensity], columns=columns)],
-                ignore_index=True,
+            plan.append((index, parameters, SimulatedLIBS.query_key(parameters)))
+
+        if max_workers is None:
+            max_workers = (fetch_engine or get_default_engine()).max_concurrency
+        if cpu_workers is not None and (webscraping != "static" or mixing != "direct"):
+            raise ValueError(
+                "cpu_workers requires static webscraping and direct mixing."
             )
+        own_driver_pool = webscraping == "dynamic" and driver_pool is None
+        if own_driver_pool:
+            driver_pool = DriverPool(size=max_workers)
+        match mixing:
+            case "direct":
+                basis = None
+            case "basis":
+                from simLIBS.basis import BasisLibrary
+
+                basis = BasisLibrary(
+                    webscraping=webscraping,
+                    cache=cache,
+                    fetch_engine=fetch_engine,
+                    driver_pool=driver_pool,
+                    stats=stats,
+                )
+            case _:
+                raise ValueError(f"Unknown mixing mode: {mixing}")
+        try:
+            if cpu_workers is not None:
+                SimulatedLIBS.pipeline(
+                    collect,
+                    checkpoint_sample,
+                    plan,
+                    cache,
+                    fetch_engine,
+                    stats,
+                    max_workers,
+                    cpu_workers,
+                )
+            else:
+                # at most one chunk of finished or running samples is held in memory,
+                # futures of queries repeated later are kept until their last sample
+                remaining = Counter(key for _, _, key in plan)
+                shared: dict = {}
+                pending: deque = deque()
+                with ThreadPoolExecutor(min(max_workers, builder.chunk_size)) as pool:
+                    for index, parameters, key in plan:
+                        if len(pending) == builder.chunk_size:
+                            collect_future(*pending.popleft())
+                        future = shared.get(key)
+                        if future is None:
+                            future = pool.submit(
+                                SimulatedLIBS.simulate_sample,
+                                parameters,
+                                webscraping,
+                                cache,
+                                basis,
+                                fetch_engine,
+                                driver_pool,
+                                stats,
+                                index,
+                            )
+                            shared[key] = future
+                        remaining[key] -= 1
+                        if not remaining[key]:
+                            del shared[key]
+                        future.add_done_callback(checkpoint_future(index))
+                        pending.append((index, parameters, future))
+                    while pending:
+                        collect_future(*pending.popleft())
+            restore(size)
+        finally:
+            if own_driver_pool:
+                driver_pool.close()
+            if ledger is not None:
+                ledger.close()
+
+        if output_dir is not None:
+            builder.flush()
+            return builder.index_frame()
+        return builder.to_dataframe()
+
+
+def simulate_page(page: bytes, parameters: dict):
+    """
+    CPU stage of create_dataset pipeline, run in worker process: parses downloaded page
+    and interpolates spectrum
+
+    Returns
+    -------
+    tuple
+        Spectrum (its grid is interned again when unpickled) and stage records
+        (name, seconds, bytes, points)
+    """
+    stats = PipelineStats()
+    spectrum = SimulatedLIBS(**parameters, page=page, stats=stats).spectrum
+    return (
+        spectrum,
+        [
+            (record["stage"], record["seconds"], record["bytes"], record["points"])
+            for record in stats.records
+        ],
+    )
+
+
+async def gather_simulations(
+    simulations: Iterable[SimulatedLIBS], max_concurrency: int = 8
+) -> List[SimulatedLIBS]:
+    """
+    Retrieves spectra of (lazy) SimulatedLIBS objects concurrently from asyncio code
+
+    Parameters
+    ----------
+    simulations: Iterable[SimulatedLIBS]
+        Objects created with lazy=True, already retrieved ones are returned as they are
+    max_concurrency: int
+        Maximal number of simulations retrieved at the same time, blocking work runs in
+        thread pool of this size (requests are still capped by fetch engine)
+
+    Returns
+    -------
+    list[SimulatedLIBS]
+        Retrieved objects in order of simulations
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def retrieve(libs: SimulatedLIBS):
+        async with semaphore:
+            return await libs.aretrieve(executor)
 
-        output_df.reset_index(drop=True)
-        return output_df
+    executor = ThreadPoolExecutor(max_concurrency)
+    try:
+        return await asyncio.gather(*[retrieve(libs) for libs in simulations])
+    finally:
+        # waiting for fetches still in flight (after error or cancellation) would block the loop
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,220 @@
+import threading
+import weakref
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class WavelengthGrid(object):
+    """
+    Immutable wavelength grid [nm] shared by all spectra sampled on it.
+
+    Grids are interned: equal grids are the same object (also after unpickling in other process),
+    so every spectrum holds only reference to grid and its own intensity. Interned grid is released
+    when no spectrum refers to it.
+    """
+
+    __slots__ = ("values", "_columns", "__weakref__")
+
+    _grids: "weakref.WeakValueDictionary[int, WavelengthGrid]" = (
+        weakref.WeakValueDictionary()
+    )
+    _lock = threading.Lock()
+
+    def __init__(self, values: np.ndarray):
+        values = np.array(values, dtype=np.float64)
+        values.flags.writeable = False
+        self.values = values
+        self._columns: Optional[List[str]] = None
+
+    def __repr__(self):
+        if not len(self):
+            return "WavelengthGrid(points=0)"
+        return f"WavelengthGrid(points={len(self)}, low_w={self.values[0]}, upper_w={self.values[-1]})"
+
+    def __len__(self):
+        return len(self.values)
+
+    def __reduce__(self):
+        return WavelengthGrid.shared, (self.values,)
+
+    @classmethod
+    def shared(cls, values: np.ndarray) -> "WavelengthGrid":
+        """
+        Returns interned grid with given values
+        """
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        # hash of values is the key, grids with the same hash are told apart by their values
+        key = hash(values.tobytes())
+        with cls._lock:
+            while True:
+                grid = cls._grids.get(key)
+                if grid is None:
+                    grid = cls._grids[key] = cls(values)
+                    return grid
+                if np.array_equal(grid.values, values):
+                    return grid
+                key += 1
+
+    @classmethod
+    def arange(
+        cls, low_w: float, upper_w: float, step: float = 0.1
+    ) -> "WavelengthGrid":
+        """
+        Grid of interpolated spectra: np.arange(low_w, upper_w, step) rounded to 3 decimals
+        """
+        return cls.shared(np.round(np.arange(low_w, upper_w, step), 3))
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        Column names of wide dataset layout
+        """
+        if self._columns is None:
+            self._columns = [str(w) for w in np.round(self.values, 3)]
+        return self._columns
+
+
+class Spectrum(object):
+    """
+    Intensity of single spectrum stored as contiguous float32 array on shared WavelengthGrid.
+
+    Columns can be read as from DataFrame (spectrum["wavelength"], spectrum["intensity"]),
+    DataFrame itself is created only by to_dataframe.
+    """
+
+    __slots__ = ("grid", "intensity")
+
+    def __init__(self, grid: WavelengthGrid, intensity: np.ndarray):
+        """
+
+        Parameters
+        ----------
+        grid: WavelengthGrid
+            Wavelength grid of spectrum
+        intensity: np.ndarray
+            Intensity at every point of grid
+
+        """
+        intensity = np.ascontiguousarray(intensity, dtype=np.float32)
+        if intensity.shape != (len(grid),):
+            raise ValueError(
+                f"Intensity of shape {intensity.shape} does not match grid of {len(grid)} points."
+            )
+        self.grid = grid
+        self.intensity = intensity
+
+    def __repr__(self):
+        return f"Spectrum(points={len(self)})"
+
+    def __len__(self):
+        return len(self.intensity)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        match column:
+            case "wavelength":
+                return self.grid.values
+            case "intensity":
+                return self.intensity
+            case _:
+                raise KeyError(column)
+
+    @property
+    def wavelength(self) -> np.ndarray:
+        return self.grid.values
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory held by spectrum, without shared grid
+        """
+        return self.intensity.nbytes
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"wavelength": self.grid.values, "intensity": self.intensity}
+        )
+
+
+class SpectrumBatch(object):
+    """
+    Spectra on one shared WavelengthGrid stored as contiguous float32 matrix (sample, wavelength).
+    """
+
+    __slots__ = ("grid", "intensity")
+
+    def __init__(self, grid: WavelengthGrid, intensity: np.ndarray):
+        """
+
+        Parameters
+        ----------
+        grid: WavelengthGrid
+            Wavelength grid shared by all spectra
+        intensity: np.ndarray
+            Intensity matrix of shape (number of spectra, len(grid))
+
+        """
+        intensity = np.ascontiguousarray(intensity, dtype=np.float32)
+        if intensity.ndim != 2 or intensity.shape[1] != len(grid):
+            raise ValueError(
+                f"Intensity of shape {intensity.shape} does not match grid of {len(grid)} points."
+            )
+        self.grid = grid
+        self.intensity = intensity
+
+    def __repr__(self):
+        return f"SpectrumBatch(spectra={len(self)}, points={len(self.grid)})"
+
+    def __len__(self):
+        return len(self.intensity)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return SpectrumBatch(self.grid, self.intensity[index])
+        return Spectrum(self.grid, self.intensity[index])
+
+    def __iter__(self):
+        for intensity in self.intensity:
+            yield Spectrum(self.grid, intensity)
+
+    @classmethod
+    def from_spectra(
+        cls, spectra: Iterable[Spectrum], grid: Optional[WavelengthGrid] = None
+    ) -> "SpectrumBatch":
+        """
+        Stacks spectra sampled on the same grid
+
+        Raises
+        ------
+        ValueError
+            When spectra have different grids
+        """
+        spectra = list(spectra)
+        if grid is None:
+            if not spectra:
+                raise ValueError("Grid of empty batch must be given.")
+            grid = spectra[0].grid
+        intensity = np.empty((len(spectra), len(grid)), dtype=np.float32)
+        for row, spectrum in enumerate(spectra):
+            if spectrum.grid is not grid:
+                raise ValueError("Spectra of batch must share one wavelength grid.")
+            intensity[row] = spectrum.intensity
+        return cls(grid, intensity)
+
+    @property
+    def wavelength(self) -> np.ndarray:
+        return self.grid.values
+
+    @property
+    def nbytes(self) -> int:
+        return self.intensity.nbytes
+
+    def to_dataframe(self, metadata: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Returns wide DataFrame: one column per wavelength, followed by metadata columns
+        """
+        spectra = pd.DataFrame(self.intensity, columns=self.grid.columns, copy=False)
+        if metadata is None:
+            return spectra
+        return pd.concat([spectra, metadata.reset_index(drop=True)], axis=1)
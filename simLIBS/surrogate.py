@@ -0,0 +1,258 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from simLIBS.cache import ResponseCache
+from simLIBS.fetch import FetchEngine
+from simLIBS.simulation import SimulatedLIBS, round_significant
+
+
+class SurrogateGrid(object):
+    """
+    Tabulated spectra of one composition over (Te, log10 Ne) grid.
+
+    Spectra at any (Te, Ne) inside the grid are obtained by bilinear interpolation in Te and log10 Ne,
+    vectorized over many plasma conditions at once. Single-element grids (percentages=[100])
+    can be mixed linearly like BasisLibrary spectra.
+    """
+
+    def __init__(
+        self,
+        Te_values: np.ndarray,
+        Ne_values: np.ndarray,
+        wavelength: np.ndarray,
+        intensity: np.ndarray,
+        elements: List[str],
+        percentages: List[float],
+    ):
+        """
+
+        Parameters
+        ----------
+        Te_values: np.ndarray
+            Increasing electron temperatures of grid [eV]
+        Ne_values: np.ndarray
+            Increasing electron densities of grid [cm^-3]
+        wavelength: np.ndarray
+            Wavelength grid of spectra [nm]
+        intensity: np.ndarray
+            Spectra of shape (len(Te_values), len(Ne_values), len(wavelength))
+        elements: list[str]
+            List of elements
+        percentages: list[percentages]
+            List of element percentages
+
+        """
+        self.Te_values = np.asarray(Te_values, dtype=np.float64)
+        self.Ne_values = np.asarray(Ne_values, dtype=np.float64)
+        self.wavelength = np.asarray(wavelength, dtype=np.float64)
+        self.intensity = np.asarray(intensity, dtype=np.float32)
+        self.elements = list(elements)
+        self.percentages = list(percentages)
+        if self.intensity.shape != (
+            len(self.Te_values),
+            len(self.Ne_values),
+            len(self.wavelength),
+        ):
+            raise ValueError(
+                "Intensity shape does not match Te, Ne and wavelength grids."
+            )
+        self._check_axes(self.Te_values, self.Ne_values)
+
+    def __repr__(self):
+        return (
+            f"SurrogateGrid(elements={self.elements}, percentages={self.percentages}, "
+            f"Te=[{self.Te_values[0]}, {self.Te_values[-1]}] x {len(self.Te_values)}, "
+            f"Ne=[{self.Ne_values[0]:.3e}, {self.Ne_values[-1]:.3e}] x {len(self.Ne_values)})"
+        )
+
+    @staticmethod
+    def _check_axes(Te_values: np.ndarray, Ne_values: np.ndarray):
+        if len(Te_values) < 2 or len(Ne_values) < 2:
+            raise ValueError(
+                "Surrogate grid requires at least two Te and two Ne values."
+            )
+        # equal nodes would make interpolation weights divide by zero
+        if np.any(Ne_values <= 0) or not (
+            np.all(np.diff(Te_values) > 0) and np.all(np.diff(np.log10(Ne_values)) > 0)
+        ):
+            raise ValueError(
+                "Te and Ne values of surrogate grid must be positive and strictly increasing."
+            )
+
+    @classmethod
+    def build(
+        cls,
+        elements: List[str],
+        percentages: List[float],
+        Te_values: np.ndarray,
+        Ne_values: np.ndarray,
+        resolution: int = 1000,
+        low_w: int = 200,
+        upper_w: int = 1000,
+        max_ion_charge: int = 3,
+        cache: Optional[ResponseCache] = None,
+        fetch_engine: Optional[FetchEngine] = None,
+        max_workers: int = 8,
+    ) -> "SurrogateGrid":
+        """
+        Fetches spectra at every grid node with static webscraping
+
+        Parameters
+        ----------
+        Te_values: np.ndarray
+            Electron temperatures of grid [eV]
+        Ne_values: np.ndarray
+            Electron densities of grid [cm^-3], rounded to 3 significant digits as in queries,
+            values equal after rounding are fetched once
+        max_workers: int
+            Number of concurrent queries
+
+        Returns
+        -------
+        SurrogateGrid
+        """
+        Te_values = np.unique(np.asarray(Te_values, dtype=np.float64))
+        Ne_values = np.unique([round_significant(Ne) for Ne in Ne_values])
+        cls._check_axes(Te_values, Ne_values)
+
+        def simulate(Te, Ne):
+            return SimulatedLIBS(
+                Te=Te,
+                Ne=Ne,
+                elements=elements,
+                percentages=percentages,
+                resolution=resolution,
+                low_w=low_w,
+                upper_w=upper_w,
+                max_ion_charge=max_ion_charge,
+                cache=cache,
+                fetch_engine=fetch_engine,
+            ).spectrum
+
+        with ThreadPoolExecutor(max_workers) as pool:
+            spectra = [
+                [pool.submit(simulate, Te, Ne) for Ne in Ne_values] for Te in Te_values
+            ]
+            wavelength = spectra[0][0].result().wavelength
+            intensity = np.stack(
+                [np.stack([s.result().intensity for s in row]) for row in spectra]
+            )
+        return cls(Te_values, Ne_values, wavelength, intensity, elements, percentages)
+
+    def __call__(self, Te, Ne) -> np.ndarray:
+        """
+        Interpolates spectra at given plasma conditions
+
+        Parameters
+        ----------
+        Te : float or np.ndarray
+             Electron temperature Te [eV]
+        Ne: float or np.ndarray
+            Electron density Ne [cm^-3]
+
+        Returns
+        -------
+        np.ndarray
+            Float32 intensity of shape (number of conditions, len(wavelength))
+        """
+        Te = np.atleast_1d(np.asarray(Te, dtype=np.float64))
+        log_Ne = np.log10(np.atleast_1d(np.asarray(Ne, dtype=np.float64)))
+        log_Ne_values = np.log10(self.Ne_values)
+        if (
+            Te.min() < self.Te_values[0]
+            or Te.max() > self.Te_values[-1]
+            or log_Ne.min() < log_Ne_values[0] - 1e-9
+            or log_Ne.max() > log_Ne_values[-1] + 1e-9
+        ):
+            raise ValueError("Plasma conditions outside of surrogate grid.")
+        i, t = self._locate(self.Te_values, Te)
+        j, u = self._locate(log_Ne_values, log_Ne)
+        t = t[:, None].astype(np.float32)
+        u = u[:, None].astype(np.float32)
+        return (
+            (1 - t) * (1 - u) * self.intensity[i, j]
+            + t * (1 - u) * self.intensity[i + 1, j]
+            + (1 - t) * u * self.intensity[i, j + 1]
+            + t * u * self.intensity[i + 1, j + 1]
+        )
+
+    @staticmethod
+    def _locate(nodes: np.ndarray, values: np.ndarray):
+        index = np.clip(
+            np.searchsorted(nodes, values, side="right") - 1, 0, len(nodes) - 2
+        )
+        weight = (values - nodes[index]) / (nodes[index + 1] - nodes[index])
+        return index, np.clip(weight, 0, 1)
+
+    def sample(self, size: int, seed: Optional[int] = None):
+        """
+        Draws spectra at uniformly random Te and log-uniformly random Ne inside the grid
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]
+            Te, Ne and intensity of shape (size, len(wavelength))
+        """
+        rng = np.random.default_rng(seed)
+        Te = rng.uniform(self.Te_values[0], self.Te_values[-1], size)
+        Ne = 10 ** rng.uniform(
+            np.log10(self.Ne_values[0]), np.log10(self.Ne_values[-1]), size
+        )
+        return Te, Ne, self(Te, Ne)
+
+    def holdout_error(self) -> dict:
+        """
+        Estimates interpolation error by predicting every interior node from its neighbours
+
+        Error of each held-out node is relative to its maximal intensity. Prediction uses
+        twice the grid spacing, so the estimate is pessimistic for the full grid.
+
+        Returns
+        -------
+        dict
+            Mean and maximal relative error along Te and Ne axes
+        """
+        log_Ne = np.log10(self.Ne_values)
+        errors = {}
+        for axis, nodes in ((0, self.Te_values), (1, log_Ne)):
+            if len(nodes) < 3:
+                continue
+            lower = np.take(self.intensity, range(0, len(nodes) - 2), axis=axis)
+            middle = np.take(self.intensity, range(1, len(nodes) - 1), axis=axis)
+            upper = np.take(self.intensity, range(2, len(nodes)), axis=axis)
+            weight = (nodes[1:-1] - nodes[:-2]) / (nodes[2:] - nodes[:-2])
+            weight = weight.reshape((-1, 1, 1) if axis == 0 else (1, -1, 1))
+            predicted = (1 - weight) * lower + weight * upper
+            scale = np.maximum(np.abs(middle).max(axis=-1), 1e-12)
+            error = np.abs(predicted - middle).max(axis=-1) / scale
+            name = "Te" if axis == 0 else "Ne"
+            errors[name] = {"mean": float(error.mean()), "max": float(error.max())}
+        return errors
+
+    def save(self, path: str):
+        """
+        Saves grid to compressed .npz file
+        """
+        np.savez_compressed(
+            path,
+            Te_values=self.Te_values,
+            Ne_values=self.Ne_values,
+            wavelength=self.wavelength,
+            intensity=self.intensity,
+            elements=np.array(self.elements, dtype=str),
+            percentages=np.array(self.percentages, dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SurrogateGrid":
+        with np.load(path) as data:
+            return cls(
+                data["Te_values"],
+                data["Ne_values"],
+                data["wavelength"],
+                data["intensity"],
+                data["elements"].tolist(),
+                data["percentages"].tolist(),
+            )
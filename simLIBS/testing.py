@@ -0,0 +1,219 @@
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import requests
+
+from simLIBS import simulation
+from simLIBS.cache import ResponseCache
+
+# synthetic line catalogue spans this range, so overlapping queries see the same lines
+CATALOGUE_RANGE = (0.0, 2000.0)
+
+
+def element_lines(element: str, low_w: float, upper_w: float, lines_per_100nm: int = 2):
+    """
+    Lines of element in [low_w, upper_w]: positions, energies and ion index of line
+    """
+    rng = np.random.default_rng(sum(ord(c) * 31**i for i, c in enumerate(element)))
+    n_lines = int(lines_per_100nm * (CATALOGUE_RANGE[1] - CATALOGUE_RANGE[0]) / 100)
+    positions = rng.uniform(*CATALOGUE_RANGE, n_lines)
+    energies = rng.uniform(1, 5, n_lines)
+    inside = np.flatnonzero((positions >= low_w) & (positions <= upper_w))
+    return positions[inside], energies[inside], inside
+
+
+def synthetic_page(site: str, lines_per_100nm: int = 2) -> bytes:
+    """
+    NIST LIBS-like page for query, line intensities scale linearly with element percentage.
+
+    Lines come from fixed catalogue, so pages of overlapping ranges agree where they overlap
+    (apart from wings of lines outside the range, as in NIST LIBS).
+    dataDopplerArray rows: wavelength, sum and one column per ion (element I, II, ... in query order),
+    dataSticksArray rows: line wavelength, peak intensity and ion column index.
+    """
+    query = {name: values[0] for name, values in parse_qs(urlsplit(site).query).items()}
+    low_w, upper_w = float(query["low_w"]), float(query["upp_w"])
+    resolution, Te = float(query["resolution"]), float(query["temp"])
+    n_ions = int(query.get("maxcharge", 3)) + 1
+    step = (low_w + upper_w) / 2 / resolution / 4
+    wavelength = np.arange(low_w, upper_w + step / 2, step)
+    ions: List[np.ndarray] = []
+    sticks: List[Tuple[float, float, int]] = []
+    for part in query["composition"].split(";"):
+        element, percentage = part.split(":")
+        positions, energies, numbers = element_lines(
+            element, low_w, upper_w, lines_per_100nm
+        )
+        element_ions = np.zeros((n_ions, len(wavelength)))
+        for position, energy, number in zip(positions, energies, numbers):
+            height = float(percentage) * 1e3 * np.exp(-energy / Te)
+            width = position / resolution / 2.355
+            # profile is evaluated within 8 widths of line centre
+            window = slice(
+                np.searchsorted(wavelength, position - 8 * width),
+                np.searchsorted(wavelength, position + 8 * width),
+            )
+            element_ions[number % n_ions, window] += height * np.exp(
+                -0.5 * ((wavelength[window] - position) / width) ** 2
+            )
+            sticks.append((position, height, len(ions) + number % n_ions))
+        ions.extend(element_ions)
+    columns = np.column_stack([wavelength, np.sum(ions, axis=0), np.transpose(ions)])
+    rows = ",\n".join("[" + ",".join(f"{v:.6e}" for v in row) + "]" for row in columns)
+    stick_rows = ",\n".join(f"[{w:.6f},{i:.6e},{k}]" for w, i, k in sorted(sticks))
+    return (
+        "<html><body><script>\n    var dataDopplerArray=[\n"
+        + rows
+        + "];\n    var dataSticksArray=[\n"
+        + stick_rows
+        + "];\n</script></body></html>"
+    ).encode()
+
+
+def fixture_path(fixtures_dir: str, site: str) -> str:
+    """
+    Path of recorded response, independent of host the query was sent to
+    """
+    query = urlsplit(site).query
+    return os.path.join(
+        fixtures_dir,
+        ResponseCache.key(f"{simulation.DEFAULT_NIST_LIBS_URL}?{query}") + ".html",
+    )
+
+
+def record_fixture(site: str, fixtures_dir: str) -> str:
+    """
+    Downloads response of real NIST LIBS and stores it as fixture for StandInServer
+
+    Returns
+    -------
+    str
+        Path of fixture
+    """
+    os.makedirs(fixtures_dir, exist_ok=True)
+    response = requests.get(site, verify=False, timeout=120)
+    response.raise_for_status()
+    path = fixture_path(fixtures_dir, site)
+    with open(path, "wb") as file:
+        file.write(response.content)
+    return path
+
+
+class StandInServer(object):
+    """
+    Local HTTP server answering lines1.pl queries with recorded fixtures or synthetic pages.
+
+    Latency (with optional uniform jitter) and rate of 503 errors are configurable.
+    Inside with block simulation.NIST_LIBS_URL points to the server.
+    """
+
+    def __init__(
+        self,
+        fixtures_dir: Optional[str] = None,
+        synthesize: bool = True,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+
+        Parameters
+        ----------
+        fixtures_dir: str
+            Directory with fixtures written by record_fixture
+        synthesize: bool
+            Answer queries without fixture with synthetic_page, otherwise with 404
+        latency: float
+            Delay of every response [s]
+        jitter: float
+            Maximal random delay added to latency [s]
+        error_rate: float
+            Probability of 503 response
+        seed: int
+            Seed of latency jitter and errors
+
+        """
+        self.fixtures_dir = fixtures_dir
+        self.synthesize = synthesize
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._previous_url = simulation.NIST_LIBS_URL
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("StandInServer is not running.")
+        return (
+            f"http://127.0.0.1:{self._server.server_address[1]}/cgi-bin/ASD/lines1.pl"
+        )
+
+    def respond(self, path: str):
+        """
+        Returns status and body for request path
+        """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        time.sleep(delay)
+        if failed:
+            return 503, b"Service Unavailable"
+        if self.fixtures_dir is not None:
+            fixture = fixture_path(self.fixtures_dir, path)
+            if os.path.exists(fixture):
+                with open(fixture, "rb") as file:
+                    return 200, file.read()
+        if self.synthesize:
+            return 200, synthetic_page(path)
+        return 404, b"Not Found"
+
+    def start(self) -> "StandInServer":
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = stand_in.respond(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        self._previous_url = simulation.NIST_LIBS_URL
+        simulation.NIST_LIBS_URL = self.url
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        simulation.NIST_LIBS_URL = self._previous_url
+        self.stop()
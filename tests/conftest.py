@@ -0,0 +1,13 @@
+import pytest
+
+from simLIBS import SimulatedLIBS
+from simLIBS.testing import synthetic_page
+
+
+@pytest.fixture
+def synthetic_nist(monkeypatch):
+    """
+    Static queries of SimulatedLIBS are answered by synthetic_page instead of NIST
+    """
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(synthetic_page))
+    return monkeypatch
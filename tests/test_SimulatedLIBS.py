@@ -4,7 +4,8 @@ import pytest
 
 import os
 from simLIBS import validate_simulated_libs, SimulatedLIBS
-from simLIBS.simulation import CompositionError
+from simLIBS.simulation import CompositionError, ion_labels, parse_js_array
+from simLIBS.testing import element_lines, synthetic_page
 
 
 def test_static():
@@ -87,3 +88,205 @@ def test_unequal_element_percentage_length():
     with pytest.raises(ValueError) as excinfo:
         validate_simulated_libs(1.0, 1e17, elements, percentages, 200, 1000, 3)
     assert "Invalid parameters" in str(excinfo.value)
+
+
+def test_parse_doppler_array():
+    html_data = (
+        "<script>\n    var dataDopplerArray=[\n[200.0,0],\n[200.1,1.5e+02],\n[200.2,null]];\n"
+        "    var dataSticksArray=[\n[200.05,3.0]];\n</script>"
+    )
+    spectrum = parse_js_array(html_data, "dataDopplerArray")
+    assert spectrum.dtype == np.float64
+    assert np.allclose(spectrum, [[200.0, 0.0], [200.1, 150.0], [200.2, 0.0]])
+    assert np.allclose(parse_js_array(html_data, "dataSticksArray"), [[200.05, 3.0]])
+    with pytest.raises(ValueError):
+        parse_js_array(html_data, "dataMissingArray")
+
+
+def test_static_ion_spectra(synthetic_nist):
+    libs = SimulatedLIBS(
+        elements=["He", "W"],
+        percentages=[50, 50],
+        max_ion_charge=1,
+        webscraping="static",
+    )
+    ion_spectra = libs.get_ion_spectra()
+    assert list(ion_spectra.columns) == [
+        "Wavelength (nm)",
+        "Sum(calc)",
+        "He I",
+        "He II",
+        "W I",
+        "W II",
+    ]
+    assert np.allclose(
+        ion_spectra.iloc[:, 2:].sum(axis=1), ion_spectra["Sum(calc)"], rtol=1e-5
+    )
+    assert np.array_equal(
+        libs.get_raw_spectrum()["intensity"], ion_spectra["Sum(calc)"]
+    )
+    assert len(libs.sticks) == sum(
+        len(element_lines(element, 200, 1000)[0]) for element in ["He", "W"]
+    )
+    assert list(libs.sticks.columns) == ["wavelength", "intensity"]
+
+
+def test_ion_labels():
+    labels = ion_labels(["W"], 13)
+    assert labels[:4] == ["W I", "W II", "W III", "W IV"]
+    assert labels[8:] == ["W IX", "W X", "W XI", "W XII", "W XIII", "W XIV"]
+
+
+def test_ion_spectra_labels(monkeypatch):
+    page = (
+        b"<script>var labels = ['Wavelength (nm)', 'H I', 'Sum'];\n"
+        b"var dataDopplerArray=[\n[200.0,1.0,1.5],\n[1000.0,2.0,2.5]];\n</script>"
+    )
+    monkeypatch.setattr(
+        SimulatedLIBS, "download_static", staticmethod(lambda site: page)
+    )
+    libs = SimulatedLIBS(elements=["H"], percentages=[100], max_ion_charge=0)
+    assert list(libs.ion_spectra.columns) == ["Wavelength (nm)", "Sum(calc)", "H I"]
+    assert np.allclose(libs.raw_spectrum["intensity"], [1.5, 2.5])
+    assert libs.sticks is None
+
+
+def test_lazy_async(monkeypatch):
+    import asyncio
+    import threading
+    import time
+
+    from simLIBS.simulation import gather_simulations
+
+    lock = threading.Lock()
+    state = {"calls": 0, "running": 0, "max_running": 0}
+
+    def slow_page(site):
+        with lock:
+            state["calls"] += 1
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+        time.sleep(0.05)
+        with lock:
+            state["running"] -= 1
+        return synthetic_page(site)
+
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(slow_page))
+    parameters = dict(elements=["W", "H"], percentages=[50, 50], Ne=10**17)
+    libs = SimulatedLIBS(Te=1.0, lazy=True, **parameters)
+    assert state["calls"] == 0 and libs.spectrum is None
+    spectrum = libs.get_interpolated_spectrum()
+    assert state["calls"] == 1
+    pd.testing.assert_frame_equal(spectrum, libs.get_interpolated_spectrum())
+    assert state["calls"] == 1
+    pd.testing.assert_frame_equal(
+        spectrum, SimulatedLIBS(Te=1.0, **parameters).get_interpolated_spectrum()
+    )
+
+    batch = [
+        SimulatedLIBS(Te=1.0 + k / 10, lazy=True, **parameters) for k in range(1, 7)
+    ]
+
+    async def simulate():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.ensure_future(heartbeat())
+        results = await gather_simulations(batch, max_concurrency=2)
+        raw = await results[0].aget_raw_spectrum()
+        beat.cancel()
+        return results, raw, ticks
+
+    state["calls"] = 0
+    results, raw, ticks = asyncio.run(simulate())
+    assert results == batch
+    assert all(result.retrieved for result in results)
+    assert state["calls"] == 6 and state["max_running"] == 2
+    # event loop kept running while pages were fetched
+    assert ticks > 5
+    assert len(raw) > 0
+
+
+def test_pickle(synthetic_nist):
+    import copy
+    import pickle
+
+    parameters = dict(elements=["W", "H"], percentages=[50, 50], Ne=10**17)
+    for libs in [SimulatedLIBS(**parameters), SimulatedLIBS(lazy=True, **parameters)]:
+        copies = [pickle.loads(pickle.dumps(libs)), copy.deepcopy(libs)]
+        assert [restored.retrieved for restored in copies] == [libs.retrieved] * 2
+        for restored in copies:
+            pd.testing.assert_frame_equal(
+                restored.get_interpolated_spectrum(), libs.get_interpolated_spectrum()
+            )
+
+
+def test_pickle_handles(synthetic_nist, tmp_path):
+    import pickle
+
+    from simLIBS import ResponseCache
+    from simLIBS.driver_pool import DriverPool
+    from simLIBS.fetch import FetchEngine
+    from simLIBS.instrumentation import PipelineStats
+
+    parameters = dict(elements=["H"], percentages=[100], lazy=True)
+
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    libs = SimulatedLIBS(cache=cache, **parameters)
+    libs.retrieve()
+    restored = pickle.loads(pickle.dumps(SimulatedLIBS(cache=cache, **parameters)))
+    assert restored.cache.path == cache.path
+    restored.retrieve()
+    assert restored.cache.hits == 1
+
+    engine = FetchEngine(max_concurrency=3, requests_per_second=100)
+    restored = pickle.loads(
+        pickle.dumps(SimulatedLIBS(fetch_engine=engine, **parameters))
+    )
+    assert restored.fetch_engine.max_concurrency == 3
+    assert restored.fetch_engine.session is not engine.session
+
+    stats = PipelineStats()
+    SimulatedLIBS(stats=stats, **parameters).retrieve()
+    restored = pickle.loads(pickle.dumps(SimulatedLIBS(stats=stats, **parameters)))
+    assert len(restored.stats.records) == len(stats.records) > 0
+    with restored.stats.sample(1), restored.stats.stage("fetch"):
+        pass
+    assert restored.stats.records[-1]["sample"] == 1
+
+    # browsers cannot leave their process, pool is dropped once spectrum is retrieved
+    pool = DriverPool()
+    with pytest.raises(TypeError, match="driver_pool"):
+        pickle.dumps(SimulatedLIBS(driver_pool=pool, **parameters))
+    libs = SimulatedLIBS(driver_pool=pool, **parameters).retrieve()
+    assert pickle.loads(pickle.dumps(libs)).driver_pool is None
+
+
+def test_gather_error_does_not_wait(monkeypatch):
+    import asyncio
+    import threading
+    import time
+
+    from simLIBS.simulation import gather_simulations
+
+    release = threading.Event()
+
+    def page(site):
+        if "temp=1.1" in site:
+            raise ConnectionError("failed query")
+        release.wait(5)
+        return synthetic_page(site)
+
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(page))
+    parameters = dict(elements=["W", "H"], percentages=[50, 50], Ne=10**17)
+    batch = [SimulatedLIBS(Te=Te, lazy=True, **parameters) for Te in [1.0, 1.1, 1.2]]
+    start = time.perf_counter()
+    with pytest.raises(ConnectionError):
+        asyncio.run(gather_simulations(batch, max_concurrency=3))
+    release.set()
+    assert time.perf_counter() - start < 4
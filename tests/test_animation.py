@@ -0,0 +1,32 @@
+import numpy as np
+from PIL import Image
+
+from simLIBS.animation import get_intensity, render_animation
+
+
+def test_render_animation(synthetic_nist, tmp_path):
+    Te_range = np.arange(0.5, 5, 0.25)
+    wavelength_range, intensity_range = get_intensity(
+        resolution_range=[1000] * len(Te_range),
+        Te_range=Te_range,
+        Ne_range=[10**17] * len(Te_range),
+        elements=["W", "Fe"],
+        percentages=[50, 50],
+        low_w=200,
+        upper_w=400,
+        webscraping="static",
+    )
+    assert all(np.isclose(intensity.max(), 1.0) for intensity in intensity_range)
+    path = str(tmp_path / "temperature.gif")
+    frames = render_animation(
+        path,
+        "Temperature",
+        wavelength_range,
+        intensity_range,
+        Te_range,
+        "[eV]",
+        ["W", "Fe"],
+    )
+    assert frames == len(Te_range)
+    with Image.open(path) as image:
+        assert image.n_frames == len(Te_range)
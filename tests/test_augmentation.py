@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simLIBS.augmentation import Augmenter
+from simLIBS.spectrum import SpectrumBatch, WavelengthGrid
+
+
+@pytest.fixture
+def spectra():
+    grid = WavelengthGrid.arange(200, 300, 0.1)
+    centres = np.array([[220.0], [250.0], [280.0]])
+    intensity = 1e3 * np.exp(-(((grid.values - centres) / 0.5) ** 2))
+    return SpectrumBatch(grid, intensity)
+
+
+def test_augmentation_shift_scale(spectra):
+    augmented = Augmenter(shift=0.3, scale=(1, 1), baseline=0, noise=0, seed=1)(
+        spectra, copies=2
+    )
+    assert augmented.grid is spectra.grid
+    assert augmented.intensity.shape == (6, len(spectra.grid))
+    delta = np.random.default_rng(1).uniform(-0.3, 0.3, 6)
+    for row, shift in enumerate(delta):
+        expected = np.interp(
+            spectra.wavelength - shift,
+            spectra.wavelength,
+            spectra.intensity[row // 2],
+        )
+        assert np.allclose(augmented.intensity[row], expected, atol=1e-2)
+
+    scaled = Augmenter(shift=0, scale=(0.5, 2), baseline=0, noise=0, seed=2)(spectra)
+    ratio = scaled.intensity.max(axis=1) / spectra.intensity.max(axis=1)
+    assert ((ratio >= 0.5) & (ratio <= 2)).all()
+    assert np.allclose(scaled.intensity, spectra.intensity * ratio[:, None], atol=1e-3)
+
+
+def test_augmentation_noise_baseline(spectra):
+    augmenter = Augmenter(shift=0, scale=(1, 1), baseline=0, noise=0.01, clip=False)
+    noisy = augmenter(spectra, copies=50).intensity - np.repeat(
+        spectra.intensity, 50, axis=0
+    )
+    assert abs(noisy.std() / 1e3 - 0.01) < 1e-3
+    drift = Augmenter(shift=0, scale=(1, 1), baseline=0.1, noise=0)(spectra, copies=10)
+    baseline = drift.intensity - np.repeat(spectra.intensity, 10, axis=0)
+    assert (baseline >= -1e-3).all() and (baseline <= 100 + 1e-3).all()
+    with pytest.raises(ValueError):
+        Augmenter(noise=-1)
+
+
+def test_augmentation_stream(spectra):
+    metadata = pd.DataFrame({"name": ["A", "B", "C"]})
+    batches = [(spectra, metadata), (spectra[:1], metadata[:1])]
+    first = list(Augmenter(seed=3).stream(batches, copies=4))
+    second = list(Augmenter(seed=3).stream(batches, copies=4))
+    assert [len(augmented) for augmented, _ in first] == [12, 4]
+    assert first[0][1]["name"].tolist() == ["A"] * 4 + ["B"] * 4 + ["C"] * 4
+    for (left, _), (right, _) in zip(first, second):
+        assert np.array_equal(left.intensity, right.intensity)
+    assert not np.array_equal(first[0][0].intensity[0], first[0][0].intensity[1])
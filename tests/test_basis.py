@@ -0,0 +1,61 @@
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simLIBS import SimulatedLIBS
+from simLIBS.basis import BasisLibrary
+from simLIBS.testing import synthetic_page
+
+
+def test_basis_mixing(synthetic_nist):
+    basis = BasisLibrary()
+    mixed = basis.spectrum(["W", "H", "He"], [50, 25, 25], 1.0, 1.2345e17)
+    assert basis.fetches == 3
+    assert np.allclose(mixed["wavelength"], np.round(np.arange(200, 1000, 0.1), 3))
+    assert basis.validate(["W", "H", "He"], [50, 25, 25], 1.0, 1.2345e17) < 1e-3
+    basis.spectrum(["W", "H"], [30, 70], 1.0, 1.2346e17)
+    assert basis.fetches == 3
+
+
+def test_dataset_basis_mode(synthetic_nist):
+    input_df = pd.DataFrame({"W": [50, 30], "H": [50, 70], "name": ["A", "B"]})
+    conditions = [(1.0, 1e17), (1.5, 2e17)]
+    libs_df = SimulatedLIBS.create_dataset(
+        input_df, size=12, mixing="basis", plasma_conditions=conditions
+    )
+    assert len(libs_df) == 12
+    assert set(libs_df["Te[eV]"]) <= {1.0, 1.5}
+    assert libs_df.iloc[:, :-5].astype(float).max().max() > 0
+
+
+def test_basis_requires_conditions():
+    input_df = pd.DataFrame({"W": [50], "H": [50], "name": ["A"]})
+    with pytest.raises(ValueError):
+        SimulatedLIBS.create_dataset(input_df, size=2, mixing="basis")
+
+
+def test_basis_validate_nonlinear(monkeypatch):
+    def self_absorbed_page(site):
+        # line intensity grows as square of percentage, as with self-absorption
+        parts = urlsplit(site)
+        query = parse_qs(parts.query)
+        query["composition"] = [
+            ";".join(
+                f"{element}:{float(percentage) ** 2 / 100}"
+                for element, percentage in (
+                    part.split(":") for part in query["composition"][0].split(";")
+                )
+            )
+        ]
+        return synthetic_page(
+            urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
+        )
+
+    monkeypatch.setattr(
+        SimulatedLIBS, "download_static", staticmethod(self_absorbed_page)
+    )
+    basis = BasisLibrary()
+    with pytest.raises(ValueError, match="Linear mixing error"):
+        basis.validate(["W", "H"], [50, 50], 1.0, 1e17)
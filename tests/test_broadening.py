@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from scipy.integrate import trapezoid
+
+from simLIBS import SimulatedLIBS
+from simLIBS.broadening import broaden
+
+
+def test_broaden_area_and_peak():
+    wavelength = np.arange(490, 510, 0.001)
+    area = broaden([500.0], [2.0], wavelength, 1000)
+    assert np.isclose(trapezoid(area, wavelength), 2.0, rtol=1e-3)
+    assert np.isclose(wavelength[np.argmax(area)], 500.0, atol=0.05)
+    fwhm = np.ptp(wavelength[area > area.max() / 2])
+    assert np.isclose(fwhm, 0.5, rtol=0.03)
+
+    peak = broaden([500.0], [2.0], wavelength, [1000, 5000], profile="peak")
+    assert peak.shape == (2, len(wavelength))
+    assert np.allclose(peak.max(axis=1), 2.0, rtol=0.02)
+
+
+def test_validate_against_synthetic_spectrum(synthetic_nist):
+    # synthetic page uses the same Gaussian model (FWHM = wavelength / resolution), so this
+    # checks consistency of broaden and validate_broadening, not agreement with NIST
+    libs = SimulatedLIBS(
+        elements=["W", "Fe"],
+        percentages=[50, 50],
+        resolution=2000,
+        low_w=300,
+        upper_w=400,
+    )
+    errors = libs.validate_broadening(tolerance=0.02, profile="peak")
+    assert np.isclose(errors["scale"], 1.0, rtol=0.01)
+
+    spectra = libs.broaden([1000, 2000, 4000])
+    assert list(spectra.columns) == ["wavelength", 1000, 2000, 4000]
+    assert spectra[4000].max() > spectra[2000].max() > spectra[1000].max()
+    with pytest.raises(ValueError):
+        libs.validate_broadening(tolerance=0.01, profile="peak", doppler_fwhm=1e-3)
@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+import pytest
+
+from simLIBS import ResponseCache, SimulatedLIBS
+from simLIBS.cache import CacheMissError, normalize_query
+from simLIBS.testing import synthetic_page
+
+
+def test_normalize_query():
+    site = "https://physics.nist.gov/cgi-bin/ASD/lines1.pl?composition=W%3A50%3BH%3A50&temp=1&eden=1e17"
+    same = "https://physics.nist.gov/cgi-bin/ASD/lines1.pl?eden=1.0e17&temp=1.0&composition=W%3A50.0%3BH%3A50"
+    assert normalize_query(site) == normalize_query(same)
+    assert normalize_query(site) != normalize_query(site, kind="dynamic")
+
+
+def test_hits_misses_and_offline(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    assert cache.fetch("https://nist/a?x=1", lambda site: b"a") == b"a"
+    assert cache.fetch("https://nist/a?x=1.0", lambda site: b"b") == b"a"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    offline = ResponseCache(path=cache.path, offline=True)
+    assert offline.fetch("https://nist/a?x=1", lambda site: b"b") == b"a"
+    with pytest.raises(CacheMissError):
+        offline.fetch("https://nist/a?x=2", lambda site: b"b")
+
+
+def test_lru_eviction_and_ttl(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), max_bytes=120)
+    content = np.random.default_rng(0).bytes(40)
+    cache.put("https://nist/a", content)
+    cache.put("https://nist/b", content)
+    assert cache.get("https://nist/a") == content
+    cache.put("https://nist/c", content)
+    assert cache.get("https://nist/b") is None
+    assert len(cache) == 2
+    # replaced entry is counted once, total is read again by reopened cache
+    cache.put("https://nist/c", content)
+    assert cache._bytes == cache.stats()["bytes"]
+    reopened = ResponseCache(path=cache.path, max_bytes=120)
+    assert reopened._bytes == cache.stats()["bytes"]
+
+    cache.ttl = 0.01
+    time.sleep(0.02)
+    assert cache.get("https://nist/a") is None
+
+
+def test_simulation_from_cache(synthetic_nist, tmp_path, monkeypatch):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    SimulatedLIBS(elements=["H"], percentages=[100], cache=cache)
+
+    monkeypatch.undo()
+    cache.offline = True
+    libs = SimulatedLIBS(elements=["H"], percentages=[100], cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert libs.get_raw_spectrum()["intensity"].dtype == np.float64
+    assert len(libs.get_interpolated_spectrum()) == 8000
+
+
+def test_coalescing_respects_cache(tmp_path, monkeypatch):
+    import threading
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_page(site):
+        started.set()
+        release.wait(5)
+        return synthetic_page(site)
+
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(slow_page))
+    parameters = dict(elements=["H"], percentages=[100], lazy=True)
+    online = SimulatedLIBS(**parameters)
+    thread = threading.Thread(target=online.retrieve)
+    thread.start()
+    started.wait(5)
+    # identical query in flight without cache is not shared with offline cache
+    offline = ResponseCache(path=str(tmp_path / "cache.sqlite"), offline=True)
+    try:
+        with pytest.raises(CacheMissError):
+            SimulatedLIBS(cache=offline, **parameters).retrieve()
+    finally:
+        release.set()
+        thread.join()
+    assert len(offline) == 0 and online.retrieved
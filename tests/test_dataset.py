@@ -0,0 +1,193 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simLIBS import SimulatedLIBS
+from simLIBS.dataset import (
+    DatasetReader,
+    SampleLedger,
+    consolidate_chunks,
+    read_dataset_chunks,
+    write_dataset,
+)
+from simLIBS.testing import synthetic_page
+
+
+def test_dataset_layout(synthetic_nist):
+    input_df = pd.read_csv("data.csv")
+    libs_df = SimulatedLIBS.create_dataset(input_df, size=5)
+    assert libs_df.shape == (5, 8000 + 6)
+    assert list(libs_df.columns[:2]) == ["200.0", "200.1"]
+    assert list(libs_df.columns[-6:]) == ["W", "H", "He", "name", "Te[eV]", "Ne[cm^-3]"]
+    assert (libs_df.dtypes.iloc[:-6] == np.float32).all()
+    for _, row in libs_df.iloc[:, -6:-2].iterrows():
+        assert row.tolist() in input_df.values.tolist()
+
+
+def test_dataset_chunks(synthetic_nist, tmp_path):
+    input_df = pd.read_csv("data.csv")
+    index = SimulatedLIBS.create_dataset(
+        input_df, size=7, chunk_size=3, output_dir=str(tmp_path)
+    )
+    assert index["chunk"].tolist() == ["chunk-00000"] * 3 + ["chunk-00001"] * 3 + [
+        "chunk-00002"
+    ]
+    libs_df = read_dataset_chunks(str(tmp_path))
+    assert libs_df.shape == (7, 8000 + 6)
+    assert np.allclose(libs_df["Te[eV]"], index["Te[eV]"])
+
+    # shorter rerun in the same directory does not pick up chunk-00002 of first run
+    index = SimulatedLIBS.create_dataset(
+        input_df, size=4, chunk_size=2, output_dir=str(tmp_path)
+    )
+    libs_df = read_dataset_chunks(str(tmp_path))
+    assert libs_df.shape == (4, 8000 + 6)
+    assert np.allclose(libs_df["Te[eV]"], index["Te[eV]"])
+    consolidate_chunks(str(tmp_path), str(tmp_path / "binary"))
+    assert len(DatasetReader(str(tmp_path / "binary"))) == 4
+    # directory of other data is not cleaned
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "chunk-00000.npy").write_bytes(b"data")
+    with pytest.raises(ValueError, match="chunks.json"):
+        SimulatedLIBS.create_dataset(
+            input_df, size=2, output_dir=str(tmp_path / "other")
+        )
+    assert (tmp_path / "other" / "chunk-00000.npy").read_bytes() == b"data"
+
+
+def test_dataset_pipeline(synthetic_nist):
+    input_df = pd.read_csv("data.csv")
+    threads_df = SimulatedLIBS.create_dataset(input_df, size=9, max_workers=3, seed=1)
+    libs_df = SimulatedLIBS.create_dataset(
+        input_df, size=9, max_workers=2, cpu_workers=2, seed=1
+    )
+    pd.testing.assert_frame_equal(libs_df, threads_df)
+    expected = [
+        SimulatedLIBS.sample_parameters(
+            input_df, 1.0, 2.0, 10**17, 10**18, rng=SimulatedLIBS.sample_rng(1, index)
+        )
+        for index in range(9)
+    ]
+    assert libs_df["name"].tolist() == [sample["name"] for sample in expected]
+    assert np.allclose(libs_df["Te[eV]"], [sample["Te"] for sample in expected])
+
+
+def test_dataset_resume(monkeypatch, tmp_path):
+    input_df = pd.read_csv("data.csv")
+    calls = []
+
+    def flaky_page(site):
+        calls.append(site)
+        if len(calls) == 6:
+            raise ConnectionError("network blip")
+        return synthetic_page(site)
+
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(flaky_page))
+    checkpoint = str(tmp_path / "ledger")
+    with pytest.raises(ConnectionError):
+        SimulatedLIBS.create_dataset(
+            input_df, size=10, max_workers=1, seed=7, checkpoint=checkpoint
+        )
+    ledger = SampleLedger(checkpoint, SampleLedger.read_parameters(checkpoint))
+    assert sorted(ledger.offsets) == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    ledger.close()
+    # record torn by crash during write
+    with open(os.path.join(checkpoint, "ledger.bin"), "ab") as file:
+        file.write(b"\x00" * 100)
+
+    resumed = SimulatedLIBS.create_dataset(
+        input_df,
+        size=10,
+        max_workers=2,
+        checkpoint=checkpoint,
+        output_dir=str(tmp_path / "resumed"),
+    )
+    assert len(calls) == 10 + 1
+    uninterrupted = SimulatedLIBS.create_dataset(
+        input_df, size=10, seed=7, output_dir=str(tmp_path / "uninterrupted")
+    )
+    pd.testing.assert_frame_equal(resumed, uninterrupted)
+    for name in ["wavelength.npy", "chunk-00000.npy", "chunk-00000.csv"]:
+        with open(tmp_path / "resumed" / name, "rb") as left, open(
+            tmp_path / "uninterrupted" / name, "rb"
+        ) as right:
+            assert left.read() == right.read()
+
+    with pytest.raises(ValueError):
+        SimulatedLIBS.create_dataset(
+            input_df, size=10, Te_max=3.0, seed=7, checkpoint=checkpoint
+        )
+
+
+def test_dataset_pipeline_resume(synthetic_nist, tmp_path):
+    input_df = pd.read_csv("data.csv")
+    checkpoint = str(tmp_path / "ledger")
+    SimulatedLIBS.create_dataset(
+        input_df, size=4, seed=3, cpu_workers=1, checkpoint=checkpoint
+    )
+    resumed = SimulatedLIBS.create_dataset(
+        input_df, size=8, seed=3, cpu_workers=1, checkpoint=checkpoint
+    )
+    uninterrupted = SimulatedLIBS.create_dataset(input_df, size=8, seed=3)
+    pd.testing.assert_frame_equal(resumed, uninterrupted)
+
+
+@pytest.mark.parametrize("cpu_workers", [None, 1])
+def test_dataset_query_grouping(monkeypatch, cpu_workers):
+    sites = []
+
+    def counted_page(site):
+        sites.append(site)
+        return synthetic_page(site)
+
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(counted_page))
+    input_df = pd.read_csv("data.csv")
+    libs_df = SimulatedLIBS.create_dataset(
+        input_df,
+        size=12,
+        plasma_conditions=[(1.0, 10**17), (1.0, 1.0004 * 10**17)],
+        max_workers=4,
+        cpu_workers=cpu_workers,
+        seed=5,
+    )
+    # both plasma conditions round to the same Ne, so there are 3 unique queries
+    assert len(sites) == len(set(sites)) == 3
+    assert libs_df.shape == (12, 8000 + 6)
+    for _, group in libs_df.groupby("name"):
+        assert (group.iloc[:, :-6].values == group.iloc[0, :-6].values).all()
+
+
+def test_dataset_binary_reader(synthetic_nist, tmp_path):
+    input_df = pd.read_csv("data.csv")
+    SimulatedLIBS.create_dataset(
+        input_df, size=7, chunk_size=3, seed=2, output_dir=str(tmp_path / "chunks")
+    )
+    libs_df = read_dataset_chunks(str(tmp_path / "chunks"))
+    consolidate_chunks(str(tmp_path / "chunks"), str(tmp_path / "binary"))
+    write_dataset(str(tmp_path / "written"), libs_df)
+    for path in ["binary", "written"]:
+        reader = DatasetReader(str(tmp_path / path))
+        assert isinstance(reader.intensity, np.memmap)
+        pd.testing.assert_frame_equal(reader.to_dataframe(), libs_df)
+
+    reader = DatasetReader(str(tmp_path / "binary"))
+    batches = list(reader.batches(batch_size=3, seed=5))
+    assert [len(spectra) for spectra, _ in batches] == [3, 3, 1]
+    assert [len(spectra) for spectra, _ in reader.batches(3, drop_last=True)] == [3, 3]
+    order = []
+    for spectra, metadata in batches:
+        order.extend(
+            metadata["Te[eV]"].map(dict(zip(libs_df["Te[eV]"], libs_df.index)))
+        )
+        for spectrum, (_, sample) in zip(spectra, metadata.iterrows()):
+            row = libs_df.index[libs_df["Te[eV]"] == sample["Te[eV]"]][0]
+            assert np.array_equal(spectrum.intensity, libs_df.iloc[row, :-6].values)
+    assert sorted(order) == list(range(7))
+    assert order != list(range(7))
+    again = [
+        metadata["Te[eV]"].tolist()
+        for _, metadata in reader.batches(3, seed=5, prefetch=0)
+    ]
+    assert again == [metadata["Te[eV]"].tolist() for _, metadata in batches]
@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from simLIBS.driver_pool import DriverPool
+
+
+class FakeDriver(object):
+    def __init__(self):
+        self.window_handles = ["main"]
+        self.current = "main"
+        self.quit_called = False
+        self.switch_to = self
+
+    def window(self, handle):
+        self.current = handle
+
+    def open_csv(self):
+        self.window_handles.append(f"csv{len(self.window_handles)}")
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_reuse_reset_and_recycle():
+    pool = DriverPool(size=1, max_uses=3, driver_factory=FakeDriver)
+    drivers = []
+    for _ in range(4):
+        with pool.checkout() as driver:
+            assert driver.window_handles == ["main"]
+            driver.open_csv()
+            drivers.append(driver)
+    assert drivers[0] is drivers[1] is drivers[2]
+    assert drivers[0].quit_called
+    assert drivers[3] is not drivers[0]
+    assert pool.started == 2
+
+
+def test_concurrent_checkout_and_health_check():
+    pool = DriverPool(size=2, driver_factory=FakeDriver)
+    in_use = []
+    lock = threading.Lock()
+
+    def query(_):
+        with pool.checkout() as driver:
+            with lock:
+                in_use.append(driver)
+                assert len(set(map(id, in_use))) <= 2
+            in_use.remove(driver)
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(query, range(40)))
+    assert pool.started <= 2
+
+    with pool.checkout() as driver:
+        pass
+    driver.window_handles = []
+    with pool.checkout() as replacement:
+        assert replacement is not driver
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from simLIBS import SimulatedLIBS
+from simLIBS.extract import ScriptExtractor, extract_script
+from simLIBS.fetch import FetchEngine
+from simLIBS.simulation import parse_js_array
+from simLIBS.testing import StandInServer, fixture_path, synthetic_page
+
+SITE = (
+    "http://localhost/?composition=W:50;H:50&temp=1&eden=1e17&maxcharge=1"
+    "&low_w=200&upp_w=1000&resolution=1000"
+)
+
+
+def chunked(page: bytes, size: int):
+    return [page[i : i + size] for i in range(0, len(page), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_extract_script_chunks(chunk_size):
+    spectrum_page = synthetic_page(SITE)
+    page = (
+        b"<html><head><script>var other=[[1,2]];</script></head>"
+        + spectrum_page
+        + b"<table>"
+        + b"<tr><td>line</td></tr>" * 10000
+    )
+    extractor = ScriptExtractor()
+    script = extract_script(chunked(page, chunk_size), extractor)
+    assert script.startswith(b"<script>") and script.endswith(b"</script>")
+    assert b"var other" not in script
+    # reading stops within the chunk in which the script ends
+    assert extractor.bytes_read < len(spectrum_page) + max(chunk_size, 100)
+    expected = parse_js_array(spectrum_page.decode(), "dataDopplerArray")
+    assert np.array_equal(parse_js_array(script.decode(), "dataDopplerArray"), expected)
+    assert extract_script(script) == script
+
+
+def test_extract_script_without_sticks():
+    page = (
+        b"<script>var dataDopplerArray=[\n[200,1],\n[300,2]];\nvar x = 1;</script><p>"
+    )
+    extractor = ScriptExtractor()
+    assert extract_script(chunked(page, 5), extractor).endswith(b"var x = 1;</script>")
+
+    with pytest.raises(ValueError):
+        extract_script(b"<html><script>var x = 1;</script></html>")
+
+
+def test_stream_stops_early(tmp_path):
+    with StandInServer(fixtures_dir=str(tmp_path)) as server:
+        site = SimulatedLIBS(elements=["H"], percentages=[100]).get_site()
+        page = synthetic_page(site)
+        with open(fixture_path(str(tmp_path), site), "wb") as file:
+            file.write(page + b"<p>padding</p>" * 200000)
+        engine = FetchEngine()
+        libs = SimulatedLIBS(elements=["H"], percentages=[100], fetch_engine=engine)
+        assert server.requests == 2
+    assert engine.stats.summary()["bytes"] < 2 * len(page)
+    assert libs.sticks is not None and len(libs.raw_spectrum) > 0
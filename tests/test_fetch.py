@@ -0,0 +1,93 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from simLIBS.fetch import FetchEngine, RateLimiter, RequestCoalescer
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    failures = {"/throttled": 2, "/broken": 100}
+    calls: dict = {}
+
+    def do_GET(self):
+        calls = self.calls[self.path] = self.calls.get(self.path, 0) + 1
+        if calls <= self.failures.get(self.path, 0):
+            self.send_response(429 if self.path == "/throttled" else 503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"spectrum")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    FlakyHandler.calls = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_retries_and_stats(server):
+    engine = FetchEngine(max_retries=3, backoff=0.001)
+    assert engine.get(server + "/throttled") == b"spectrum"
+    with pytest.raises(requests.HTTPError):
+        engine.get(server + "/broken")
+    summary = engine.stats.summary()
+    assert summary["requests"] == 1
+    assert summary["retries"] == 5
+    assert summary["errors"] == 1
+    assert summary["p50[s]"] > 0
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(requests_per_second=100)
+    start = time.perf_counter()
+    for _ in range(11):
+        limiter.acquire()
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_request_coalescer():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return b"page"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(coalescer.call("query", slow_fetch))
+        )
+        for _ in range(5)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while coalescer.coalesced < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [b"page"] * 5
+    assert len(calls) == 1
+
+    with pytest.raises(ZeroDivisionError):
+        coalescer.call("query", lambda: 1 / 0)
+    assert coalescer.call("query", lambda: b"again") == b"again"
+    assert coalescer.calls == 3
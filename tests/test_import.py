@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import simLIBS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(simLIBS.__file__)))
+IMPORT_BUDGET = float(os.environ.get("SIMLIBS_IMPORT_BUDGET", "2.0"))
+
+
+def run(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    ).stdout
+
+
+def test_core_import_is_lightweight():
+    heavy = run(
+        "import sys\n"
+        "import simLIBS\n"
+        "from simLIBS.testing import StandInServer\n"
+        "with StandInServer():\n"
+        "    simLIBS.SimulatedLIBS(elements=['H'], percentages=[100])\n"
+        "print(' '.join(m for m in ['selenium', 'webdriver_manager', 'matplotlib']"
+        " if m in sys.modules))\n"
+    )
+    assert heavy.split() == []
+
+
+def test_cold_import_budget():
+    seconds = float(
+        run(
+            "import time\n"
+            "start = time.perf_counter()\n"
+            "import simLIBS\n"
+            "print(time.perf_counter() - start)\n"
+        )
+    )
+    assert seconds < IMPORT_BUDGET
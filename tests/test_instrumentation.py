@@ -0,0 +1,64 @@
+import json
+
+import pandas as pd
+import pytest
+
+from simLIBS import PipelineStats, SimulatedLIBS
+from simLIBS.fetch import FetchEngine
+from simLIBS.testing import StandInServer
+
+
+@pytest.fixture
+def input_df():
+    return pd.DataFrame({"W": [50, 30], "H": [50, 70], "name": ["A", "B"]})
+
+
+def test_stage_records():
+    seen = []
+    stats = PipelineStats(callback=seen.append)
+    with stats.sample(3):
+        with stats.stage("fetch") as counters:
+            counters["bytes"] = 100
+    stats.record("fetch", 0.5, 50, sample=4)
+    stats.record("interpolate", 0.1, points=10)
+
+    summary = stats.summary()
+    assert list(summary) == ["fetch", "interpolate"]
+    assert summary["fetch"]["count"] == 2
+    assert summary["fetch"]["bytes"] == 150
+    assert summary["fetch"]["max[s]"] == pytest.approx(0.5)
+    assert summary["interpolate"]["points"] == 10
+    assert [record["sample"] for record in seen] == [3, 4, None]
+    assert list(stats.per_sample().index) == [3, 4]
+
+
+def test_create_dataset_stats(input_df, tmp_path):
+    stats = PipelineStats()
+    engine = FetchEngine()
+    with StandInServer():
+        SimulatedLIBS.create_dataset(
+            input_df, size=6, max_workers=3, stats=stats, fetch_engine=engine
+        )
+
+    summary = stats.summary()
+    for stage in [
+        "get_site",
+        "fetch",
+        "html_parse",
+        "retrieve_spectrum",
+        "interpolate",
+        "assemble",
+    ]:
+        assert summary[stage]["count"] == 6
+    # bytes transferred from server, not length of extracted scripts
+    assert summary["fetch"]["bytes"] == engine.stats.bytes > 0
+    assert summary["interpolate"]["points"] == 6 * 8000
+    per_sample = stats.per_sample()
+    assert list(per_sample.index) == list(range(6))
+    assert per_sample.notna().all().all()
+
+    path = tmp_path / "trace.json"
+    stats.export_trace(str(path))
+    events = json.load(open(path))["traceEvents"]
+    assert len(events) == 36
+    assert {event["ph"] for event in events} == {"X"}
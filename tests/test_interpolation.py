@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from scipy.interpolate import CubicSpline, PchipInterpolator
+
+from simLIBS.interpolation import interpolate_spectra
+
+
+def raw_spectra(n_spectra: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    spectra = [(np.array([199.5, 210.5]), np.array([1.0, 3.0]))]
+    for _ in range(n_spectra):
+        wavelength = np.unique(rng.uniform(199.5, 210.5, rng.integers(3, 300)))
+        spectra.append((wavelength, rng.uniform(-1, 5, len(wavelength))))
+    return spectra
+
+
+@pytest.mark.parametrize(
+    "kind, reference",
+    [
+        ("cubic", lambda x, y, grid: CubicSpline(x, y, bc_type="natural")(grid)),
+        ("pchip", lambda x, y, grid: PchipInterpolator(x, y)(grid)),
+        ("linear", lambda x, y, grid: np.interp(grid, x, y)),
+    ],
+)
+def test_interpolate_spectra(kind, reference):
+    spectra = raw_spectra(12)
+    grid = np.linspace(199, 211, 2000)
+    batch = interpolate_spectra(spectra, grid, kind, clip=False, block_size=5)
+    assert batch.intensity.shape == (len(spectra), len(grid))
+    assert batch.intensity.dtype == np.float32
+    for intensity, (x, y) in zip(batch.intensity, spectra):
+        expected = reference(x, y, grid)
+        assert np.allclose(intensity, expected, rtol=1e-5, atol=1e-4)
+    clipped = interpolate_spectra(spectra, grid, kind)
+    assert clipped.intensity.min() >= 0
+
+
+def test_interpolate_spectra_errors():
+    with pytest.raises(ValueError):
+        interpolate_spectra(raw_spectra(1), np.arange(200, 210), kind="quadratic")
+    with pytest.raises(ValueError):
+        interpolate_spectra([(np.array([1.0, 1.0, 2.0]), np.ones(3))], np.arange(3))
+
+
+def test_interpolate_spectra_empty():
+    batch = interpolate_spectra([], np.arange(200, 210))
+    assert batch.intensity.shape == (0, 10)
+    assert batch.intensity.dtype == np.float32
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simLIBS import SimulatedLIBS
+from simLIBS.dataset import DatasetReader, write_dataset
+from simLIBS.library import SpectralLibrary, normalize_spectra
+
+
+@pytest.fixture
+def libs_df(synthetic_nist):
+    input_df = pd.read_csv("data.csv")
+    return SimulatedLIBS.create_dataset(input_df, size=20, seed=4)
+
+
+def test_library_lookup(libs_df, tmp_path):
+    library = SpectralLibrary.build(libs_df, n_components=8)
+    assert len(library) == 20
+    intensity = libs_df.iloc[:, :-6].to_numpy(np.float32)
+    # measured spectra differ in absolute scale
+    result = library.query(3 * intensity[[4, 11]], k=3)
+    assert result["query"].tolist() == [0, 0, 0, 1, 1, 1]
+    nearest = result[result["rank"] == 0]
+    assert nearest["index"].tolist() == [4, 11]
+    assert np.allclose(nearest["distance"], 0, atol=1e-5)
+    assert np.allclose(nearest["Te[eV]"], libs_df["Te[eV]"].iloc[[4, 11]])
+    assert (np.diff(result["distance"].values.reshape(2, 3), axis=1) >= 0).all()
+
+    # brute force in principal subspace gives the same neighbours
+    coordinates = library.transform(intensity[:5])
+    distances = np.linalg.norm(
+        coordinates[:, None, :] - library.coordinates[None, :, :], axis=2
+    )
+    assert np.array_equal(
+        library.kneighbors(intensity[:5], k=4)[1], np.argsort(distances, axis=1)[:, :4]
+    )
+
+    write_dataset(str(tmp_path / "dataset"), libs_df)
+    streamed = SpectralLibrary.build(
+        DatasetReader(str(tmp_path / "dataset")), n_components=8, block_size=7
+    )
+    assert np.allclose(streamed.coordinates, library.coordinates, atol=1e-6)
+
+    library.save(str(tmp_path / "library.npz"))
+    loaded = SpectralLibrary.load(str(tmp_path / "library.npz"))
+    pd.testing.assert_frame_equal(
+        loaded.query(intensity[:3]), library.query(intensity[:3])
+    )
+
+
+def test_library_raw_query(libs_df):
+    library = SpectralLibrary.build(libs_df, n_components=8, normalization="max")
+    wavelength = library.grid.values
+    intensity = libs_df.iloc[7, :-6].to_numpy(np.float64)
+    # measured spectrum on its own, coarser grid
+    raw = (wavelength[::2], intensity[::2])
+    nearest = library.query([raw], k=1)
+    # sample 12 has the same composition and almost the same Te
+    assert nearest["index"].tolist()[0] in [7, 12]
+    assert abs(nearest["Te[eV]"][0] - libs_df["Te[eV]"][7]) < 0.01
+    assert np.allclose(normalize_spectra(intensity * 5, "max").max(), 1)
+    with pytest.raises(ValueError):
+        library.transform(intensity[:100])
+    with pytest.raises(ValueError):
+        SpectralLibrary.build(libs_df, normalization="median")
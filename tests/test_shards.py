@@ -0,0 +1,77 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from simLIBS import SimulatedLIBS
+from simLIBS.dataset import read_dataset_chunks
+from simLIBS.shards import DatasetSpec, merge_shards, shard_index
+
+
+def test_shards_merge(synthetic_nist, tmp_path):
+    input_df = pd.read_csv("data.csv")
+    spec = DatasetSpec(input_df, size=10, seed=3)
+    spec.save(str(tmp_path / "spec.json"))
+    loaded = DatasetSpec.load(str(tmp_path / "spec.json"))
+    assert loaded.fingerprint() == spec.fingerprint()
+
+    output_dir = str(tmp_path / "shards")
+    jobs = loaded.shards(3)
+    assert [(job.start, job.stop) for job in jobs] == [(0, 3), (3, 6), (6, 10)]
+    # shards run in any order and independently
+    for job in reversed(jobs):
+        job.run(output_dir, chunk_size=2)
+    merged = merge_shards(output_dir, spec)
+
+    SimulatedLIBS.create_dataset(
+        input_df, size=10, seed=3, output_dir=str(tmp_path / "single")
+    )
+    pd.testing.assert_frame_equal(merged, read_dataset_chunks(str(tmp_path / "single")))
+    index = shard_index(output_dir)
+    assert len(index) == 10
+    assert index["shard"].tolist()[2:4] == ["shard-00000", "shard-00001"]
+
+
+def test_shards_incomplete(synthetic_nist, tmp_path):
+    input_df = pd.read_csv("data.csv")
+    spec = DatasetSpec(input_df, size=4, seed=1)
+    jobs = spec.shards(2)
+    jobs[0].run(str(tmp_path))
+    with pytest.raises(ValueError):
+        merge_shards(str(tmp_path))
+
+    jobs[1].run(str(tmp_path))
+    manifest_path = os.path.join(jobs[1].directory(str(tmp_path)), "shard.json")
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    manifest["fingerprint"] = DatasetSpec(input_df, size=4, seed=2).fingerprint()
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file)
+    with pytest.raises(ValueError):
+        merge_shards(str(tmp_path))
+    with pytest.raises(ValueError):
+        spec.shards(5)
+
+
+def test_shards_ranges(synthetic_nist, tmp_path):
+    input_df = pd.read_csv("data.csv")
+    spec = DatasetSpec(input_df, size=6, seed=1)
+    # shard 0 of two shards (0:3) with shard 1 of three shards (2:4) overlaps sample 2
+    spec.shards(2)[0].run(str(tmp_path))
+    spec.shards(3)[1].run(str(tmp_path))
+    with pytest.raises(ValueError, match="different numbers of shards"):
+        merge_shards(str(tmp_path), spec)
+
+    spec.shards(2)[1].run(str(tmp_path))
+    assert len(merge_shards(str(tmp_path), spec)) == 6
+    manifest_path = os.path.join(
+        spec.shards(2)[1].directory(str(tmp_path)), "shard.json"
+    )
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    manifest["start"] = 4
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file)
+    with pytest.raises(ValueError, match="expected start 3"):
+        merge_shards(str(tmp_path), spec)
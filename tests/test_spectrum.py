@@ -0,0 +1,62 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simLIBS import SimulatedLIBS
+from simLIBS.spectrum import Spectrum, SpectrumBatch, WavelengthGrid
+
+
+def test_shared_grid(synthetic_nist):
+    first = SimulatedLIBS(elements=["W"], percentages=[100])
+    second = SimulatedLIBS(elements=["H"], percentages=[100], Te=1.5)
+    assert first.spectrum.grid is second.spectrum.grid
+    assert first.spectrum.intensity.dtype == np.float32
+    assert first.spectrum.intensity.flags["C_CONTIGUOUS"]
+    assert not first.spectrum.grid.values.flags["WRITEABLE"]
+    frame = first.get_interpolated_spectrum().copy()
+    assert list(frame.columns) == ["wavelength", "intensity"]
+    assert frame["intensity"].dtype == np.float64
+    assert np.array_equal(frame["intensity"], np.round(frame["intensity"], 3))
+    assert np.allclose(frame["intensity"], first.spectrum["intensity"], atol=1e-3)
+    # DataFrame is kept: changes in place and assignment are preserved
+    first.interpolated_spectrum["intensity"] *= 2
+    assert np.allclose(
+        first.get_interpolated_spectrum()["intensity"], 2 * frame["intensity"]
+    )
+    first.interpolated_spectrum = frame.iloc[:10]
+    assert len(first.get_interpolated_spectrum()) == 10
+    assert pickle.loads(pickle.dumps(first.spectrum)).grid is first.spectrum.grid
+
+
+def test_spectrum_batch():
+    grid = WavelengthGrid.arange(200, 201, 0.1)
+    assert WavelengthGrid.arange(200, 201, 0.1) is grid
+    spectra = [Spectrum(grid, np.full(len(grid), k)) for k in range(4)]
+    batch = SpectrumBatch.from_spectra(spectra)
+    assert batch.intensity.shape == (4, 10) and batch.nbytes == 4 * 10 * 4
+    assert batch[2].grid is grid and np.all(batch[2].intensity == 2)
+    assert len(batch[1:3]) == 2
+    frame = batch.to_dataframe(pd.DataFrame({"name": list("ABCD")}))
+    assert list(frame.columns[:2]) == ["200.0", "200.1"]
+    assert frame["name"].tolist() == list("ABCD")
+    with pytest.raises(ValueError):
+        SpectrumBatch.from_spectra(
+            spectra + [Spectrum(WavelengthGrid.arange(200, 201, 0.2), np.zeros(5))]
+        )
+    with pytest.raises(ValueError):
+        Spectrum(grid, np.zeros(3))
+
+
+def test_grid_released():
+    import gc
+
+    gc.collect()
+    before = len(WavelengthGrid._grids)
+    grids = [WavelengthGrid.shared(np.linspace(200, 1000 + k, 8000)) for k in range(50)]
+    assert WavelengthGrid.shared(np.linspace(200, 1000, 8000)) is grids[0]
+    assert len(WavelengthGrid._grids) == before + 50
+    del grids
+    gc.collect()
+    assert len(WavelengthGrid._grids) == before
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from simLIBS import SimulatedLIBS
+from simLIBS.fetch import FetchEngine
+from simLIBS.testing import StandInServer, fixture_path
+
+
+def test_simulation_through_stand_in():
+    with StandInServer(latency=0.01) as server:
+        libs = SimulatedLIBS(elements=["W", "H"], percentages=[50, 50])
+        assert libs.get_site().startswith(server.url)
+        libs_df = SimulatedLIBS.create_dataset(
+            pd.read_csv("data.csv"), size=4, max_workers=2
+        )
+    assert server.requests == 5
+    assert libs.get_interpolated_spectrum()["intensity"].max() > 0
+    assert len(libs_df) == 4
+    assert not SimulatedLIBS.__init__.__globals__["NIST_LIBS_URL"].startswith(
+        "http://127"
+    )
+
+
+def test_recorded_fixture_and_errors(tmp_path):
+    with StandInServer():
+        site = SimulatedLIBS(elements=["H"], percentages=[100]).get_site()
+    with open(fixture_path(str(tmp_path), site), "wb") as file:
+        file.write(b"<script>var dataDopplerArray=[\n[200,1],\n[1000,2]];\n</script>")
+
+    with StandInServer(fixtures_dir=str(tmp_path), synthesize=False):
+        recorded = SimulatedLIBS(elements=["H"], percentages=[100])
+        assert np.allclose(recorded.get_raw_spectrum()["intensity"], [1, 2])
+        with pytest.raises(requests.HTTPError):
+            SimulatedLIBS(elements=["He"], percentages=[100])
+
+    engine = FetchEngine(max_retries=2, backoff=0.001)
+    with StandInServer(error_rate=1.0) as server:
+        with pytest.raises(requests.HTTPError):
+            SimulatedLIBS(elements=["H"], percentages=[100], fetch_engine=engine)
+    assert server.errors == 3
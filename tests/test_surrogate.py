@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from simLIBS.surrogate import SurrogateGrid
+
+
+@pytest.fixture
+def grid(synthetic_nist):
+    return SurrogateGrid.build(
+        ["W", "H"],
+        [50, 50],
+        Te_values=np.linspace(1.0, 2.0, 5),
+        Ne_values=np.logspace(17, 18, 3),
+        low_w=400,
+        upper_w=500,
+    )
+
+
+def test_interpolation_at_nodes(grid):
+    assert grid.intensity.shape == (5, 3, 1000)
+    spectra = grid(grid.Te_values[[0, 2, 4]], grid.Ne_values[[0, 1, 2]])
+    assert spectra.dtype == np.float32
+    assert np.allclose(spectra, grid.intensity[[0, 2, 4], [0, 1, 2]])
+    with pytest.raises(ValueError):
+        grid(3.0, 1e17)
+
+
+def test_sample_holdout_and_save(grid, tmp_path):
+    Te, Ne, spectra = grid.sample(100, seed=0)
+    assert spectra.shape == (100, 1000)
+    assert np.all((Te >= 1.0) & (Te <= 2.0))
+    errors = grid.holdout_error()
+    assert 0 <= errors["Te"]["max"] < 1
+    grid.save(tmp_path / "grid.npz")
+    loaded = SurrogateGrid.load(tmp_path / "grid.npz")
+    assert loaded.elements == ["W", "H"]
+    assert np.array_equal(loaded(1.3, 3e17), grid(1.3, 3e17))
+
+
+def test_grid_axes(synthetic_nist, tmp_path):
+    # Ne values equal after rounding of queries are fetched once
+    grid = SurrogateGrid.build(
+        ["W"],
+        [100],
+        Te_values=[1.0, 2.0, 1.0],
+        Ne_values=[1e17, 1.0001e17, 1e18],
+        low_w=400,
+        upper_w=500,
+    )
+    assert np.array_equal(grid.Ne_values, [1e17, 1e18])
+    assert np.array_equal(grid.Te_values, [1.0, 2.0])
+    with pytest.raises(ValueError):
+        SurrogateGrid.build(
+            ["W"], [100], Te_values=[1.0, 2.0], Ne_values=[1e17, 1.0001e17]
+        )
+
+    # grids with repeated nodes are rejected when loaded
+    intensity = np.repeat(grid.intensity, [1, 2], axis=1)
+    np.savez_compressed(
+        tmp_path / "grid.npz",
+        Te_values=grid.Te_values,
+        Ne_values=[1e17, 1e18, 1e18],
+        wavelength=grid.wavelength,
+        intensity=intensity,
+        elements=np.array(grid.elements, dtype=str),
+        percentages=np.array(grid.percentages, dtype=np.float64),
+    )
+    with pytest.raises(ValueError, match="strictly increasing"):
+        SurrogateGrid.load(tmp_path / "grid.npz")
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from simLIBS import ResponseCache, SimulatedLIBS
+from simLIBS.simulation import wavelength_tiles
+from simLIBS.testing import element_lines, synthetic_page
+
+
+def test_wavelength_tiles():
+    assert wavelength_tiles(230, 470, 100, 2) == [
+        (198, 302),
+        (298, 402),
+        (398, 502),
+    ]
+    assert wavelength_tiles(260, 390, 100) == [(200, 300), (300, 400)]
+    with pytest.raises(ValueError):
+        wavelength_tiles(200, 300, 0)
+
+
+def test_tiled_query(monkeypatch, tmp_path):
+    sites = []
+
+    def page(site):
+        sites.append(site)
+        return synthetic_page(site)
+
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(page))
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    parameters = dict(elements=["W", "Fe"], percentages=[50, 50], resolution=2000)
+    libs = SimulatedLIBS(
+        **parameters, low_w=230, upper_w=770, tile_width=100, cache=cache
+    )
+    assert len(sites) == 6
+    wavelength = libs.raw_spectrum["wavelength"]
+    assert wavelength.iloc[0] >= 230 and wavelength.iloc[-1] <= 770
+    assert wavelength.is_monotonic_increasing
+    assert len(libs.get_interpolated_spectrum()) == 5400
+
+    grid = libs.spectrum.wavelength
+    expected = np.zeros_like(grid)
+    for element in ["W", "Fe"]:
+        positions, energies, _ = element_lines(element, 230, 770)
+        for position, energy in zip(positions, energies):
+            width = position / 2000 / 2.355
+            expected += (
+                50e3 * np.exp(-energy) * np.exp(-0.5 * ((grid - position) / width) ** 2)
+            )
+    assert np.abs(libs.spectrum.intensity - expected).max() < 0.02 * expected.max()
+    assert np.allclose(
+        np.sort(libs.sticks["wavelength"]),
+        np.sort(np.concatenate([element_lines(e, 230, 770)[0] for e in ["W", "Fe"]])),
+    )
+
+    # overlapping range of another object is served from cached tiles
+    SimulatedLIBS(**parameters, low_w=310, upper_w=560, tile_width=100, cache=cache)
+    assert len(sites) == 6
+
+
+def test_tiled_workers(monkeypatch):
+    import threading
+    import time
+
+    from simLIBS.fetch import FetchEngine
+
+    lock = threading.Lock()
+    state = {"running": 0, "max_running": 0, "threads": set()}
+
+    def page(site):
+        with lock:
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+            state["threads"].add(threading.get_ident())
+        time.sleep(0.01)
+        with lock:
+            state["running"] -= 1
+        return synthetic_page(site)
+
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(page))
+    parameters = dict(elements=["W", "Fe"], percentages=[50, 50], Te=1.3)
+    SimulatedLIBS(
+        **parameters,
+        low_w=200,
+        upper_w=400,
+        tile_width=10,
+        fetch_engine=FetchEngine(max_concurrency=3),
+    )
+    assert state["max_running"] <= 3 and len(state["threads"]) <= 3
+    with pytest.raises(ValueError):
+        SimulatedLIBS(**parameters, webscraping="dynamic", tile_width=100)
+
+
+def test_tiled_query_empty_tile(monkeypatch):
+    def page(site):
+        # tile 298-402 has no lines, NIST LIBS returns empty arrays
+        if "low_w=298" in site:
+            return (
+                b"<html><body><script>\n    var dataDopplerArray=[\n];\n"
+                b"    var dataSticksArray=[\n];\n</script></body></html>"
+            )
+        return synthetic_page(site)
+
+    monkeypatch.setattr(SimulatedLIBS, "download_static", staticmethod(page))
+    libs = SimulatedLIBS(
+        elements=["W", "Fe"],
+        percentages=[50, 50],
+        resolution=2000,
+        low_w=230,
+        upper_w=470,
+        tile_width=100,
+    )
+    assert list(libs.ion_spectra.columns)[:2] == ["Wavelength (nm)", "Sum(calc)"]
+    assert libs.ion_spectra.shape[1] == 10
+    wavelength = libs.raw_spectrum["wavelength"]
+    assert wavelength.is_monotonic_increasing
+    assert wavelength.iloc[0] >= 230 and wavelength.iloc[-1] <= 470
+    inside = (wavelength > 302) & (wavelength < 398)
+    assert inside.sum() > 0 and (libs.raw_spectrum["intensity"][inside] == 0).all()
+    assert len(libs.get_interpolated_spectrum()) == 2400
+    assert not libs.sticks["wavelength"].between(298, 398).any()